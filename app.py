@@ -14,7 +14,7 @@ from flask_jwt_extended import JWTManager
 from resources.auth_resource import SignupResource, LogoutResource, VerifyOTPResource, LoginResource, GoogleAuthorize, ResendOTPResource, ForgotPasswordResource, ResetPasswordResource, ChangePasswordResource
 from resources.user_resource import UserProfileResource, UserHealthResource, UserProfile
 from resources.task_recommendation_resource import TaskRecommendationResource
-from resources.task_resource import TaskResource, SingleTaskResource, TaskStatusResource
+from resources.task_resource import TaskResource, SingleTaskResource, TaskBatchResource, TaskStatusResource
 from resources.task_activity_resource import TaskActivityResource
 from resources.task_status_update import StatusUpdate
 from resources.conversation_resource import ConversationResource, OlderMessages, ChatResource
@@ -70,6 +70,30 @@ def create_app():
         JWT_HEADER_TYPE="Bearer",
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
         FRONTEND_URL=os.getenv("FRONTEND_URL", "http://localhost:3000"),
+        # Let Gemini re-order the locally ranked shortlist of recommended doers
+        RECOMMENDATION_LLM_RERANK=os.getenv("RECOMMENDATION_LLM_RERANK", "False").lower() == "true",
+        # Tasks recommended per pass of the batch queue, and seconds one run may spend draining it
+        RECOMMENDATION_BATCH_SIZE=int(os.getenv("RECOMMENDATION_BATCH_SIZE", 500)),
+        RECOMMENDATION_BATCH_TIME_BUDGET=int(os.getenv("RECOMMENDATION_BATCH_TIME_BUDGET", 60)),
+
+        # Gemini client: endpoint, response cache and limits shared by all workers
+        GEMINI_API_KEY=os.getenv("GEMINI_API_KEY"),
+        GEMINI_BASE_URL=os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta"),
+        GEMINI_MODEL=os.getenv("GEMINI_MODEL", "gemini-2.0-flash"),
+        GEMINI_CACHE_TTL=int(os.getenv("GEMINI_CACHE_TTL", 60 * 60 * 24)),
+        GEMINI_RATE_PER_SECOND=float(os.getenv("GEMINI_RATE_PER_SECOND", 5)),
+        GEMINI_BURST=int(os.getenv("GEMINI_BURST", 10)),
+        GEMINI_MAX_CONCURRENCY=int(os.getenv("GEMINI_MAX_CONCURRENCY", 4)),
+        # Seconds new tasks wait to be categorized together (0 categorizes each on its own)
+        CATEGORIZATION_BATCH_WINDOW=float(os.getenv("CATEGORIZATION_BATCH_WINDOW", 5)),
+        CATEGORIZATION_BATCH_SIZE=int(os.getenv("CATEGORIZATION_BATCH_SIZE", 20)),
+        # Seconds a socket connection counts as online without a heartbeat
+        PRESENCE_TTL=int(os.getenv("PRESENCE_TTL", 90)),
+        # Redis pub/sub that carries Socket.IO emits between processes
+        SOCKETIO_MESSAGE_QUEUE=os.getenv("SOCKETIO_MESSAGE_QUEUE", os.getenv("REDIS_URL", "redis://localhost:6379/0")),
+        # Seconds chat messages wait in Redis before a batched insert
+        MESSAGE_FLUSH_WINDOW=int(os.getenv("MESSAGE_FLUSH_WINDOW", 1)),
+        MESSAGE_FLUSH_BATCH_SIZE=int(os.getenv("MESSAGE_FLUSH_BATCH_SIZE", 1000)),
 
         # Caching config
         CACHE_TYPE="RedisCache",
@@ -96,7 +120,9 @@ def create_app():
     bcrypt.init_app(app)                # Password hashing
     db.init_app(app)                    # Database connection
     jwt = JWTManager(app)              # JWT authentication
-    socketio.init_app(app, cors_allowed_origins="*")  # Real-time communication
+    # Real-time communication; the Redis queue lets every web process and
+    # Celery worker emit to sockets held by any other process
+    socketio.init_app(app, cors_allowed_origins="*", message_queue=app.config["SOCKETIO_MESSAGE_QUEUE"])
 
     
     # Set up cache
@@ -202,6 +228,7 @@ def create_app():
     # Task routes
     api.add_resource(TaskResource, '/tasks')
     api.add_resource(SingleTaskResource, '/tasks/<int:task_id>')
+    api.add_resource(TaskBatchResource, '/tasks/batch')
     # api.add_resource(TaskStatusResource, '/tasks/<int:task_id>/status')
     api.add_resource(StatusUpdate, '/tasks/<int:task_id>/status')
     api.add_resource(TaskAssignResource, '/tasks/<int:task_id>/assign')
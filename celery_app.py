@@ -13,13 +13,44 @@ celery.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
-    imports=['workers', 'workers.batch_recommendation']
+    imports=['workers', 'workers.batch_recommendation', 'workers.task_views', 'workers.doer_locations', 'workers.task_classifier', 'workers.presence', 'workers.chat_messages', 'workers.user_stats']
 )
 celery.conf.beat_schedule = {
     'process-batch-recommendation': {
         'task': 'workers.process_batch_recommendation',
         'schedule': 360.0,  # Run every 60 seconds
         'args': ()
+    },
+    'flush-task-views': {
+        'task': 'workers.flush_task_views',
+        'schedule': 60.0,
+        'args': ()
+    },
+    'rebuild-doer-locations': {
+        'task': 'workers.rebuild_doer_locations',
+        'schedule': 3600.0,
+        'args': ()
+    },
+    'train-task-classifier': {
+        'task': 'workers.train_task_classifier',
+        'schedule': 6 * 3600.0,
+        'args': ()
+    },
+    'flush-presence': {
+        'task': 'workers.flush_presence',
+        'schedule': 30.0,
+        'args': ()
+    },
+    'reconcile-user-stats': {
+        'task': 'workers.reconcile_user_stats',
+        'schedule': 24 * 3600.0,
+        'args': ()
+    },
+    # Backstop; new messages schedule their own flush within a second
+    'flush-chat-messages': {
+        'task': 'workers.flush_chat_messages',
+        'schedule': 30.0,
+        'args': ()
     }
 }
 
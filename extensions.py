@@ -3,4 +3,9 @@ from flask_socketio import SocketIO
 
 socketio = SocketIO(cors_allowed_origins="*")
 
+
+def user_room(user_id):
+    """Room every socket of a user joins on connect; emit here to reach all their devices."""
+    return f"user:{user_id}"
+
 bcrypt = Bcrypt()
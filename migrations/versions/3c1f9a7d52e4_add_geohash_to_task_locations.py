@@ -0,0 +1,61 @@
+"""add geohash to task_locations
+
+Revision ID: 3c1f9a7d52e4
+Revises: 8b6ee001cf83
+Create Date: 2026-10-18 09:42:11.402518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from utils.geohash import encode as encode_geohash
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1f9a7d52e4'
+down_revision = '8b6ee001cf83'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('task_locations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('geohash', sa.String(length=9), nullable=True, comment='Geohash cell of latitude/longitude, kept in sync on write'))
+
+    # Backfill existing rows
+    conn = op.get_bind()
+    task_locations = sa.table(
+        'task_locations',
+        sa.column('id', sa.Integer),
+        sa.column('latitude', sa.Numeric),
+        sa.column('longitude', sa.Numeric),
+        sa.column('geohash', sa.String),
+    )
+    rows = conn.execute(
+        sa.select(task_locations.c.id, task_locations.c.latitude, task_locations.c.longitude)
+    ).fetchall()
+    updates = [
+        {'row_id': row.id, 'geohash': encode_geohash(row.latitude, row.longitude)}
+        for row in rows
+        if row.latitude is not None and row.longitude is not None
+    ]
+    if updates:
+        conn.execute(
+            task_locations.update()
+            .where(task_locations.c.id == sa.bindparam('row_id'))
+            .values(geohash=sa.bindparam('geohash')),
+            updates
+        )
+
+    with op.batch_alter_table('task_locations', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_task_locations_geohash_task',
+            ['geohash', 'task_id'],
+            unique=False,
+            postgresql_ops={'geohash': 'varchar_pattern_ops'}
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('task_locations', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_locations_geohash_task')
+        batch_op.drop_column('geohash')
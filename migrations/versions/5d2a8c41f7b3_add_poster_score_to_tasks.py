@@ -0,0 +1,48 @@
+"""add poster_score to tasks
+
+Revision ID: 5d2a8c41f7b3
+Revises: 3c1f9a7d52e4
+Create Date: 2026-10-18 10:05:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2a8c41f7b3'
+down_revision = '3c1f9a7d52e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('poster_score', sa.Float(), server_default='0', nullable=False, comment="Poster's ranking score, denormalized from user_info"))
+
+    # Backfill from the current profiles in a single statement
+    tasks = sa.table('tasks', sa.column('user_id', sa.Integer), sa.column('poster_score', sa.Float))
+    user_info = sa.table(
+        'user_info',
+        sa.column('user_id', sa.Integer),
+        sa.column('rating', sa.Float),
+        sa.column('completion_rate', sa.Float),
+    )
+    score = (
+        sa.select(
+            sa.func.coalesce(user_info.c.rating, 0) * 0.7 +
+            sa.func.coalesce(user_info.c.completion_rate, 0) * 0.3
+        )
+        .where(user_info.c.user_id == tasks.c.user_id)
+        .scalar_subquery()
+    )
+    op.execute(tasks.update().values(poster_score=sa.func.coalesce(score, 0)))
+
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.create_index('ix_tasks_status_poster_score', ['status', 'poster_score', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_index('ix_tasks_status_poster_score')
+        batch_op.drop_column('poster_score')
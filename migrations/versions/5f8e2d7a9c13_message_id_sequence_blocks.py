@@ -0,0 +1,31 @@
+"""reserve message ids in blocks of 100
+
+Revision ID: 5f8e2d7a9c13
+Revises: d4b1f6e82a05
+Create Date: 2026-10-18 16:05:12.418027
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f8e2d7a9c13'
+down_revision = 'd4b1f6e82a05'
+branch_labels = None
+depends_on = None
+
+# Must stay equal to utils.chat_messages.ID_BLOCK_SIZE
+BLOCK_SIZE = 100
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(f"ALTER SEQUENCE message_id_seq INCREMENT BY {BLOCK_SIZE}")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("ALTER SEQUENCE message_id_seq INCREMENT BY 1")
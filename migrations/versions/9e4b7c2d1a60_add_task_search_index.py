@@ -0,0 +1,40 @@
+"""add full-text search index on tasks
+
+Revision ID: 9e4b7c2d1a60
+Revises: 5d2a8c41f7b3
+Create Date: 2026-10-18 10:48:02.553917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4b7c2d1a60'
+down_revision = '5d2a8c41f7b3'
+branch_labels = None
+depends_on = None
+
+# Must stay identical to models.task.search_vector for the planner to use it
+SEARCH_VECTOR = (
+    "(setweight(to_tsvector('english'::regconfig, title), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, description), 'B'))"
+)
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.create_index(
+        'ix_tasks_search',
+        'tasks',
+        [sa.text(SEARCH_VECTOR)],
+        unique=False,
+        postgresql_using='gin'
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_tasks_search', table_name='tasks')
@@ -0,0 +1,30 @@
+"""add view counts to tasks
+
+Revision ID: b7f3e90a4c18
+Revises: 9e4b7c2d1a60
+Create Date: 2026-10-18 11:32:49.870115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7f3e90a4c18'
+down_revision = '9e4b7c2d1a60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('view_count', sa.Integer(), server_default='0', nullable=False, comment='Snapshot of the Redis view counter'))
+        batch_op.add_column(sa.Column('unique_view_count', sa.Integer(), server_default='0', nullable=False, comment='Snapshot of the Redis unique-viewer estimate'))
+        batch_op.create_index('ix_tasks_status_unique_views', ['status', 'unique_view_count', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_index('ix_tasks_status_unique_views')
+        batch_op.drop_column('unique_view_count')
+        batch_op.drop_column('view_count')
@@ -0,0 +1,104 @@
+"""add user_stats table
+
+Revision ID: c2e8a5f13d97
+Revises: b7f3e90a4c18
+Create Date: 2026-10-18 13:42:09.517306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2e8a5f13d97'
+down_revision = 'b7f3e90a4c18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('review_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_sum', sa.Float(), server_default='0', nullable=False),
+    sa.Column('assigned_count', sa.Integer(), server_default='0', nullable=False, comment='Assignments where the user is the doer'),
+    sa.Column('completed_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name=op.f('fk_user_stats_user_id_users'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', name=op.f('pk_user_stats'))
+    )
+
+    # Backfill every user's totals with one full scan of reviews and assignments
+    users = sa.table('users', sa.column('id', sa.Integer))
+    reviews = sa.table('reviews', sa.column('reviewee_id', sa.Integer), sa.column('rating', sa.Float))
+    assignments = sa.table('task_assignments', sa.column('task_doer', sa.Integer), sa.column('status', sa.String))
+    user_stats = sa.table(
+        'user_stats',
+        sa.column('user_id', sa.Integer),
+        sa.column('review_count', sa.Integer),
+        sa.column('rating_sum', sa.Float),
+        sa.column('assigned_count', sa.Integer),
+        sa.column('completed_count', sa.Integer),
+    )
+    review_totals = (
+        sa.select(
+            reviews.c.reviewee_id.label('user_id'),
+            sa.func.count().label('review_count'),
+            sa.func.sum(reviews.c.rating).label('rating_sum'),
+        )
+        .group_by(reviews.c.reviewee_id)
+        .subquery()
+    )
+    assignment_totals = (
+        sa.select(
+            assignments.c.task_doer.label('user_id'),
+            sa.func.count().label('assigned_count'),
+            sa.func.sum(sa.case((assignments.c.status == 'completed', 1), else_=0)).label('completed_count'),
+        )
+        .group_by(assignments.c.task_doer)
+        .subquery()
+    )
+    op.execute(user_stats.insert().from_select(
+        ['user_id', 'review_count', 'rating_sum', 'assigned_count', 'completed_count'],
+        sa.select(
+            users.c.id,
+            sa.func.coalesce(review_totals.c.review_count, 0),
+            sa.func.coalesce(review_totals.c.rating_sum, 0),
+            sa.func.coalesce(assignment_totals.c.assigned_count, 0),
+            sa.func.coalesce(assignment_totals.c.completed_count, 0),
+        )
+        .select_from(users)
+        .outerjoin(review_totals, review_totals.c.user_id == users.c.id)
+        .outerjoin(assignment_totals, assignment_totals.c.user_id == users.c.id)
+    ))
+
+    # Profiles now carry the derived values, and poster_score follows them
+    user_info = sa.table(
+        'user_info',
+        sa.column('user_id', sa.Integer),
+        sa.column('rating', sa.Float),
+        sa.column('completion_rate', sa.Float),
+    )
+
+    def derived(expression):
+        return sa.select(expression).where(user_stats.c.user_id == user_info.c.user_id).scalar_subquery()
+
+    op.execute(user_info.update().values(
+        rating=derived(user_stats.c.rating_sum / sa.func.nullif(user_stats.c.review_count, 0)),
+        completion_rate=derived(user_stats.c.completed_count * 1.0 / sa.func.nullif(user_stats.c.assigned_count, 0)),
+    ))
+
+    tasks = sa.table('tasks', sa.column('user_id', sa.Integer), sa.column('poster_score', sa.Float))
+    score = (
+        sa.select(
+            sa.func.coalesce(user_info.c.rating, 0) * 0.7 +
+            sa.func.coalesce(user_info.c.completion_rate, 0) * 0.3
+        )
+        .where(user_info.c.user_id == tasks.c.user_id)
+        .scalar_subquery()
+    )
+    op.execute(tasks.update().values(poster_score=sa.func.coalesce(score, 0)))
+
+
+def downgrade():
+    op.drop_table('user_stats')
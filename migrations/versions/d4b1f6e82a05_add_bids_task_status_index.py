@@ -0,0 +1,26 @@
+"""add bids task_id/status index
+
+Revision ID: d4b1f6e82a05
+Revises: c2e8a5f13d97
+Create Date: 2026-10-18 14:27:51.203846
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4b1f6e82a05'
+down_revision = 'c2e8a5f13d97'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('bids', schema=None) as batch_op:
+        batch_op.create_index('ix_bids_task_id_status', ['task_id', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('bids', schema=None) as batch_op:
+        batch_op.drop_index('ix_bids_task_id_status')
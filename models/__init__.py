@@ -23,6 +23,7 @@ from models.bid import Bid
 from models.notification import Notification
 from models.task_image import TaskImage
 from models.review import Review
+from models.user_stats import UserStats
 from models.conversation import Conversation
 from models.message import Message
 from models.push_subscription import PushSubscription
@@ -9,6 +9,10 @@ from sqlalchemy_serializer import SerializerMixin
 class Bid(db.Model, SerializerMixin):
     """Bid model for offers made by users on tasks."""
     __tablename__ = 'bids'
+    __table_args__ = (
+        # Per-task listings and bid summaries filter on task and status
+        db.Index('ix_bids_task_id_status', 'task_id', 'status'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     task_id = db.Column(db.Integer, db.ForeignKey('tasks.id', ondelete="CASCADE"), nullable=False)
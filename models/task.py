@@ -1,6 +1,7 @@
 from . import db
 from sqlalchemy_serializer import SerializerMixin
-from sqlalchemy import Index
+from sqlalchemy import Index, event, func, inspect, select, text, update
+from .user_info import UserInfo
 
 # Association table for the many-to-many relationship between tasks and categories
 task_categories = db.Table(
@@ -19,6 +20,10 @@ class Task(db.Model, SerializerMixin):
     __table_args__ = (
         Index('ix_tasks_is_deleted', 'is_deleted'),
         Index('ix_tasks_deleted_at', 'deleted_at'),
+        # Keyset pages for sort=recommended come straight from this index
+        Index('ix_tasks_status_poster_score', 'status', 'poster_score', 'created_at', 'id'),
+        # Keyset pages for sort=popular
+        Index('ix_tasks_status_unique_views', 'status', 'unique_view_count', 'id'),
     )
 
     serialize_rules = ('-user.tasks', '-location.task', '-categories.tasks', '-images.task')
@@ -34,6 +39,9 @@ class Task(db.Model, SerializerMixin):
     deadline_date = db.Column(db.DateTime, nullable=True, comment="Deadline date if schedule_type is 'before_day'")
     preferred_time = db.Column(db.String(10), nullable=True, comment="Time if schedule_type is 'flexible'")
     status = db.Column(db.String(20), nullable=False, comment="Task status: e.g., 'open', 'in_progress', 'completed', 'cancelled'", server_default="open", default="open")
+    poster_score = db.Column(db.Float, nullable=False, default=0, server_default="0", comment="Poster's ranking score, denormalized from user_info")
+    view_count = db.Column(db.Integer, nullable=False, default=0, server_default="0", comment="Snapshot of the Redis view counter")
+    unique_view_count = db.Column(db.Integer, nullable=False, default=0, server_default="0", comment="Snapshot of the Redis unique-viewer estimate")
     is_deleted = db.Column(db.Boolean, default=False, nullable=False)
     deleted_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
@@ -51,3 +59,79 @@ class Task(db.Model, SerializerMixin):
     categories = db.relationship('Category', secondary=task_categories, backref='tasks')
     images = db.relationship("TaskImage", backref=db.backref("task", lazy=True), cascade="all, delete-orphan", single_parent=True)
     conversations = db.relationship("Conversation", back_populates="task", cascade="all, delete-orphan", lazy='dynamic')
+
+
+# ---------------------------------------------------------------------------
+# Full-text search
+# ---------------------------------------------------------------------------
+# Literals rather than bind parameters so the query expression is textually
+# identical to the indexed one and Postgres can match it to the GIN index.
+SEARCH_CONFIG = text("'english'::regconfig")
+
+
+def search_vector(title, description):
+    """Weighted tsvector of a task: title matches outrank description matches."""
+    return func.setweight(func.to_tsvector(SEARCH_CONFIG, title), text("'A'")).op('||')(
+        func.setweight(func.to_tsvector(SEARCH_CONFIG, description), text("'B'"))
+    )
+
+
+def search_query(terms):
+    """Parse user input with web-search syntax ("quoted phrases", -exclusions, or)."""
+    return func.websearch_to_tsquery(SEARCH_CONFIG, terms)
+
+
+Index(
+    'ix_tasks_search',
+    search_vector(Task.__table__.c.title, Task.__table__.c.description),
+    postgresql_using='gin'
+).ddl_if(dialect='postgresql')
+
+
+# ---------------------------------------------------------------------------
+# Poster score
+# ---------------------------------------------------------------------------
+def poster_score_expression(rating, completion_rate):
+    """Ranking score for sort=recommended; missing profile values count as zero."""
+    return func.coalesce(rating, 0) * 0.7 + func.coalesce(completion_rate, 0) * 0.3
+
+
+def sync_poster_score(connection, user_id):
+    """
+    Recompute poster_score on every task of `user_id` from the current
+    profile in one UPDATE. Runs on the caller's connection so it commits
+    or rolls back together with the change that triggered it.
+    """
+    score = (
+        select(poster_score_expression(UserInfo.rating, UserInfo.completion_rate))
+        .where(UserInfo.user_id == user_id)
+        .scalar_subquery()
+    )
+    connection.execute(
+        update(Task.__table__)
+        .where(Task.__table__.c.user_id == user_id)
+        .values(poster_score=func.coalesce(score, 0))
+    )
+
+
+@event.listens_for(Task, 'before_insert')
+def _set_poster_score(mapper, connection, target):
+    """New tasks start with their poster's current score."""
+    score = connection.execute(
+        select(poster_score_expression(UserInfo.rating, UserInfo.completion_rate))
+        .where(UserInfo.user_id == target.user_id)
+    ).scalar()
+    target.poster_score = score or 0
+
+
+@event.listens_for(UserInfo, 'after_update')
+def _profile_score_changed(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.rating.history.has_changes() or state.attrs.completion_rate.history.has_changes():
+        sync_poster_score(connection, target.user_id)
+
+
+@event.listens_for(UserInfo, 'after_insert')
+@event.listens_for(UserInfo, 'after_delete')
+def _profile_created_or_removed(mapper, connection, target):
+    sync_poster_score(connection, target.user_id)
@@ -1,5 +1,7 @@
 from . import db
 from sqlalchemy_serializer import SerializerMixin
+from sqlalchemy import Index, event
+from utils.geohash import encode as encode_geohash, STORED_PRECISION
 
 # ---------------------------------------------------------------------------
 # Task Locations
@@ -7,6 +9,14 @@ from sqlalchemy_serializer import SerializerMixin
 class TaskLocation(db.Model, SerializerMixin):
     """TaskLocation model storing physical location details for tasks."""
     __tablename__ = 'task_locations'
+    __table_args__ = (
+        # Prefix (LIKE 'abc%') lookups on geohash cells for radius search
+        Index(
+            'ix_task_locations_geohash_task',
+            'geohash', 'task_id',
+            postgresql_ops={'geohash': 'varchar_pattern_ops'}
+        ),
+    )
 
     serialize_rules = ('-task',)
 
@@ -14,6 +24,7 @@ class TaskLocation(db.Model, SerializerMixin):
     task_id = db.Column(db.Integer, db.ForeignKey('tasks.id', ondelete="CASCADE"), unique=True, nullable=False, comment="Associated task")
     latitude = db.Column(db.Numeric(9, 6), nullable=False, comment="Latitude coordinate")
     longitude = db.Column(db.Numeric(9, 6), nullable=False, comment="Longitude coordinate")
+    geohash = db.Column(db.String(STORED_PRECISION), nullable=True, comment="Geohash cell of latitude/longitude, kept in sync on write")
     country = db.Column(db.String(100), nullable=True)
     state = db.Column(db.String(100), nullable=True)
     city = db.Column(db.String(100), nullable=True)
@@ -23,3 +34,13 @@ class TaskLocation(db.Model, SerializerMixin):
 
     # Relationship back to Task
     task = db.relationship("Task", back_populates="location")
+
+
+@event.listens_for(TaskLocation, 'before_insert')
+@event.listens_for(TaskLocation, 'before_update')
+def _sync_geohash(mapper, connection, target):
+    """Keep the geohash cell in step with the coordinates on every write."""
+    if target.latitude is None or target.longitude is None:
+        target.geohash = None
+    else:
+        target.geohash = encode_geohash(target.latitude, target.longitude)
@@ -16,7 +16,7 @@ class User(db.Model, SerializerMixin):
         '-conversations_as_giver', '-conversations_as_doer',
         '-messages_as_sender', '-messages_as_reciever',
         '-relations', '-related_to',
-        '-tasks'
+        '-tasks', '-stats'
     )
 
     id = db.Column(db.Integer, primary_key=True)
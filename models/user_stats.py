@@ -0,0 +1,265 @@
+from . import db
+from sqlalchemy_serializer import SerializerMixin
+from sqlalchemy import case, event, func, inspect, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from .user_info import UserInfo
+from .review import Review
+from .task_assignment import TaskAssignment
+from .task import sync_poster_score
+from .user import User
+
+
+# ---------------------------------------------------------------------------
+#  User stats
+# ---------------------------------------------------------------------------
+class UserStats(db.Model, SerializerMixin):
+    """
+    Per-user running totals behind ratings and completion rates.
+
+    Kept current by the Review, TaskAssignment and User listeners below,
+    which add deltas in the same transaction as the change instead of
+    rescanning every review or assignment the user has. Bulk Query.update /
+    delete bypasses them and must call `rebuild_user_stats`; the periodic
+    `reconcile_user_stats` repairs anything that slipped through.
+    """
+    __tablename__ = 'user_stats'
+
+    serialize_rules = ('-user',)
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_sum = db.Column(db.Float, nullable=False, default=0, server_default="0")
+    assigned_count = db.Column(db.Integer, nullable=False, default=0, server_default="0", comment="Assignments where the user is the doer")
+    completed_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+    user = db.relationship("User", backref=db.backref("stats", uselist=False, passive_deletes=True))
+
+    @property
+    def average_rating(self):
+        """Mean review rating, or None without reviews."""
+        return self.rating_sum / self.review_count if self.review_count else None
+
+    @property
+    def completion_ratio(self):
+        """Completed share of assignments (0..1), or None without assignments."""
+        return self.completed_count / self.assigned_count if self.assigned_count else None
+
+
+# ---------------------------------------------------------------------------
+#  Maintenance
+# ---------------------------------------------------------------------------
+def _scan(connection, user_id):
+    """Full recount for one user."""
+    reviews = connection.execute(
+        select(func.count(Review.id), func.coalesce(func.sum(Review.rating), 0))
+        .where(Review.reviewee_id == user_id)
+    ).one()
+    assignments = connection.execute(
+        select(
+            func.count(TaskAssignment.id),
+            func.coalesce(func.sum(case((TaskAssignment.status == 'completed', 1), else_=0)), 0)
+        )
+        .where(TaskAssignment.task_doer == user_id)
+    ).one()
+    return {
+        'review_count': reviews[0],
+        'rating_sum': reviews[1],
+        'assigned_count': assignments[0],
+        'completed_count': assignments[1],
+    }
+
+
+def sync_profile(connection, user_id):
+    """
+    Copy the derived rating and completion ratio onto user_info and
+    re-rank the user's tasks. UserInfo's own listeners don't fire for
+    Core updates, so poster_score is synced explicitly.
+    """
+    stats = UserStats.__table__
+    rating = stats.c.rating_sum / func.nullif(stats.c.review_count, 0)
+    completion_rate = stats.c.completed_count * 1.0 / func.nullif(stats.c.assigned_count, 0)
+    connection.execute(
+        update(UserInfo.__table__)
+        .where(UserInfo.__table__.c.user_id == user_id)
+        .values(
+            rating=select(rating).where(stats.c.user_id == user_id).scalar_subquery(),
+            completion_rate=select(completion_rate).where(stats.c.user_id == user_id).scalar_subquery(),
+        )
+    )
+    sync_poster_score(connection, user_id)
+
+
+def ensure_stats(connection, user_id):
+    """
+    Create the user's stats row from a recount if it doesn't exist yet.
+    Called from before_* events, so the recount sees the state before the
+    change and the change itself is then counted as a delta. Concurrent
+    first events for a user may both get here; the loser's insert is a no-op.
+    """
+    stats = UserStats.__table__
+    exists = connection.execute(select(stats.c.user_id).where(stats.c.user_id == user_id)).first()
+    if exists is None:
+        dialect = postgresql if connection.dialect.name == 'postgresql' else sqlite
+        connection.execute(
+            dialect.insert(stats)
+            .values(user_id=user_id, **_scan(connection, user_id))
+            .on_conflict_do_nothing(index_elements=['user_id'])
+        )
+
+
+def apply_deltas(connection, user_id, **deltas):
+    """Add `deltas` to the user's running totals in one UPDATE."""
+    stats = UserStats.__table__
+    connection.execute(
+        update(stats)
+        .where(stats.c.user_id == user_id)
+        .values({name: stats.c[name] + delta for name, delta in deltas.items()})
+    )
+    sync_profile(connection, user_id)
+
+
+def rebuild_user_stats(connection, user_id):
+    """Replace the user's totals with a full recount, e.g. after bulk deletes."""
+    stats = UserStats.__table__
+    connection.execute(stats.delete().where(stats.c.user_id == user_id))
+    connection.execute(insert(stats).values(user_id=user_id, **_scan(connection, user_id)))
+    sync_profile(connection, user_id)
+
+
+def reconcile_user_stats(connection, after_id=0, limit=500):
+    """
+    Compare up to `limit` stats rows with user ids above `after_id` to a
+    full recount and rebuild the ones that drifted. Returns (last user id
+    checked or None when done, ids rebuilt).
+    """
+    stats = UserStats.__table__
+    rows = connection.execute(
+        select(stats).where(stats.c.user_id > after_id).order_by(stats.c.user_id).limit(limit)
+    ).all()
+    rebuilt = []
+    for row in rows:
+        expected = _scan(connection, row.user_id)
+        # rating_sum is a float built up from deltas, so compare loosely
+        if any(abs(getattr(row, name) - value) > 1e-6 for name, value in expected.items()):
+            rebuild_user_stats(connection, row.user_id)
+            rebuilt.append(row.user_id)
+    return (rows[-1].user_id if rows else None), rebuilt
+
+
+def _remove_reviews(connection, condition):
+    """
+    Subtract the reviews matching `condition` from their reviewees. For
+    reviews about to be removed by an ON DELETE CASCADE, which the ORM
+    doesn't see (the review backrefs are passive_deletes).
+    """
+    totals = connection.execute(
+        select(Review.reviewee_id, func.count(Review.id), func.sum(Review.rating))
+        .where(condition)
+        .group_by(Review.reviewee_id)
+    ).all()
+    for reviewee_id, count, rating_sum in totals:
+        ensure_stats(connection, reviewee_id)
+        apply_deltas(connection, reviewee_id, review_count=-count, rating_sum=-rating_sum)
+
+
+def _changed(target, attribute):
+    """(old, new) for an attribute changed in this flush, else None."""
+    history = inspect(target).attrs[attribute].history
+    if not history.has_changes():
+        return None
+    old = history.deleted[0] if history.deleted else None
+    return old, getattr(target, attribute)
+
+
+def _completed(status):
+    return 1 if status == 'completed' else 0
+
+
+# Deltas need the previous value even when the attribute was expired when
+# it was set; an active-history listener makes the ORM load it first
+@event.listens_for(Review.rating, 'set', active_history=True)
+@event.listens_for(Review.reviewee_id, 'set', active_history=True)
+@event.listens_for(TaskAssignment.status, 'set', active_history=True)
+@event.listens_for(TaskAssignment.task_doer, 'set', active_history=True)
+def _keep_previous_value(target, value, oldvalue, initiator):
+    pass
+
+
+@event.listens_for(Review, 'before_insert')
+def _review_adding(mapper, connection, target):
+    ensure_stats(connection, target.reviewee_id)
+
+
+@event.listens_for(Review, 'after_insert')
+def _review_added(mapper, connection, target):
+    apply_deltas(connection, target.reviewee_id, review_count=1, rating_sum=target.rating)
+
+
+@event.listens_for(Review, 'before_delete')
+def _review_removed(mapper, connection, target):
+    ensure_stats(connection, target.reviewee_id)
+    apply_deltas(connection, target.reviewee_id, review_count=-1, rating_sum=-target.rating)
+
+
+@event.listens_for(Review, 'after_update')
+def _review_changed(mapper, connection, target):
+    reviewee = _changed(target, 'reviewee_id')
+    if reviewee:
+        for user_id in filter(None, reviewee):
+            rebuild_user_stats(connection, user_id)
+        return
+    rating = _changed(target, 'rating')
+    if rating:
+        ensure_stats(connection, target.reviewee_id)
+        apply_deltas(connection, target.reviewee_id, rating_sum=rating[1] - rating[0])
+
+
+@event.listens_for(TaskAssignment, 'before_insert')
+def _assignment_adding(mapper, connection, target):
+    ensure_stats(connection, target.task_doer)
+
+
+@event.listens_for(TaskAssignment, 'after_insert')
+def _assignment_added(mapper, connection, target):
+    apply_deltas(connection, target.task_doer, assigned_count=1, completed_count=_completed(target.status))
+
+
+@event.listens_for(TaskAssignment, 'before_delete')
+def _assignment_removed(mapper, connection, target):
+    ensure_stats(connection, target.task_doer)
+    apply_deltas(connection, target.task_doer, assigned_count=-1, completed_count=-_completed(target.status))
+    # The database deletes the assignment's review with it
+    _remove_reviews(connection, Review.task_assignment_id == target.id)
+
+
+@event.listens_for(User, 'before_delete')
+def _user_removed(mapper, connection, target):
+    # Reviews the user gave go with them; their own stats row cascades.
+    # Assignments are ORM-deleted first, so their reviews are gone already
+    _remove_reviews(connection, (Review.reviewer_id == target.id) & (Review.reviewee_id != target.id))
+
+
+@event.listens_for(TaskAssignment, 'after_update')
+def _assignment_changed(mapper, connection, target):
+    doer = _changed(target, 'task_doer')
+    if doer:
+        for user_id in filter(None, doer):
+            rebuild_user_stats(connection, user_id)
+        return
+    status = _changed(target, 'status')
+    if status:
+        delta = _completed(status[1]) - _completed(status[0])
+        if delta:
+            ensure_stats(connection, target.task_doer)
+            apply_deltas(connection, target.task_doer, completed_count=delta)
+
+
+@event.listens_for(UserInfo, 'before_insert')
+def _profile_created(mapper, connection, target):
+    """New profiles start with the derived values, not whatever was posted."""
+    row = connection.execute(
+        select(UserStats.__table__).where(UserStats.__table__.c.user_id == target.user_id)
+    ).first()
+    target.rating = row.rating_sum / row.review_count if row and row.review_count else None
+    target.completion_rate = row.completed_count / row.assigned_count if row and row.assigned_count else None
@@ -13,6 +13,10 @@ from models.user import User
 from utils.exceptions import InsufficientBalanceError
 from utils.ledgers.internal import InternalTransfer
 from utils.send_notification import Notify
+from utils.cache_namespace import bump, TASK_FEEDS, user_namespace, task_namespace
+from utils.task_cards import refresh_cards
+from utils.bid_summary import refresh_bid_summaries
+from utils.conversation_partners import refresh_pair
 import logging
 from datetime import datetime
 
@@ -65,6 +69,7 @@ class TaskAssignResource(Resource):
 
             db.session.commit()
             ids = [task.user_id, bid.user_id]
+            refresh_pair(task.user_id, bid.user_id)
             self._invalidate_caches(task_id, ids)
             self._notify_parties(task, bid, rejected_user_ids)
             self._notify_new_convo_convos(ids)
@@ -192,17 +197,17 @@ class TaskAssignResource(Resource):
 
     def _invalidate_caches(self, task_id, user_ids):
         try:
-            redis_cli = current_app.redis
-            for key in redis_cli.scan_iter(f"task_bids_{task_id}_*"):
-                redis_cli.delete(key)
-            redis_cli.delete(f"task_{task_id}")
             cache = current_app.cache
-            cache.delete(f"my_tasks:{user_id}")
             for user_id in user_ids:
                 cache.delete(f"conversations_user_{user_id}")
         except Exception as e:
             logger.error(f"Cache invalidation failed: {e}")
 
+        # Task left the open feed; owner/doer views and bid listings changed
+        bump(TASK_FEEDS, task_namespace(task_id), *[user_namespace(uid) for uid in user_ids])
+        refresh_cards([task_id])
+        refresh_bid_summaries([task_id])
+
     def _notify_new_convo_convos(self, user_ids):
         try:
             sender_id = user_ids[0]
@@ -10,8 +10,10 @@ from models.task import Task
 from models.bid import Bid
 from models.user import User
 from utils.completion_rate import UserCompletionRateCalculator
-from utils.user_rating import UserRatingCalculator
+from utils.user_rating import UserRatingCalculator, RatingResult
 from utils.send_notification import Notify
+from utils.cache_namespace import namespaced_key, bump, user_namespace, task_namespace
+from utils.bid_summary import refresh_bid_summaries
 from celery_app import celery
 import logging
 logger = logging.getLogger(__name__)
@@ -59,7 +61,7 @@ class BidsResource(Resource):
             abort(403, message="Unauthorized access to bids")
 
         args = self.parser.parse_args()
-        cache_key = f"task_bids_{task_id}_{args}"
+        cache_key = namespaced_key(f"task_bids_{task_id}_{args}", task_namespace(task_id))
         cached = current_app.cache.get(cache_key)
         if cached:
             return cached
@@ -75,12 +77,15 @@ class BidsResource(Resource):
             page=args['page'], per_page=args['per_page'], error_out=False
         )
 
-        # Instantiate the completion rate calculator once for this request.
-        comp_rate_calc = UserCompletionRateCalculator(min_tasks=20)
-        # For rating, create a rating calculator.
-        rating_calc = UserRatingCalculator()
+        # Bidder stats for the whole page: one grouped query per calculator
+        bidder_ids = [bid.user_id for bid in paginated.items]
+        completion_rates = UserCompletionRateCalculator(min_tasks=20).calculate_rates(bidder_ids)
+        ratings = UserRatingCalculator().get_user_ratings(bidder_ids)
 
-        bids = [self._serialize_bid(bid, comp_rate_calc, rating_calc) for bid in paginated.items]
+        bids = [
+            self._serialize_bid(bid, completion_rates[bid.user_id], ratings[bid.user_id])
+            for bid in paginated.items
+        ]
 
         response = {
             'bids': bids,
@@ -111,13 +116,10 @@ class BidsResource(Resource):
             return query.order_by(order_fn(Bid.created_at))
         return query.order_by(order_fn(Bid.updated_at))
 
-    def _serialize_bid(self, bid, comp_rate_calc: UserCompletionRateCalculator, rating_calc: UserRatingCalculator):
+    def _serialize_bid(self, bid, completion_rate: float, rating_result: RatingResult):
         """
         Serialize a bid and include both the bidder's Bayesian-adjusted completion rate and rating information.
         """
-        ui = bid.user.user_info or None
-        completion_rate = comp_rate_calc.calculate_rate(bid.user.id)
-        rating_result = rating_calc.get_user_rating(bid.user.id)
         return {
             'id': bid.id,
             'amount': float(bid.amount),
@@ -233,42 +235,10 @@ class BidsResource(Resource):
             abort(409, message="You already have an active bid on this task")
             
     def _invalidate_bid_cache(self, task):
-        try:
-            redis_cli = current_app.cache
-            task_owner_id = task.user_id
-            task_id = task.id
-
-            # Log the start of cache invalidation
-            logger.debug(f"Starting cache invalidation for task {task_id} (owner {task_owner_id})")
-
-            # Define static keys to delete
-            cache_keys = [
-                f"posted_task:{task_owner_id}:{task_id}",   # Task owner view
-                f"my_tasks:{task_owner_id}",                # Task owner's task list
-                f"task_{task_id}"                           # Task detail view
-            ]
-
-            deleted_keys = []
-
-            # Delete static keys
-            for key in cache_keys:
-                result = redis_cli.delete(key)
-                if result:
-                    deleted_keys.append(key)
-
-            # Use scan_iter for pattern matching — non-blocking and safe
-            bid_pattern = f"task_bids_{task_id}_*"
-            for key in redis_cli.scan_iter(match=bid_pattern):
-                result = redis_cli.delete(key)
-                if result:
-                    deleted_keys.append(key)
-
-            logger.debug(f"Cache keys invalidated: {deleted_keys}")
-
-        except Exception as e:
-            logger.exception(f"Cache invalidation failed for task {task_id}: {e}")
+        # Owner's task views, the task detail and every cached bid listing variant
+        bump(user_namespace(task.user_id), task_namespace(task.id))
+        refresh_bid_summaries([task.id])
 
-    
     def _notify_task_owner(self, task, bid):
         try:
             with current_app.app_context():
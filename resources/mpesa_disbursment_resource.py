@@ -9,7 +9,7 @@ from datetime import datetime
 from dotenv import load_dotenv
 import os
 from models import db
-from extensions import socketio
+from extensions import socketio, user_room
 from utils.send_notification import Notify  
 from models.user_wallet import Wallet
 from models.wallet_transactions import WalletTransaction
@@ -198,12 +198,11 @@ class MpesaDisbursmentCallback(Resource):
             float.ledge()
 
             # Realtime socket notification
-            receiver_sid = cache.get(f"user_sid:{user_id}")
             socketio.emit('withdraw_successfully', {
                 "message": "Transaction successful",
                 "transaction_id": transaction_id,
                 "amount": str(amount)
-            }, room=receiver_sid)
+            }, room=user_room(user_id))
 
             # Send platform notification
             Notify(
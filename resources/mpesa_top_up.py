@@ -11,7 +11,7 @@ from models import db
 from models.user_wallet import Wallet
 import re
 from decimal import Decimal
-from extensions import socketio
+from extensions import socketio, user_room
 from utils.send_notification import Notify
 from utils.ledgers.platform import FloatLedger
 from models.user import User
@@ -179,13 +179,12 @@ class MpesaCallbackResource(Resource):
                 )
                 float.ledge()
 
-                receiver_sid = cache.get(f"user_sid:{user_id}")
                 socketio.emit('payment_received', {
                     "message": "Transaction successful",
                     "transaction_id": transaction_id,
                     "amount": str(amount),
                     "phone_number": phone_number
-                }, room=receiver_sid)
+                }, room=user_room(user_id))
 
                 Notify(user_id=user_id, message=f"Wallet top-up of KES {amount} was successful. REF: {transaction_id}", source="wallet", sender_id=user_id).post()
 
@@ -205,12 +204,11 @@ class MpesaCallbackResource(Resource):
 
             else:
                 # Notify user via socket if payment failed
-                receiver_sid = cache.get(f"user_sid:{user_id}")
                 socketio.emit('payment_failed', {
                     "message": "Transaction failed",
                     "reason": result_desc,
                     "code": result_code
-                }, room=receiver_sid)
+                }, room=user_room(user_id))
 
                 return {
                     "message": "Transaction failed",
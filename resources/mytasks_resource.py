@@ -8,6 +8,9 @@ from models.task_assignment import TaskAssignment
 from models.bid import Bid
 from flask import current_app
 from sqlalchemy import and_
+from utils.cache_namespace import namespaced_key, user_namespace
+from utils.task_cards import get_cards
+from utils.bid_summary import get_bid_summaries
 
 class MyPostedTasksResource(Resource):
     @jwt_required()
@@ -20,40 +23,45 @@ class MyPostedTasksResource(Resource):
         if not user:
             abort(404, message="User not found")
 
-        cache_key = f"my_tasks:{user_id}"
+        cache_key = namespaced_key(f"my_tasks:{user_id}", user_namespace(user_id))
         cached = cache.get(cache_key)
         if cached:
             return cached, 200
 
-        tasks = Task.query.filter(
+        task_ids = [
+            row.id for row in Task.query.with_entities(Task.id).filter(
                 and_(
                     Task.user_id == user_id,
                     Task.status != 'completed'
                 )
-                ).options(
-                    joinedload(Task.location),
-                    joinedload(Task.categories),
-                    joinedload(Task.images)
-                ).all()
+            )
+        ]
+        cards = get_cards(task_ids)
+        tasks = [cards[task_id] for task_id in task_ids if task_id in cards]
 
         if not tasks:
             return {"message": "No tasks found for this user"}, 404
 
+        # Bid counts and bidder previews for every open task in one read
+        bid_summaries = get_bid_summaries(
+            task["id"] for task in tasks if task["status"] in ["open", "canceled"]
+        )
+
         result = []
         for task in tasks:
             task_data = {
-                "id": task.id,
-                "status": task.status,
-                "budget": float(task.budget or 0),
-                "work_mode": task.work_mode,
-                "name": task.title,
+                "id": task["id"],
+                "status": task["status"],
+                "budget": float(task["budget"] or 0),
+                "work_mode": task["work_mode"],
+                "name": task["title"],
             }
 
             # If task has been assigned
-            if task.status not in ["open", "canceled"]:
+            if task["status"] not in ["open", "canceled"]:
                 assignment = TaskAssignment.query.options(
                     joinedload(TaskAssignment.doer)
-                ).filter_by(task_id=task.id).first()
+                ).filter_by(task_id=task["id"]).first()
 
                 if assignment:
                     task_data["assignment"] = {
@@ -68,13 +76,17 @@ class MyPostedTasksResource(Resource):
                     }
             else:
                 # If task is still open, include bids
-                bids = Bid.query.options(joinedload(Bid.user)).filter(Bid.task_id == task.id, Bid.status != 'rejected').all()
-                task_data["bids_count"] = len(bids)
+                summary = bid_summaries[task["id"]]
+                task_data["bids_count"] = summary["count"]
+                task_data["lowest_bid"] = summary["min_amount"]
+                task_data["highest_bid"] = summary["max_amount"]
+                task_data["average_bid"] = summary["avg_amount"]
+                # Latest bidders only; the full list is on the task's bids endpoint
                 task_data["bids"] = [
                     {
-                        "price": float(bid.amount),
-                        "bidder_image": bid.user.image if bid.user else None
-                    } for bid in bids
+                        "price": bid["price"],
+                        "bidder_image": bid["bidder_image"]
+                    } for bid in summary["latest"]
                 ]
 
             result.append(task_data)
@@ -91,7 +103,7 @@ class PostedTaskResource(Resource):
         cache = current_app.cache
         user_id = get_jwt_identity()
 
-        cache_key = f"posted_task:{user_id}:{task_id}"
+        cache_key = namespaced_key(f"posted_task:{user_id}:{task_id}", user_namespace(user_id))
         cached = cache.get(cache_key)
         if cached:
             return cached, 200
@@ -193,11 +205,8 @@ class PostedTaskResource(Resource):
 
 def _get_user_data(task, user):
     """Helper to get assigned user data with average rating."""
-    user_reviews = user.reviews_received if task.user else []
-    avg_rating = (
-        sum(r.rating for r in user_reviews) / len(user_reviews)
-        if user_reviews else 0.0
-    )
+    stats = user.stats if task.user else None
+    avg_rating = stats.average_rating if stats and stats.review_count else 0.0
     return {
         'id': user.id,
         'name': user.name,
@@ -211,7 +220,7 @@ class MyAssignedTasksResource(Resource):
     def get(self):
         user_id = get_jwt_identity()
         cache = current_app.cache
-        cache_key = f"assigned_tasks:{user_id}"
+        cache_key = namespaced_key(f"assigned_tasks:{user_id}", user_namespace(user_id))
 
         # Check for cached response
         cached = cache.get(cache_key)
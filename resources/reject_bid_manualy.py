@@ -5,6 +5,8 @@ from models.bid import Bid
 from workers.notifications import bid_rejected_single
 from models.task import Task
 from flask import current_app
+from utils.cache_namespace import bump, user_namespace, task_namespace
+from utils.bid_summary import refresh_bid_summaries
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,8 +23,6 @@ class BidRejectResource(Resource):
 
     @jwt_required()  # Ensure the user is authenticated
     def post(self, task_id):
-        cache = current_app.cache
-
         # Get and validate current user identity
         raw_identity = get_jwt_identity()
         try:
@@ -56,8 +56,9 @@ class BidRejectResource(Resource):
             db.session.commit()
             logger.info(f"Bid {bid_id} for task {task_id} rejected by user {user_id}")
 
-            # Clear task cache for the poster
-            cache.delete(f"posted_task:{task.user_id}:{task_id}")
+            # Clear task caches for the poster, the task detail and its bid listings
+            bump(user_namespace(task.user_id), task_namespace(task_id))
+            refresh_bid_summaries([task_id])
 
             # Send notification asynchronously via Celery
             self._notify_user_bid_rejected(task_id, bid.user_id, task.user_id)
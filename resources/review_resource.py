@@ -4,6 +4,7 @@ from flask import request, current_app
 from models import db
 from models.review import Review
 from sqlalchemy.orm import joinedload  # Make sure this is imported
+from utils.cache_namespace import bump, TASK_FEEDS
 
 class ReviewListResource(Resource):
     @jwt_required()
@@ -73,6 +74,8 @@ class ReviewListResource(Resource):
 
         db.session.add(review)
         db.session.commit()
+        # The reviewee's rating feeds poster_score and the recommended order
+        bump(TASK_FEEDS)
 
         # Optional: clear relevant cached pages
         for i in range(1, 6):  # Assume first 5 pages could be affected
@@ -91,11 +94,8 @@ class ReviewListResource(Resource):
 
 def _get_user_data(user):
     """Helper to extract user data with average rating."""
-    user_reviews = user.reviews_received or []
-    avg_rating = (
-        sum(r.rating for r in user_reviews) / len(user_reviews)
-        if user_reviews else 0.0
-    )
+    stats = user.stats
+    avg_rating = stats.average_rating if stats and stats.review_count else 0.0
     return {
         "id": user.id,
         "name": user.name,
@@ -146,6 +146,8 @@ class ReviewResource(Resource):
             review.comment = args['comment']
 
         db.session.commit()
+        if args['rating'] is not None:
+            bump(TASK_FEEDS)
 
         result = {"review": {
                     "id": review.id,
@@ -170,6 +172,7 @@ class ReviewResource(Resource):
 
         db.session.delete(review)
         db.session.commit()
+        bump(TASK_FEEDS)
 
         current_app.cache.delete(f"review:{review_id}")
 
@@ -1,11 +1,12 @@
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy.orm import joinedload
 from models.task import Task
 from models.task_assignment import TaskAssignment
 from flask import current_app, request
 from collections import defaultdict
 from datetime import datetime, date, timedelta
+from utils.cache_namespace import namespaced_key, user_namespace
+from utils.task_cards import get_cards, format_datetime
 
 class TaskActivityResource(Resource):
     @jwt_required()
@@ -20,26 +21,21 @@ class TaskActivityResource(Resource):
             return {"message": "Invalid pagination parameters."}, 400
 
         offset = (page - 1) * limit
-        cache_key = f"task_activity:{user_id}:{page}:{limit}"
+        cache_key = namespaced_key(f"task_activity:{user_id}:{page}:{limit}", user_namespace(user_id))
         cached = cache.get(cache_key)
         if cached:
             return cached, 200
 
-        # Fetch tasks
-        posted_tasks = Task.query.filter(Task.user_id == user_id).options(
-            joinedload(Task.location),
-            joinedload(Task.categories),
-            joinedload(Task.images)
-        ).all()
-
+        # Fetch task ids, then read both sides from the task cards in one go
+        posted_task_ids = [
+            row.id for row in Task.query.with_entities(Task.id).filter(Task.user_id == user_id)
+        ]
         task_assignments = TaskAssignment.query.filter(TaskAssignment.task_doer == user_id).all()
         assigned_task_ids = [a.task_id for a in task_assignments]
-        assigned_tasks = Task.query.filter(Task.id.in_(assigned_task_ids)).options(
-            joinedload(Task.user),
-            joinedload(Task.location),
-            joinedload(Task.categories),
-            joinedload(Task.images)
-        ).all()
+
+        cards = get_cards(posted_task_ids + assigned_task_ids)
+        posted_tasks = [cards[task_id] for task_id in posted_task_ids if task_id in cards]
+        assigned_tasks = [cards[task_id] for task_id in dict.fromkeys(assigned_task_ids) if task_id in cards]
 
         # Create lists
         activity_list = []
@@ -48,13 +44,17 @@ class TaskActivityResource(Resource):
         previous_month = (today.replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
 
         # Earnings Insights
-        completed_assignments = [a for a in task_assignments if a.task.status == "completed"]
+        completed_assignments = [
+            a for a in task_assignments
+            if a.task_id in cards and cards[a.task_id]["status"] == "completed"
+        ]
         total_earnings = sum(float(a.agreed_price or 0) for a in completed_assignments)
         earnings_by_month = defaultdict(float)
 
         for a in completed_assignments:
-            if a.task and a.task.created_at:
-                month = a.task.created_at.strftime("%Y-%m")
+            created_at = cards[a.task_id]["created_at"]
+            if created_at:
+                month = format_datetime(created_at, "%Y-%m")
                 earnings_by_month[month] += float(a.agreed_price or 0)
 
         earnings_this_month = earnings_by_month.get(current_month, 0)
@@ -65,14 +65,14 @@ class TaskActivityResource(Resource):
         )
 
         # Spending Insights
-        completed_posted_tasks = [t for t in posted_tasks if t.status == "completed"]
-        total_spent = sum(float(t.budget or 0) for t in completed_posted_tasks)
+        completed_posted_tasks = [t for t in posted_tasks if t["status"] == "completed"]
+        total_spent = sum(float(t["budget"] or 0) for t in completed_posted_tasks)
         spending_by_month = defaultdict(float)
 
         for t in completed_posted_tasks:
-            if t.created_at:
-                month = t.created_at.strftime("%Y-%m")
-                spending_by_month[month] += float(t.budget or 0)
+            if t["created_at"]:
+                month = format_datetime(t["created_at"], "%Y-%m")
+                spending_by_month[month] += float(t["budget"] or 0)
 
         spending_this_month = spending_by_month.get(current_month, 0)
         spending_last_month = spending_by_month.get(previous_month, 0)
@@ -82,43 +82,45 @@ class TaskActivityResource(Resource):
         )
 
         # Populate Activity List
+        # Card datetimes are already ISO strings
         for task in posted_tasks:
             activity_list.append({
                 "type": "posted",
-                "id": task.id,
-                "title": task.title,
-                "description": task.description,
-                "status": task.status,
-                "work_mode": task.work_mode,
-                "budget": float(task.budget or 0),
-                "deadline_date": task.deadline_date.isoformat() if task.deadline_date else None,
-                "created_at": task.created_at.isoformat() if task.created_at else None,
-                "preferred_time": task.preferred_time,
-                "schedule_type": task.schedule_type,
-                "specific_date": task.specific_date.isoformat() if task.specific_date else None,
+                "id": task["id"],
+                "title": task["title"],
+                "description": task["description"],
+                "status": task["status"],
+                "work_mode": task["work_mode"],
+                "budget": float(task["budget"] or 0),
+                "deadline_date": task["deadline_date"],
+                "created_at": task["created_at"],
+                "preferred_time": task["preferred_time"],
+                "schedule_type": task["schedule_type"],
+                "specific_date": task["specific_date"],
             })
 
         for task in assigned_tasks:
-            assignment = next((a for a in task_assignments if a.task_id == task.id), None)
+            assignment = next((a for a in task_assignments if a.task_id == task["id"]), None)
             if not assignment:
                 continue
 
+            giver = task["user"]
             activity_list.append({
                 "type": "assigned",
-                "id": task.id,
-                "title": task.title,
-                "description": task.description,
-                "status": task.status,
+                "id": task["id"],
+                "title": task["title"],
+                "description": task["description"],
+                "status": task["status"],
                 "agreed_price": float(assignment.agreed_price or 0),
-                "deadline_date": task.deadline_date.isoformat() if task.deadline_date else None,
-                "created_at": task.created_at.isoformat() if task.created_at else None,
-                "preferred_time": task.preferred_time,
-                "schedule_type": task.schedule_type,
-                "specific_date": task.specific_date.isoformat() if task.specific_date else None,
+                "deadline_date": task["deadline_date"],
+                "created_at": task["created_at"],
+                "preferred_time": task["preferred_time"],
+                "schedule_type": task["schedule_type"],
+                "specific_date": task["specific_date"],
                 "task_giver": {
-                    "id": task.user.id if task.user else None,
-                    "name": task.user.name if task.user else None,
-                    "avatar": task.user.image if task.user else None
+                    "id": giver["id"] if giver else None,
+                    "name": giver["name"] if giver else None,
+                    "avatar": giver["image"] if giver else None
                 }
             })
 
@@ -1,11 +1,12 @@
 from flask_restful import Resource, reqparse, abort
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask import current_app
-from workers.tasks import categorize_task
-from sqlalchemy import func, case, or_
+from workers.tasks import categorize_task, flush_categorization_batch
+from utils.categorization_queue import add_pending
+from sqlalchemy import func, case, or_, tuple_
 from sqlalchemy.orm import joinedload
 from models import db
-from models.task import Task
+from models.task import Task, task_categories, search_vector, search_query
 from models.task_location import TaskLocation
 from models.category import Category
 from models.user import User
@@ -13,7 +14,17 @@ from models.user_info import UserInfo
 from models.task_image import TaskImage
 from models.bid import Bid
 from models.task_assignment import TaskAssignment
+from models.user_stats import UserStats
+from utils.geohash import cells_covering
+from utils.haversine_distance_km import haversine_distance_sql
+from utils.cache_namespace import namespaced_key, namespaced_keys, bump, TASK_FEEDS, user_namespace, task_namespace
+from utils.feed_cache import fingerprint, cached_response, make_etag
+from utils.task_cards import get_cards, refresh_cards, format_datetime, SERIALIZER_DATETIME_FORMAT
+from utils.bid_summary import get_bid_summaries, refresh_bid_summaries
+from utils.projections import Projection
+from utils.task_views import record_view, get_view_counts
 from datetime import datetime, timezone
+from collections import defaultdict
 import math
 import logging
 import json
@@ -24,6 +35,17 @@ from werkzeug.exceptions import HTTPException
 
 logger = logging.getLogger(__name__)
 
+# Column projections for the task detail view, compiled once at import
+TASK_DETAIL = Projection(
+    'task',
+    Task.id, Task.title, Task.description, Task.budget, Task.work_mode, Task.status,
+    Task.schedule_type, Task.specific_date, Task.deadline_date, Task.preferred_time,
+    Task.created_at, Task.updated_at
+)
+LOCATION_SUMMARY = Projection('location', TaskLocation.id, TaskLocation.city, TaskLocation.latitude, TaskLocation.longitude)
+CATEGORY_SUMMARY = Projection('category', Category.id, Category.name)
+IMAGE_SUMMARY = Projection('image', TaskImage.id, TaskImage.image_url)
+
 # Haversine formula for distance calculation
 def haversine(lat1, lon1, lat2, lon2):
     R = 6371  # Earth radius in kilometers
@@ -48,32 +70,40 @@ class TaskResource(Resource):
     parser.add_argument('radius', type=float, location='args')
     parser.add_argument('lat', type=float, location='args')
     parser.add_argument('lon', type=float, location='args')
+    parser.add_argument('q', type=str, location='args')
     parser.add_argument('sort', type=str, location='args',
-                        choices=['price', 'distance', 'due_date', 'recent', 'recommended'],
-                        default='recent')
+                        choices=['price', 'distance', 'due_date', 'recent', 'recommended', 'relevance', 'popular'])
 
     @jwt_required()
     def get(self):
         user_id = get_jwt_identity()
         args = self.parser.parse_args()
-        cache = current_app.cache
-        cache_key = f"tasks_{args['cursor']}_{args['limit']}_" \
-                    f"{args.get('work_mode')}_{args.get('city')}_" \
-                    f"{args.get('min_price')}_{args.get('max_price')}_" \
-                    f"{args.get('sort')}"
-
-        # Try cached response
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return cached_data
-
-        # Base query with eager loading
-        query = Task.query.options(
-            joinedload(Task.location),
-            joinedload(Task.categories),
-            joinedload(Task.user).joinedload(User.user_info)
+
+        # Keyword searches rank by relevance unless another sort is asked for
+        args['q'] = (args['q'] or '').strip() or None
+        if not args['sort']:
+            args['sort'] = 'relevance' if args['q'] else 'recent'
+
+        # Canonical key over every parsed argument; the generation-free
+        # variant keeps the last good page around as a stale fallback
+        base_key = fingerprint("tasks", args)
+        cache_key = namespaced_key(base_key, TASK_FEEDS)
+
+        # Only one worker rebuilds a cold page; the rest wait or get stale data.
+        # Clients revalidating an unchanged page get a bodyless 304.
+        return cached_response(
+            cache_key,
+            lambda: self._build_feed_page(args),
+            timeout=300,
+            stale_key=f"{base_key}:stale"
         )
 
+    def _build_feed_page(self, args):
+        """Run the feed query for one page and render it from task cards"""
+        # Only ids and sort keys come from the database; everything
+        # displayed is read from the precomputed cards
+        query = Task.query.with_entities(Task.id)
+
         # Apply filters and sorting
         query = self._apply_filters(query, args)
         query = self._apply_sorting(query, args)
@@ -85,43 +115,54 @@ class TaskResource(Resource):
                 decoded_cursor = urllib.parse.unquote(args['cursor'])
                 cursor_str = base64.b64decode(decoded_cursor).decode('utf-8')
                 cursor_data = json.loads(cursor_str)
-                query = self._apply_cursor(query, args['sort'], cursor_data)
+                query = self._apply_cursor(query, args, cursor_data)
             except Exception as e:
                 current_app.logger.error(f"Cursor decoding failed: {str(e)}")
                 abort(400, message="Invalid cursor format")
 
         # Fetch limit + 1 to check for next page
-        tasks = query.limit(args['limit'] + 1).all()
+        rows = query.limit(args['limit'] + 1).all()
 
-        next_cursor = None
-        if len(tasks) > args['limit']:
-            tasks = tasks[:args['limit']]
-            next_cursor = self._create_next_cursor(tasks[-1], args['sort'])
+        next_row = None
+        if len(rows) > args['limit']:
+            rows = rows[:args['limit']]
+            next_row = rows[-1]
 
-        serialized_tasks = [self._serialize_task(t, args) for t in tasks]
+        cards = get_cards(row.id for row in rows)
 
-        response = {
+        # Distance-sorted queries carry the database-computed distance
+        by_distance = self._sorts_by_distance(args)
+        serialized_tasks = [
+            self._serialize_task(cards[row.id], args, float(row.distance) if by_distance else None)
+            for row in rows if row.id in cards
+        ]
+
+        next_cursor = None
+        if next_row is not None and next_row.id in cards:
+            next_cursor = self._create_next_cursor(cards[next_row.id], args['sort'], next_row)
+
+        return {
             'tasks': serialized_tasks,
             'next_cursor': next_cursor
         }
 
-        # Cache response for 5 minutes
-        cache.set(cache_key, response, timeout=300)
-        return response
-
-    def _apply_cursor(self, query, sort, cursor_data):
+    def _apply_cursor(self, query, args, cursor_data):
         """Apply cursor condition based on sort type"""
+        sort = args['sort']
         if sort == 'recommended':
-            query = query.join(User).join(UserInfo)
-            score = UserInfo.rating * 0.7 + UserInfo.completion_rate * 0.3
+            # Row-value comparison so the seek is a single index range
+            created_at = datetime.fromisoformat(cursor_data['created_at'])
             return query.filter(
-                (score < cursor_data['score']) |
-                ((score == cursor_data['score']) & (Task.created_at < cursor_data['created_at'])) |
-                ((score == cursor_data['score']) & (Task.created_at == cursor_data['created_at']) &
-                 (Task.id < cursor_data['id']))
+                tuple_(Task.poster_score, Task.created_at, Task.id) <
+                tuple_(cursor_data['score'], created_at, cursor_data['id'])
             )
         elif sort == 'recent':
             return query.filter(Task.id < cursor_data['id'])
+        elif sort == 'popular' and 'unique_views' in cursor_data:
+            return query.filter(
+                tuple_(Task.unique_view_count, Task.id) <
+                tuple_(cursor_data['unique_views'], cursor_data['id'])
+            )
         elif sort == 'price':
             return query.filter(
                 (Task.budget < cursor_data['budget']) |
@@ -133,39 +174,61 @@ class TaskResource(Resource):
                 (Task.specific_date < cursor_data['sort_value']) |
                 ((Task.specific_date == cursor_data['sort_value']) & (Task.id < cursor_data['id']))
             )
-        elif sort == 'distance':
-            # Distance sorting requires special handling
-            return query.filter(Task.id < cursor_data['id'])
+        elif self._sorts_by_relevance(args) and 'rank' in cursor_data:
+            # Keyset on (rank, id), matching the ORDER BY in _apply_sorting
+            return query.filter(
+                tuple_(self._rank_expression(args), Task.id) <
+                tuple_(cursor_data['rank'], cursor_data['id'])
+            )
+        elif self._sorts_by_distance(args) and 'distance' in cursor_data:
+            # Keyset on (distance, id), matching the ORDER BY in _apply_sorting
+            distance = self._distance_expression(args)
+            return query.filter(
+                (distance > cursor_data['distance']) |
+                ((distance == cursor_data['distance']) & (Task.id > cursor_data['id']))
+            )
         else:  # Default to ID-based pagination
             return query.filter(Task.id < cursor_data['id'])
 
-    def _create_next_cursor(self, task, sort_type):
-        """Create next cursor from last task"""
-        cursor_data = {'id': task.id}
+    def _create_next_cursor(self, card, sort_type, row):
+        """Create next cursor from the last task card and its query row"""
+        cursor_data = {'id': card['id']}
 
         if sort_type == 'recommended':
-             # Calculate and include score in cursor
-            rating = task.user.user_info.rating if task.user.user_info.rating is not None else 0
-            completion_rate = task.user.user_info.completion_rate if task.user.user_info.completion_rate is not None else 0
-            score = rating * 0.7 + completion_rate * 0.3
+            # Score exactly as stored on the task row
             cursor_data.update({
-                'score': float(score),
-                'created_at': task.created_at.isoformat()
+                'score': float(row.poster_score),
+                'created_at': card['created_at']
             })
+        elif sort_type == 'popular':
+            # Snapshot exactly as stored on the task row
+            cursor_data['unique_views'] = row.unique_view_count
         elif sort_type == 'price':
-            cursor_data['budget'] = float(task.budget)
+            cursor_data['budget'] = float(card['budget'])
         elif sort_type == 'due_date':
             # Use computed due date value
-            if task.schedule_type == 'specific_day' and task.specific_date:
-                cursor_data['sort_value'] = task.specific_date.isoformat()
-            elif task.schedule_type == 'before_day' and task.deadline_date:
-                cursor_data['sort_value'] = task.deadline_date.isoformat()
+            if card['schedule_type'] == 'specific_day' and card['specific_date']:
+                cursor_data['sort_value'] = card['specific_date']
+            elif card['schedule_type'] == 'before_day' and card['deadline_date']:
+                cursor_data['sort_value'] = card['deadline_date']
             else:
-                cursor_data['sort_value'] = task.created_at.isoformat()
+                cursor_data['sort_value'] = card['created_at']
+        elif sort_type == 'relevance' and 'rank' in row._fields:
+            # Rank exactly as computed by the database for this row
+            cursor_data['rank'] = float(row.rank)
+        elif sort_type == 'distance' and 'distance' in row._fields:
+            # Distance exactly as computed by the database for this row
+            cursor_data['distance'] = float(row.distance)
 
         return base64.b64encode(json.dumps(cursor_data).encode('utf-8')).decode('utf-8')
 
     def _apply_filters(self, query, args):
+        # Keyword search, served by the ix_tasks_search GIN index
+        if args['q']:
+            query = query.filter(
+                search_vector(Task.title, Task.description).op('@@')(search_query(args['q']))
+            )
+
         # Work mode filter
         if args['work_mode']:
             query = query.filter(Task.work_mode == args['work_mode'])
@@ -192,16 +255,13 @@ class TaskResource(Resource):
                 )
             )
         if args['radius'] and args['lat'] and args['lon']:
-            query = query.filter(
-                TaskLocation.latitude.between(
-                    args['lat'] - (args['radius'] / 111),
-                    args['lat'] + (args['radius'] / 111)
-                ),
-                TaskLocation.longitude.between(
-                    args['lon'] - (args['radius'] / (111 * math.cos(math.radians(args['lat'])))),
-                    args['lon'] + (args['radius'] / (111 * math.cos(math.radians(args['lat']))))
+            # Narrow to indexed geohash cells first, then apply the exact radius
+            cells = cells_covering(args['lat'], args['lon'], args['radius'])
+            if cells:
+                query = query.filter(
+                    or_(*[TaskLocation.geohash.like(f"{cell}%") for cell in sorted(cells)])
                 )
-            )
+            query = query.filter(self._distance_expression(args) <= args['radius'])
 
         return query.filter(Task.status == 'open')
 
@@ -209,13 +269,26 @@ class TaskResource(Resource):
         sort = args['sort']
         if sort == 'price':
             return query.order_by(Task.budget.desc())
-        elif sort == 'distance' and args['lat'] and args['lon']:
+        elif self._sorts_by_distance(args):
             # Join TaskLocation if not already joined via filters
             if not (args['city'] or (args['radius'] and args['lat'] and args['lon'])):
                 query = query.join(TaskLocation)
-            return query.order_by(
-                func.abs(TaskLocation.latitude - args['lat']) +
-                func.abs(TaskLocation.longitude - args['lon'])
+            distance = self._distance_expression(args)
+            return query.add_columns(distance.label('distance')).order_by(
+                distance.asc(),
+                Task.id.asc()
+            )
+        elif self._sorts_by_relevance(args):
+            rank = self._rank_expression(args)
+            return query.add_columns(rank.label('rank')).order_by(
+                rank.desc(),
+                Task.id.desc()
+            )
+        elif sort == 'popular':
+            # Unique viewers as last flushed from Redis; see utils.task_views
+            return query.add_columns(Task.unique_view_count).order_by(
+                Task.unique_view_count.desc(),
+                Task.id.desc()
             )
         elif sort == 'due_date':
             return query.order_by(
@@ -228,58 +301,67 @@ class TaskResource(Resource):
                 ).asc()
             )
         elif sort == 'recommended':
-            return query.order_by(
-                (UserInfo.rating * 0.7 + UserInfo.completion_rate * 0.3).desc(),
-                Task.created_at.desc()
+            # Walks ix_tasks_status_poster_score backwards; no join, no sort
+            return query.add_columns(Task.poster_score).order_by(
+                Task.poster_score.desc(),
+                Task.created_at.desc(),
+                Task.id.desc()
             )
         return query.order_by(Task.created_at.desc())
 
-    def _serialize_task(self, task, args):
-        # 1) explicitly pick just the Task columns you need
-        serialized = task.to_dict(
-            only=(
-                'id',
-                'title',
-                'description',
-                'budget',
-                'status',
-                'schedule_type',
-                'specific_date',
-                'deadline_date',
-                'created_at',   
-                'updated_at',
-            )
-        )
+    @staticmethod
+    def _sorts_by_distance(args):
+        return args['sort'] == 'distance' and bool(args['lat'] and args['lon'])
 
-        # 2) pull in exactly the fields you want from location
-        if task.location:
-            serialized['location'] = task.location.to_dict(
-                only=('id', 'city', 'latitude', 'longitude')
-            )
-        else:
-            serialized['location'] = None
+    @staticmethod
+    def _sorts_by_relevance(args):
+        return args['sort'] == 'relevance' and bool(args['q'])
 
+    @staticmethod
+    def _rank_expression(args):
+        """Cover-density rank of the task against the search terms"""
+        return func.ts_rank_cd(
+            search_vector(Task.title, Task.description),
+            search_query(args['q'])
+        )
 
-        # 3) same for categories
-        serialized['categories'] = [        
-            c.to_dict(only=('id', 'name')) for c in task.categories
-        ]
+    @staticmethod
+    def _distance_expression(args):
+        """Great-circle distance (km) from the requested point to the task location"""
+        return haversine_distance_sql(
+            TaskLocation.latitude, TaskLocation.longitude,
+            args['lat'], args['lon']
+        )
 
+    def _serialize_task(self, card, args, distance=None):
+        serialized = {
+            field: card[field]
+            for field in ('id', 'title', 'description', 'budget', 'status', 'schedule_type')
+        }
+        # Keep the datetime rendering SerializerMixin.to_dict produced
+        for field in ('specific_date', 'deadline_date', 'created_at', 'updated_at'):
+            serialized[field] = format_datetime(card[field], SERIALIZER_DATETIME_FORMAT)
+
+        location = card['location']
+        if location:
+            serialized['location'] = {
+                field: location[field] for field in ('id', 'city', 'latitude', 'longitude')
+            }
+        else:
+            serialized['location'] = None
 
-        serialized['preferred_time'] = str(task.preferred_time)
+        serialized['categories'] = card['categories']
+        serialized['preferred_time'] = str(card['preferred_time'])
 
-        
-        if task.user_id:
-            serialized['user'] = {
-                'id': task.user.id,
-                'name': task.user.name,
-                'image': task.user.image,
-            }
-        if args['lat'] and args['lon'] and task.location:
+        if card['user_id']:
+            serialized['user'] = card['user']
+        if distance is not None:
+            serialized['distance'] = distance
+        elif args['lat'] and args['lon'] and location:
             serialized['distance'] = haversine(
                 args['lat'], args['lon'],
-                float(task.location.latitude),
-                float(task.location.longitude)
+                float(location['latitude']),
+                float(location['longitude'])
             )
 
         return serialized
@@ -330,7 +412,8 @@ class TaskResource(Resource):
             task.categories.append(temp_category)
 
             db.session.commit()
-            self._invalidate_cache()
+            self._invalidate_cache(task.user_id)
+            refresh_cards([task.id])
             self._categorise_task_worker(task.id)
             # Enqueue background task for AI categorization
             # current_app.celery.send_task(
@@ -352,6 +435,16 @@ class TaskResource(Resource):
     def _categorise_task_worker(self, task_id):
         try:
             with current_app.app_context():
+                window = current_app.config.get("CATEGORIZATION_BATCH_WINDOW", 0)
+                if window > 0:
+                    # Categorized with the other tasks posted within the window
+                    try:
+                        if add_pending(task_id, window):
+                            flush_categorization_batch.apply_async(countdown=window)
+                        logger.info(f"Task {task_id} queued for batch categorization")
+                        return
+                    except Exception as e:
+                        logger.error(f"Batch categorization unavailable, queuing task {task_id} alone: {e}")
                 # Queue the notification task
                 categorize_task.delay(task_id)
                 logger.info(f"Queuing fir task categorization for task: {task_id}")
@@ -479,25 +572,10 @@ class TaskResource(Resource):
             images = [TaskImage(task_id=task.id, image_url=url) for url in image_urls]
             db.session.bulk_save_objects(images)
 
-    def _invalidate_cache(self):
+    def _invalidate_cache(self, user_id):
         """Invalidate relevant cached data"""
-        try:
-            cache = current_app.cache
-            cache.delete_memoized(self.get)  # Delete memoized cache for task lists
-
-            # Delete pattern-based keys using Redis directly
-            redis_conn = current_app.redis
-            cursor = 0
-            keys = []
-            while True:
-                cursor, partial = redis_conn.scan(cursor=cursor, match='tasks_*')
-                keys.extend(partial)
-                if cursor == 0:
-                    break
-            if keys:
-                redis_conn.delete(*keys)
-        except Exception as e:
-            logger.error(f"Cache invalidation failed: {str(e)}")
+        # O(1): bump feed and owner generations instead of scanning keys
+        bump(TASK_FEEDS, user_namespace(user_id))
 
     def _serialize_new_task(self, task):
         """Eager load and serialize new task"""
@@ -522,6 +600,117 @@ class TaskResource(Resource):
             )
         }
 
+def _load_task_details(task_ids, user_id):
+    """
+    Query and serialize tasks for the detail view.
+    Returns {task_id: detail}; unknown and deleted tasks are left out.
+    Every relationship is fetched with one IN query for the whole batch.
+    """
+    # Task and location in one row, projected straight to dicts
+    rows = [
+        row for row in
+        db.session.query(TASK_DETAIL, LOCATION_SUMMARY, Task.user_id, Task.created_at)
+        .outerjoin(TaskLocation, TaskLocation.task_id == Task.id)
+        .filter(Task.id.in_(task_ids))
+        if row.task['status'] != 'deleted'
+    ]
+    if not rows:
+        return {}
+
+    task_ids = [row.task['id'] for row in rows]
+    poster_ids = {row.user_id for row in rows}
+
+    # Categories and images as separate narrow queries; joining both
+    # collections onto the task would multiply the rows
+    categories = defaultdict(list)
+    for task_id, category in (
+        db.session.query(task_categories.c.task_id, CATEGORY_SUMMARY)
+        .join(Category, task_categories.c.category_id == Category.id)
+        .filter(task_categories.c.task_id.in_(task_ids))
+    ):
+        categories[task_id].append(category)
+
+    images = defaultdict(list)
+    for task_id, image in (
+        db.session.query(TaskImage.task_id, IMAGE_SUMMARY)
+        .filter(TaskImage.task_id.in_(task_ids))
+        .order_by(TaskImage.id)
+    ):
+        images[task_id].append(image)
+
+    # Poster summaries with average ratings from the maintained totals
+    posters = {
+        poster.id: poster for poster in
+        db.session.query(
+            User.id, User.name, User.image, User.completed_tasks_count,
+            (UserStats.rating_sum / func.nullif(UserStats.review_count, 0)).label('rating')
+        )
+        .outerjoin(UserStats, UserStats.user_id == User.id)
+        .filter(User.id.in_(poster_ids))
+    }
+
+    # The requesting user's assignment on tasks that have left the open state
+    assigned_ids = [row.task['id'] for row in rows if row.task['status'] not in ["open", "cancelled"]]
+    assignments = {}
+    if assigned_ids:
+        for assignment in TaskAssignment.query.options(
+            joinedload(TaskAssignment.doer)
+        ).filter(TaskAssignment.task_id.in_(assigned_ids), TaskAssignment.task_doer == user_id):
+            assignments.setdefault(assignment.task_id, assignment)
+
+    views = get_view_counts(task_ids)
+    bid_counts = {task_id: summary['count'] for task_id, summary in get_bid_summaries(task_ids).items()}
+
+    details = {}
+    for row in rows:
+        task_data = row.task
+        task_id = task_data['id']
+        poster = posters[row.user_id]
+        avg_rating = poster.rating
+
+        assignment = assignments.get(task_id)
+        if assignment:
+            task_data["assignment"] = {
+                "id": assignment.id,
+                "status": assignment.status,
+                "task_doer": {
+                    "id": assignment.doer.id,
+                    "name": assignment.doer.name,
+                    "image": assignment.doer.image
+                } if assignment.doer else None,
+                "agreed_price": float(assignment.agreed_price or 0)
+            }
+
+        details[task_id] = {
+            'task': task_data,
+            # Outer join yields an all-null projection when there is no location
+            'location': row.location if row.location['id'] is not None else None,
+            'categories': categories[task_id],
+            'images': images[task_id],
+            'user': {
+                'id': poster.id,
+                'name': poster.name,
+                'rating': float(avg_rating) if avg_rating is not None else 0.0,
+                'completed_tasks': poster.completed_tasks_count,
+                'avatar': poster.image
+            },
+            'metadata': {
+                'views': views[task_id][0],
+                'unique_views': views[task_id][1],
+                'bids_count': bid_counts[task_id],
+                'popularity_score': _calculate_popularity(row.created_at, views[task_id][1], bid_counts[task_id])
+            }
+        }
+    return details
+
+
+def _calculate_popularity(created_at, unique_views=0, bids_count=0):
+    # Bids and distinct viewers, weighted with recency
+    base_score = bids_count * 0.5 + unique_views * 0.1
+    time_score = 1 / (1 + (datetime.now() - created_at).days)
+    return round(base_score + time_score, 2)
+
+
 class SingleTaskResource(Resource):
     @jwt_required()
     def get(self, task_id):
@@ -544,132 +733,22 @@ class SingleTaskResource(Resource):
         if not isinstance(task_id, int) or task_id < 1:
             abort(400, message="Invalid task ID format")
 
-        cache = current_app.cache
-        cache_key = f"task_{task_id}"
-
-        # Try cached response
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return cached_data
+        # Bound to the task's generation so every invalidation also retires
+        # the stored ETag; unchanged tasks revalidate with a bodyless 304
+        cache_key = namespaced_key(f"task_{task_id}", task_namespace(task_id))
+        response = cached_response(cache_key, lambda: self._load_task(task_id, user_id), timeout=300)
 
-        # Eager load all relationships in a single query
-        task = Task.query.options(
-            joinedload(Task.location),
-            joinedload(Task.categories),
-            joinedload(Task.images),
-            joinedload(Task.user).joinedload(User.user_info)
-        ).get(task_id)
+        # One pipelined Redis write; counts are flushed to SQL periodically
+        record_view(task_id, user_id)
+        return response
 
-        if not task or task.status == 'deleted':
+    def _load_task(self, task_id, user_id):
+        """Query and serialize one task for the detail view"""
+        serialized = _load_task_details([task_id], user_id).get(task_id)
+        if serialized is None:
             abort(404, message="Task not found")
-
-        serialized = self._serialize_task(task, user_id)
-
-        # Cache response for 5 minutes
-        cache.set(cache_key, serialized, timeout=300)
-
         return serialized
 
-    def _serialize_task(self, task, user_id):
-        # 1) Compute average rating
-        user_reviews = task.user.reviews_received if task.user else []
-        avg_rating = (
-            sum(r.rating for r in user_reviews) / len(user_reviews)
-            if user_reviews else 0.0
-        )
-
-        # 2) Task fields (only the columns you need)
-        task_data = task.to_dict(only=(
-            'id',
-            'title',
-            'description',
-            'budget',
-            'work_mode',
-            'status',
-            'schedule_type',
-            'specific_date',
-            'deadline_date',
-            'preferred_time',
-            'created_at',
-            'updated_at',
-        ))
-
-        # 3) Location (only its own fields)
-        if task.location:
-            location_data = task.location.to_dict(only=(
-                'id', 'city', 'latitude', 'longitude'
-            ))
-        else:
-            location_data = None
-
-        # 4) Categories (id & name only)
-        categories_data = [
-            c.to_dict(only=('id', 'name'))
-            for c in task.categories
-        ]
-
-        # 5) Images (pick only the fields you actually expose)
-        images_data = [
-            img.to_dict(only=('id', 'image_url'))
-            for img in task.images
-        ]
-
-        # 6) Assemble user info manually
-        user_data = {
-            'id': task.user.id,
-            'name': task.user.name,
-            'rating': avg_rating,
-            'completed_tasks': getattr(task.user, 'completed_tasks_count', 0),
-            'avatar': task.user.image
-        }
-
-        if task.status not in ["open", "cancelled"]:
-                assignment = TaskAssignment.query.options(
-                    joinedload(TaskAssignment.doer)
-                ).filter_by(task_id=task.id, task_doer=user_id).first()
-
-                if assignment:
-                    task_data["assignment"] = {
-                        "id": assignment.id,
-                        "status": assignment.status,
-                        "task_doer": {
-                            "id": assignment.doer.id,
-                            "name": assignment.doer.name,
-                            "image": assignment.doer.image
-                        } if assignment.doer else None,
-                        "agreed_price": float(assignment.agreed_price or 0)
-                    }
-        # 7) Metadata
-        metadata = {
-            'views': self._get_task_views(task.id),
-            'popularity_score': self._calculate_popularity(task)
-        }
-
-        # 8) Build and return
-        response = {
-            'task': task_data,
-            'location': location_data,
-            'categories': categories_data,
-            'images': images_data,
-            'user': user_data,
-            'metadata': metadata
-        }
-
-        if hasattr(task, 'distance'):
-            response['distance'] = task.distance
-
-        return response
-
-    def _get_task_views(self, task_id):
-        # Implement view tracking logic
-        return current_app.redis.get(f"task_views_{task_id}") or 0
-
-    def _calculate_popularity(self, task):
-        # Example popularity algorithm
-        base_score = getattr(task, "bids_count", 0) * 0.5
-        time_score = 1 / (1 + (datetime.now() - task.created_at).days)
-        return round(base_score + time_score, 2)
-
     @jwt_required()
     def put(self, task_id):
         parser = reqparse.RequestParser()
@@ -706,7 +785,7 @@ class SingleTaskResource(Resource):
             self._validate_and_update_location(task, data)
             task.updated_at = db.func.now()
             db.session.commit()
-            self._invalidate_cache()
+            self._invalidate_cache(task)
             return self._serialize_updated_task(task), 200
 
         except Exception as e:
@@ -817,25 +896,10 @@ class SingleTaskResource(Resource):
             'area': data.get('area') or (task.location.area if task.location else None)
         }
 
-    def _invalidate_cache(self):
+    def _invalidate_cache(self, task):
         """Invalidate relevant cached data"""
-        try:
-            cache = current_app.cache
-            cache.delete_memoized(self.get)  # Delete memoized cache for task lists
-
-            # Delete pattern-based keys using Redis directly
-            redis_conn = current_app.redis
-            cursor = 0
-            keys = []
-            while True:
-                cursor, partial = redis_conn.scan(cursor=cursor, match='tasks_*')
-                keys.extend(partial)
-                if cursor == 0:
-                    break
-            if keys:
-                redis_conn.delete(*keys)
-        except Exception as e:
-            logger.error(f"Cache invalidation failed: {str(e)}")
+        bump(TASK_FEEDS, user_namespace(task.user_id), task_namespace(task.id))
+        refresh_cards([task.id])
 
     def _serialize_updated_task(self, task):
         fresh_task = Task.query.options(
@@ -919,11 +983,12 @@ class SingleTaskResource(Resource):
                     self._perform_hard_deletion(task)
                 else:
                     self._perform_soft_deletion(task)
-
-                # Post-deletion cleanup
-                self._invalidate_related_caches(task_id, task.user_id)
+                owner_id = task.user_id
 
             db.session.commit()
+
+            # Post-deletion cleanup, once the change is visible to readers
+            self._invalidate_related_caches(task_id, owner_id)
             return '', 204
 
         except ValueError as ve:
@@ -980,10 +1045,9 @@ class SingleTaskResource(Resource):
             synchronize_session=False
         )
 
-        TaskAssignment.query.filter_by(task_id=task.id).update(
-            {'status': 'cancelled'},
-            synchronize_session=False
-        )
+        # Through the ORM, so the user_stats listeners move completed counts
+        for assignment in TaskAssignment.query.filter_by(task_id=task.id):
+            assignment.status = 'cancelled'
 
     def _perform_hard_deletion(self, task):
         """Permanently remove task and related data from system"""
@@ -999,37 +1063,89 @@ class SingleTaskResource(Resource):
 
     def _invalidate_related_caches(self, task_id, user_id):
         """System-wide cache invalidation for task data"""
-        try:
-            redis = current_app.redis
-            cache = current_app.cache
-
-            # Invalidate individual task cache
-            cache.delete(f"task_{task_id}")
-
-            # Pattern-based cache clearance
-            patterns = [
-                'tasks_*',
-                f'user_tasks_{user_id}_*',
-                f'user_activity_{user_id}',
-                f'task_stats_{task_id}'
-            ]
-
-            for pattern in patterns:
-                cursor, keys = 0, []
-                while True:
-                    cursor, partial = redis.scan(
-                        cursor=cursor,
-                        match=pattern,
-                        count=1000
-                    )
-                    keys.extend(partial)
-                    if cursor == 0:
-                        break
-                if keys:
-                    redis.delete(*keys)
+        # Generation bumps cover every feed, per-user and per-task variant,
+        # including the task detail view
+        bump(TASK_FEEDS, user_namespace(user_id), task_namespace(task_id))
+        # Soft deletes rebuild the card; hard deletes drop it
+        refresh_cards([task_id])
+        # Deletion rejects every bid
+        refresh_bid_summaries([task_id])
+
 
-        except Exception as cache_error:
-            logger.error(f"Cache invalidation error: {str(cache_error)}")
+class TaskBatchResource(Resource):
+    """Task details for many ids at once, e.g. notification lists and chat headers"""
+    MAX_IDS = 100
+
+    parser = reqparse.RequestParser()
+    parser.add_argument('ids', type=str, action='append', required=True, location='args',
+                        help='Comma-separated task ids are required')
+
+    @jwt_required()
+    def get(self):
+        """
+        Get details for up to 100 tasks.
+        ---
+        parameters:
+          - name: ids
+            in: query
+            type: string
+            required: true
+            description: Comma-separated task ids, e.g. ids=4,8,15
+        responses:
+          200:
+            description: Task details in request order, plus ids that were not found
+          400:
+            description: Invalid or too many ids
+        """
+        user_id = get_jwt_identity()
+        task_ids = self._parse_ids(self.parser.parse_args()['ids'])
+
+        # Same per-task entries SingleTaskResource caches: one MGET for the
+        # generations, one for the bodies, one IN query for the misses
+        cache = current_app.cache
+        keys = namespaced_keys((f"task_{task_id}", task_namespace(task_id)) for task_id in task_ids)
+        details = {
+            task_id: value
+            for task_id, value in zip(task_ids, cache.get_many(*keys))
+            if value is not None
+        }
+
+        misses = [task_id for task_id in task_ids if task_id not in details]
+        if misses:
+            loaded = _load_task_details(misses, user_id)
+            details.update(loaded)
+            # Write back with ETags so later single-task GETs can 304
+            fresh = {}
+            for task_id, key in zip(task_ids, keys):
+                if task_id in loaded:
+                    fresh[key] = loaded[task_id]
+                    fresh[f"{key}:etag"] = make_etag(loaded[task_id])
+            if fresh:
+                cache.set_many(fresh, timeout=300)
+
+        return {
+            'tasks': [details[task_id] for task_id in task_ids if task_id in details],
+            'missing': [task_id for task_id in task_ids if task_id not in details]
+        }, 200
+
+    def _parse_ids(self, raw_values):
+        """Accept ids=1,2,3 and/or repeated ids=; keep request order, drop duplicates"""
+        task_ids = []
+        for raw in raw_values:
+            for part in raw.split(','):
+                part = part.strip()
+                if not part:
+                    continue
+                if not part.isdigit() or int(part) < 1:
+                    abort(400, message=f"Invalid task ID: {part}")
+                task_ids.append(int(part))
+
+        task_ids = list(dict.fromkeys(task_ids))
+        if not task_ids:
+            abort(400, message="At least one task ID is required")
+        if len(task_ids) > self.MAX_IDS:
+            abort(400, message=f"At most {self.MAX_IDS} task IDs per request")
+        return task_ids
 
 
 class TaskStatusResource(Resource):
@@ -1210,13 +1326,10 @@ class TaskStatusResource(Resource):
          - task detail
          - any paginated task lists
         """
-        try:
-            redis_cli = current_app.redis
-            redis_cli.delete(f"task_{task_id}")
-            for key in redis_cli.scan_iter("tasks_*"):
-                redis_cli.delete(key)
-        except Exception as e:
-            logger.error(f"Cache invalidation failed: {e}")
+        bump(TASK_FEEDS, task_namespace(task_id))
+        refresh_cards([task_id])
+        # Cancellation rejects the task's bids
+        refresh_bid_summaries([task_id])
 
     def _send_notifications(self, task, new_status):
         """
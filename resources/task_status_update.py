@@ -12,6 +12,9 @@ from utils.send_notification import Notify
 from models.conversation import Conversation
 from utils.ledgers.internal import InternalTransfer
 from datetime import datetime
+from utils.cache_namespace import bump, TASK_FEEDS, user_namespace, task_namespace
+from utils.task_cards import refresh_cards
+from utils.conversation_partners import refresh_pair
 logger = logging.getLogger(__name__)
 
         
@@ -35,6 +38,7 @@ class StatusUpdate(Resource):
         print("New status:", new_status)
 
         release_funds_needed = False
+        archived_conversation = None
         notify_payload = {}
 
         try:
@@ -85,6 +89,7 @@ class StatusUpdate(Resource):
                 conversation = Conversation.query.filter_by(task_id = task_id).first()
                 if conversation:
                     conversation.archived = True
+                    archived_conversation = conversation
                     ids = [task.user_id, assignment.doer.id]
                     self._update_user_stats(task, "completed")
                     for userc in ids:
@@ -92,6 +97,8 @@ class StatusUpdate(Resource):
             
             # Commit changes
             db.session.commit()
+            if archived_conversation:
+                refresh_pair(archived_conversation.task_giver, archived_conversation.task_doer)
 
             # Post-commit operations
             if release_funds_needed:
@@ -112,18 +119,9 @@ class StatusUpdate(Resource):
             task_owner_id = task.user_id
             task_doer_id = assignment.doer.id
 
-            # Clear cache keys related to both parties
-            cache_keys = [
-                f"posted_task:{task_owner_id}:{task.id}",       # Task owner view
-                f"my_tasks:{task_owner_id}",                    # Task owner's task list
-                f"assigned_tasks:{task_doer_id}",               # Doer's assigned tasks
-                f"task_{task.id}",                              # General task detail view
-                # f"user_tasks:{task_doer_id}",                   # Optional: doer's user profile/task history
-                # f"user_tasks:{task_owner_id}"                  # Optional: owner's user profile/task history
-            ]
-
-            for key in cache_keys:
-                cache.delete(key)
+            # Task detail (and its ETag), then every per-user view of both parties
+            bump(TASK_FEEDS, user_namespace(task_owner_id), user_namespace(task_doer_id), task_namespace(task.id))
+            refresh_cards([task.id])
 
             return {
                 "message": f"Task status updated to {new_status}",
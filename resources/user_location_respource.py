@@ -3,6 +3,7 @@ from flask_restful import Resource, reqparse
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db
 from models.user_location import UserLocation
+from utils.doer_locations import index_location
 import logging  
 
 logger = logging.getLogger(__name__)    
@@ -86,6 +87,7 @@ class UserLocationResource(Resource):
                 location.city = args.get("city")
 
             db.session.commit()
+            index_location(location.user_id, location.latitude, location.longitude)
             return {"message": "User location saved successfully"}, 200
 
         except Exception as e:
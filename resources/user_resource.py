@@ -6,6 +6,8 @@ from models import db
 from models.user import User
 from models.user_info import UserInfo
 from models.review import Review
+from utils.task_cards import refresh_user_cards
+from utils.bid_summary import refresh_user_bid_summaries
 
 
 class UserProfileResource(Resource):
@@ -88,8 +90,9 @@ class UserProfileResource(Resource):
 
         user_info = user.user_info or UserInfo(user_id=user_id)
 
-        # Track changes for audit logging
-        update_fields = ['tagline', 'bio', 'rating', 'completion_rate']
+        # Track changes for audit logging; rating and completion_rate are
+        # derived from user_stats and not client-writable
+        update_fields = ['tagline', 'bio']
         for field in update_fields:
             if field in data:
                 setattr(user_info, field, data[field])
@@ -103,6 +106,10 @@ class UserProfileResource(Resource):
         # Invalidate cache only if changes occurred
         if updates or "image_url" in data:
             current_app.cache.delete(f"user_profile_{user_id}")
+        if "image_url" in data:
+            # Task cards and bid summaries embed the user's avatar
+            refresh_user_cards(user_id)
+            refresh_user_bid_summaries(user_id)
 
         return {
             "message": "Profile updated successfully",
@@ -127,6 +134,8 @@ class UserProfileResource(Resource):
 
         # Invalidate cache
         current_app.cache.delete(f"user_profile_{user_id}")
+        refresh_user_cards(user_id)
+        refresh_user_bid_summaries(user_id)
 
         return {"message": "Profile deleted successfully"}, 204
 
@@ -191,11 +200,8 @@ class UserProfile(Resource):
 
 def _get_user_data(user):
     """Helper to extract user data with average rating."""
-    user_reviews = user.reviews_received or []
-    avg_rating = (
-        sum(r.rating for r in user_reviews) / len(user_reviews)
-        if user_reviews else 0.0
-    )
+    stats = user.stats
+    avg_rating = stats.average_rating if stats and stats.review_count else 0.0
     return {
         "id": user.id,
         "name": user.name,
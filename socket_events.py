@@ -1,10 +1,20 @@
+from datetime import datetime
 from flask import current_app, request
-from extensions import socketio
+from flask_socketio import join_room
+from extensions import socketio, user_room
 from models.user import User
 from models.conversation import Conversation
-from models.message import Message
 from models import db
 from utils.send_notification import Notify
+from utils.conversation_partners import conversation_participants, partner_ids
+from utils.chat_messages import (
+    STATUS_RANK, emit_status_updates, mark_messages, queue_ack, queue_status, save_message
+)
+from utils.presence import (
+    DEFAULT_TTL as PRESENCE_TTL, connect as presence_connect, disconnect as presence_disconnect,
+    online_user_ids, renew_local_leases
+)
+from workers.chat_messages import flush_chat_messages
 import logging
 
 logger = logging.getLogger()
@@ -22,123 +32,90 @@ def handle_connect():
     socketio.emit('connected_ack', {'status': 'connected', 'user_id': user_id}, room=request.sid)
     print(f"[✅] Acknowledged client {user_id} connection early.")
 
-    # Step 2: Defer the heavy logic
+    # Every device of the user shares one room, so emits need no sid lookup
+    join_room(user_room(user_id))
+
+    # Register before returning, so a disconnect that follows always finds the lease
+    came_online = presence_connect(user_id, request.sid)
+    print(f"[+] User {user_id} SID saved. Online status set in Redis.")
+
+    # Step 2: Defer the partner fan-out; other devices already announced this user
     app = current_app._get_current_object()  # Grab app instance safely
-    socketio.start_background_task(target=process_user_connection, app=app, user_id=user_id, sid=request.sid)
+    _start_presence_heartbeat(app)
+    if came_online:
+        socketio.start_background_task(target=process_user_connection, app=app, user_id=user_id)
 
 
-def process_user_connection(app, user_id, sid):
-    with app.app_context():  # Correct usage inside background thread
-        cache = app.cache
-        redis = app.redis
-
-        # Store BOTH mappings: user_id -> sid AND sid -> user_id
-        cache.set(f"user_sid:{user_id}", sid, timeout=0)
-        cache.set(f"sid_user:{sid}", user_id, timeout=0)  # This is critical for disconnect
-        redis.sadd("online_users", user_id)
-        print(f"[+] User {user_id} SID saved. Online status set in Redis.")
-
-        user = User.query.get(user_id)
-        if user:
-            user.update_status("online")
-            print(f"[✓] User {user_id} marked online in DB.")
-
-            # Fetch relevant conversations
-            conversations = Conversation.query.filter(
-                (Conversation.task_giver == user_id) | (Conversation.task_doer == user_id)
-            ).all()
-
-            other_user_ids = {
-                str(convo.task_doer) if str(convo.task_giver) == user_id else str(convo.task_giver)
-                for convo in conversations
-            }
-
-            if not other_user_ids:
-                print(f"[ℹ️] User {user_id} has no conversation participants.")
-                return
+_heartbeat_started = False
 
-            other_users = User.query.filter(User.id.in_(other_user_ids)).all()
-            online_users = [user for user in other_users if user.status == "online"]
 
-            if not online_users:
-                print(f"[ℹ️] No online users to notify for user {user_id}.")
-                return
+def _start_presence_heartbeat(app):
+    """Start (once per process) the loop renewing this server's presence leases."""
+    global _heartbeat_started
+    if _heartbeat_started:
+        return
+    _heartbeat_started = True
+    socketio.start_background_task(target=presence_heartbeat, app=app)
+
+
+def presence_heartbeat(app):
+    interval = app.config.get("PRESENCE_TTL", PRESENCE_TTL) / 3
+    while True:
+        socketio.sleep(interval)
+        with app.app_context():
+            try:
+                for user_id in renew_local_leases():
+                    _notify_online_partners(user_id, 'user_disconnected')
+            except Exception as e:
+                logger.error(f"Presence heartbeat failed: {e}")
+
+
+def _notify_online_partners(user_id, event):
+    """Emit `event` about `user_id` to conversation partners who are connected."""
+    other_user_ids = partner_ids(user_id)
+    if not other_user_ids:
+        print(f"[ℹ️] User {user_id} has no conversation participants.")
+        return
+
+    online_ids = sorted(online_user_ids(other_user_ids))
+    if not online_ids:
+        print(f"[ℹ️] No online users to notify about user {user_id}.")
+        return
+
+    for other_id in online_ids:
+        socketio.emit(event, {'user_id': user_id}, room=user_room(other_id))
+    print(f"[📢] Notified {len(online_ids)} users of {event} for user {user_id}.")
+
 
-            for u in online_users:
-                other_sid = cache.get(f"user_sid:{str(u.id)}")
-                if other_sid:
-                    socketio.emit('user_connected', {'user_id': user_id}, room=other_sid)
-                    print(f"[📢] Notified user {u.id} that user {user_id} is online.")
-                else:
-                    print(f"[🚫] User {u.id} is online in DB but not connected via socket.")
+def process_user_connection(app, user_id):
+    with app.app_context():  # Correct usage inside background thread
+        _notify_online_partners(user_id, 'user_connected')
 
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle user disconnections and notify relevant users efficiently."""
     sid = request.sid
-    
-    # Get the disconnected user ID from the SID
-    disconnected_user_id = current_app.cache.get(f"sid_user:{sid}")
-    
+
+    disconnected_user_id, went_offline, _ = presence_disconnect(sid)
+
     if not disconnected_user_id:
         print(f"[⚠️] Could not find disconnected user for SID {sid}")
         return
 
     print(f"[-] User {disconnected_user_id} disconnected with SID {sid}")
 
-    # Clean up cache entries
-    current_app.cache.delete(f"user_sid:{disconnected_user_id}")
-    current_app.cache.delete(f"sid_user:{sid}")
-    
-    # Remove from Redis online users set
-    current_app.redis.srem("online_users", disconnected_user_id)
-    
-    # Update user status in database
-    user = User.query.get(disconnected_user_id)
-    if user:
-        user.update_status("offline")
+    # Other devices keep the user online
+    if went_offline:
         print(f"[✓] User {disconnected_user_id} status set to offline")
+        _notify_online_partners(disconnected_user_id, 'user_disconnected')
 
-        # Find conversations involving this user
-        conversations = Conversation.query.filter(
-            (Conversation.task_giver == disconnected_user_id) | (Conversation.task_doer == disconnected_user_id)
-        ).all()
-        print(f"[ℹ️] Found {len(conversations)} conversations for user {disconnected_user_id}")
-
-        # Get other users in these conversations
-        other_user_ids = {
-            str(convo.task_doer) if str(convo.task_giver) == disconnected_user_id else str(convo.task_giver)
-            for convo in conversations
-        }
-
-        if not other_user_ids:
-            print(f"[ℹ️] User {disconnected_user_id} had no conversation participants")
-            return
-
-        # Query for online users
-        other_users = User.query.filter(User.id.in_(other_user_ids)).all()
-        online_users = [u for u in other_users if u.status == "online"]
-        print(f"[ℹ️] Found {len(online_users)} online users to notify")
-
-        if not online_users:
-            print(f"[ℹ️] No online users to notify about user {disconnected_user_id}'s disconnection")
-            return
-
-        # Notify each online user
-        for u in online_users:
-            other_sid = current_app.cache.get(f"user_sid:{str(u.id)}")
-            if other_sid:
-                socketio.emit('user_disconnected', {'user_id': disconnected_user_id}, room=other_sid)
-                print(f"[📢] Notified user {u.id} (SID: {other_sid}) that user {disconnected_user_id} went offline")
-            else:
-                print(f"[🚫] User {u.id} is online in DB but has no SID in cache")
-    else:
-        print(f"[⚠️] User {disconnected_user_id} not found in database")
-        
 @socketio.on('send_message')
 def handle_send_message(data):
-    """Handle when a user sends a message."""
+    """
+    Handle when a user sends a message. The message is emitted before it
+    is written; a background flush inserts it within a second or so.
+    """
     sender_id = request.args.get('user_id')
     receiver_id = data.get('receiver_id')
     conversation_id = data.get('conversation_id')
@@ -146,112 +123,108 @@ def handle_send_message(data):
     image_url = data.get('image_url', None)
 
     if not sender_id or not receiver_id:
-        socketio.emit('message_error', {'message': 'Missing required fields'})
+        socketio.emit('message_error', {'message': 'Missing required fields'}, room=request.sid)
         return
-    
 
-    conversation = Conversation.query.get(conversation_id)
-    if not conversation:
-        socketio.emit('message_error', {'message': 'Conversation not found'})
+    if not conversation_participants(conversation_id):
+        socketio.emit('message_error', {'message': 'Conversation not found'}, room=request.sid)
         return
 
-    new_message = Message(
-        conversation=conversation,
-        sender_id=sender_id,
-        reciever_id=receiver_id,
-        message=message_text,
-        image=image_url,
-        date_time=db.func.now(),
-        status="sent"
-    )
+    # An online receiver gets it right away, so it is stored as delivered
+    delivered = bool(online_user_ids([receiver_id]))
+    message = {
+        'conversation_id': int(conversation_id),
+        'sender_id': int(sender_id),
+        'reciever_id': int(receiver_id),
+        'message': message_text,
+        'image': image_url,
+        'status': "delivered" if delivered else "sent",
+        'date_time': datetime.utcnow(),
+    }
+    window = current_app.config.get("MESSAGE_FLUSH_WINDOW", 1)
+    if save_message(message, window):
+        flush_chat_messages.apply_async(countdown=window)
+
+    socketio.emit('message_sent', {
+        'conversation_id': conversation_id,
+        'message_id': message['id'],
+        'status': "sent",
+        'success': True
+    }, room=user_room(sender_id))
+
+    if delivered:
+        socketio.emit('receive_message', {
+            'conversation_id': conversation_id,
+            'message_id': message['id'],
+            'message': message_text,
+            'image': image_url,
+            'sender_id': sender_id,
+            'time': message['date_time'].isoformat()
+        }, room=user_room(receiver_id))
+
+        # Emit to sender about the message status
+        socketio.emit('message_status_update', {
+            'conversation_id': int(conversation_id),
+            'message_id': message['id'],
+            'status': "delivered"
+        }, room=user_room(sender_id))
+
+    print(f"📨 Message {message['id']} from {sender_id} to {receiver_id} | Status: {message['status']}")
 
-    db.session.add(new_message)
-    db.session.commit()
-
-    
-    # Handle cache access within app context
-    with current_app.app_context():
-        # Check if receiver is online
-        sender_sid = current_app.cache.get(f"user_sid:{sender_id}")
-        if sender_sid:
-            socketio.emit('message_sent', {
-                'conversation_id': conversation_id,
-                'message_id': new_message.id,
-                'status': "sent",
-                'success': True
-            }, room=sender_sid)
-        print('message sent')
-        receiver_sid = current_app.cache.get(f"user_sid:{receiver_id}")
-        # Notify(user_id=receiver_id, message="You got a new message", source="chat", sender_id=sender_id).post()
-        if receiver_sid:
-            # Update message status to delivered
-            message = Message.query.get(new_message.id)
-            message.status = "delivered"
-            db.session.commit()
-
-            # Emit to receiver
-            socketio.emit('receive_message', {
-                'conversation_id': conversation_id,
-                'message_id': new_message.id,
-                'message': new_message.message,
-                'image': new_message.image,
-                'sender_id': sender_id,
-                'time': new_message.date_time.isoformat()
-            }, room=receiver_sid)
-            
-            print('message recieved')
-            status = "delivered"
-            # Emit to sender about the message status
-            socketio.emit('message_status_update', {
-                    'conversation_id': int(conversation_id),
-                    'message_id': int(new_message.id),
-                    'status': status
-                }, room=sender_sid)
-
-            print(f"📨 Message from {sender_id} to {receiver_id}: {message_text} | Status: {status}")
-    
 
 @socketio.on('message_status')
 def handle_message_status(data):
-    """Handle updating message status."""
+    """
+    Handle updating message status, either for one `message_id` or, with
+    `up_to_id`, for every message of the conversation up to that id.
+    """
     user_id = request.args.get('user_id')
     conversation_id = data.get('conversation_id')
     message_id = data.get('message_id')
+    up_to_id = data.get('up_to_id')
     status = data.get('status')
 
-    if not user_id or not conversation_id or not message_id:
+    if not user_id or not conversation_id or not (message_id or up_to_id) or status not in STATUS_RANK:
         return
 
     try:
-        # Get the message
-        message = Message.query.get(message_id)
-        
-        if not message:
+        participants = conversation_participants(conversation_id)
+        if not participants or str(user_id) not in participants:
             return
-        
-        # Update message status
-        message.status = status
-        db.session.commit()
-
-        # Handle cache access within app context
-        with current_app.app_context():
-            # Notify the sender about the message status update
-            sender_id = message.sender_id
-            sender_sid = current_app.cache.get(f"user_sid:{sender_id}")  # Get the sender's SID from cache
-            
-            if sender_sid:
-                socketio.emit('message_status_update', {
-                    'conversation_id': int(conversation_id),
-                    'message_id': int(message_id),
-                    'status': status
-                }, room=sender_sid)
-                print(f"Message {message_id} status updated to {status} for sender {sender_id}")
-            else:
-                print(f"Sender {sender_id} is not online (SID not found)")
+
+        if up_to_id:
+            _acknowledge(user_id, status, int(conversation_id), int(up_to_id))
+            return
+
+        # The message may not be written yet, so its sender is taken from
+        # the conversation and the change is queued with the message
+        sender_id = next((p for p in participants if p != str(user_id)), user_id)
+
+        window = current_app.config.get("MESSAGE_FLUSH_WINDOW", 1)
+        if queue_status([message_id], status, window):
+            flush_chat_messages.apply_async(countdown=window)
+
+        socketio.emit('message_status_update', {
+            'conversation_id': int(conversation_id),
+            'message_id': int(message_id),
+            'status': status
+        }, room=user_room(sender_id))
+        print(f"Message {message_id} status updated to {status} for sender {sender_id}")
 
     except Exception as e:
         print(f"Error updating status: {e}")
-        db.session.rollback()
+
+
+def _acknowledge(user_id, status, conversation_id=None, up_to_id=None):
+    """Bulk status change for the user's received messages, one event per sender and conversation."""
+    # Stored first, so messages not yet written when the UPDATE runs are
+    # acked by the next flush
+    window = current_app.config.get("MESSAGE_FLUSH_WINDOW", 1)
+    if queue_ack(user_id, status, window, conversation_id, up_to_id):
+        flush_chat_messages.apply_async(countdown=window)
+    rows = mark_messages(int(user_id), status, conversation_id, up_to_id=up_to_id)
+    events = emit_status_updates(rows, status)
+    print(f"[✓] Marked {len(rows)} messages as {status} for user {user_id} in {events} updates")
 
 
 @socketio.on('typing')
@@ -281,53 +254,35 @@ def handle_typing(data):
                 else str(conversation.task_giver)
             )
 
-        with current_app.app_context():
-            other_user_sid = current_app.cache.get(f"user_sid:{other_user_id}")
-            if other_user_sid:
-                socketio.emit('typing_indicator', {
-                    'conversation_id': conversation_id,
-                    'user_id': user_id,
-                    'is_typing': is_typing
-                }, room=other_user_sid)
+        socketio.emit('typing_indicator', {
+            'conversation_id': conversation_id,
+            'user_id': user_id,
+            'is_typing': is_typing
+        }, room=user_room(other_user_id))
         
     except Exception as e:
         print(f"Error with typing indicator: {e}")
 
 
 @socketio.on('mark_conversation_read')
-def handle_mark_all_delivered(_):
-    """Mark all messages in a conversation as delivered for the current user."""
+def handle_mark_all_delivered(data):
+    """
+    Mark the current user's received messages as delivered: all of them,
+    or those of `conversation_id` up to `up_to_id` when given.
+    """
     user_id = request.args.get('user_id')
     
     if not user_id:
         return
 
+    data = data or {}
+    conversation_id = data.get('conversation_id')
+    up_to_id = data.get('up_to_id')
     try:
-        # Fetch all undelivered messages for this user
-        unread_messages = Message.query.filter_by(
-            reciever_id=user_id,
-            status='sent'  # Messages not marked as delivered yet
-        ).all()
-
-        # Update their status to "delivered"
-        for message in unread_messages:
-            message.status = 'delivered'
-        
-        db.session.commit()
-
-        print(f"[✓] Marked {len(unread_messages)} messages as delivered for user {user_id}")
-
-        # Optionally notify the sender(s)
-        with current_app.app_context():
-            for message in unread_messages:
-                sender_sid = current_app.cache.get(f"user_sid:{message.sender_id}")
-                if sender_sid:
-                    socketio.emit('message_status_update', {
-                        'conversation_id': message.conversation_id,
-                        'message_id': message.id,
-                        'status': 'delivered'
-                    }, room=sender_sid)
-    
+        _acknowledge(
+            user_id, 'delivered',
+            int(conversation_id) if conversation_id else None,
+            int(up_to_id) if up_to_id else None
+        )
     except Exception as e:
-        db.session.rollback()
         print(f"[❌] Error marking messages as delivered for user {user_id}: {e}")
@@ -0,0 +1,62 @@
+from utils.candidate_ranking import (
+    hashed_tfidf_similarity, haversine_km, rank_candidates, rank_candidates_for_tasks
+)
+from utils.haversine_distance_km import haversine_distance_km
+
+
+def _candidate(user_id, text, lat=-1.29, lon=36.82, rating=4.0, completion_rate=0.8):
+    return {'user_id': user_id, 'text': text, 'latitude': lat, 'longitude': lon,
+            'rating': rating, 'completion_rate': completion_rate}
+
+
+def test_similarity_prefers_matching_text():
+    """Documents sharing the task's terms score higher; empty ones score zero."""
+    scores = hashed_tfidf_similarity(
+        "fix a leaking kitchen sink",
+        ["plumber fixing leaking sinks and kitchen pipes", "garden and lawn care", ""]
+    )
+    assert scores[0] > scores[1] == 0
+    assert scores[2] == 0
+
+
+def test_vectorized_haversine_matches_scalar_version():
+    """The NumPy distances agree with the existing per-pair helper."""
+    distances = haversine_km(-1.29, 36.82, [-1.30, -1.10], [36.80, 37.00])
+    assert abs(distances[0] - haversine_distance_km(-1.29, 36.82, -1.30, 36.80)) < 1e-9
+    assert abs(distances[1] - haversine_distance_km(-1.29, 36.82, -1.10, 37.00)) < 1e-9
+
+
+def test_rank_candidates_orders_and_filters():
+    """Relevant nearby candidates lead, far ones are dropped, missing ratings are tolerated."""
+    ranked = rank_candidates(
+        "Fix a leaking kitchen sink", -1.29, 36.82,
+        [
+            _candidate(1, "gardener, lawn mowing"),
+            _candidate(2, "plumber: fix any leaking kitchen sink", rating=None),
+            _candidate(3, "plumber", lat=-3.0),  # ~190km away
+        ],
+        max_distance_km=25,
+    )
+    assert [candidate.user_id for candidate in ranked] == [2, 1]
+    assert ranked[0].similarity > 0
+    assert rank_candidates("anything", 0, 0, [], limit=3) == []
+
+
+def test_batch_ranking_matches_single_task_ranking():
+    """Scoring tasks together gives each the same result as alone, minus excluded users."""
+    candidates = [
+        _candidate(1, "gardener, lawn mowing"),
+        _candidate(2, "plumber: fix any leaking kitchen sink"),
+        _candidate(3, "house cleaning and laundry", lon=36.9),
+    ]
+    tasks = [
+        {'text': "Fix a leaking kitchen sink", 'latitude': -1.29, 'longitude': 36.82},
+        {'text': "Mow the lawn", 'latitude': -1.29, 'longitude': 36.82, 'exclude_user_id': 1},
+    ]
+    batch = rank_candidates_for_tasks(tasks, candidates, limit=2)
+    assert batch[0][0].user_id == 2
+    assert 1 not in [candidate.user_id for candidate in batch[1]]
+    assert [c.user_id for c in batch[0]] == [
+        c.user_id for c in rank_candidates(tasks[0]['text'], -1.29, 36.82, candidates, limit=2)
+    ]
+    assert rank_candidates_for_tasks(tasks, []) == [[], []]
@@ -0,0 +1,85 @@
+from datetime import datetime
+import pytest
+from flask import Flask
+from sqlalchemy import select
+from models import db
+from models.user import User  # noqa: F401 (tables referenced by message)
+from models.conversation import Conversation  # noqa: F401
+from models.message import Message
+import utils.chat_messages as chat_messages
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def app(monkeypatch):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI="sqlite:///:memory:")
+    db.init_app(app)
+    app.redis = fakeredis.FakeRedis(decode_responses=True)
+    # A block of ids, so no sequence is needed
+    app.redis.hset(chat_messages.ID_KEY, mapping={'next': 1, 'last': 1000})
+    events = []
+    monkeypatch.setattr(chat_messages.socketio, 'emit', lambda *args, **kwargs: events.append((args, kwargs)))
+    app.events = events
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def _send(conversation_id=1, sender_id=1, receiver_id=2):
+    row = {
+        'conversation_id': conversation_id, 'sender_id': sender_id, 'reciever_id': receiver_id,
+        'message': "hi", 'image': None, 'status': "sent", 'date_time': datetime.utcnow(),
+    }
+    chat_messages.save_message(row, 1)
+    return row['id']
+
+
+def _statuses():
+    messages = Message.__table__
+    return list(db.session.execute(select(messages.c.status).order_by(messages.c.id)).scalars())
+
+
+def test_ack_during_flush_is_applied_by_next_flush(app, monkeypatch):
+    """An ack made after a batch was taken but before it was committed is not lost."""
+    sent = [_send() for _ in range(3)]
+    insert = chat_messages._insert
+
+    def insert_after_ack(rows):
+        # The receiver acks everything while the batch is in flight
+        chat_messages.queue_ack(2, 'read', 1, conversation_id=1, up_to_id=sent[-1])
+        assert chat_messages.mark_messages(2, 'read', 1, up_to_id=sent[-1]) == []
+        return insert(rows)
+
+    monkeypatch.setattr(chat_messages, '_insert', insert_after_ack)
+    assert chat_messages.flush_messages(100) == (3, 0)
+    assert _statuses() == ['sent'] * 3
+
+    monkeypatch.setattr(chat_messages, '_insert', insert)
+    assert chat_messages.flush_messages(100) == (0, 3)
+    assert _statuses() == ['read'] * 3
+    (_, payload, *_), kwargs = app.events[0]
+    assert payload['message_ids'] == sent and kwargs['room'] == 'user:1'
+
+
+def test_ack_of_all_conversations_covers_queued_messages(app):
+    """An ack without conversation or id reaches messages still queued."""
+    written = _send(conversation_id=1)
+    chat_messages.flush_messages(100)
+    queued = _send(conversation_id=2, sender_id=3)
+
+    chat_messages.queue_ack(2, 'delivered', 1)
+    assert [row[0] for row in chat_messages.mark_messages(2, 'delivered')] == [written]
+    chat_messages.flush_messages(100)
+    assert _statuses() == ['delivered', 'delivered']
+    assert [kwargs['room'] for _, kwargs in app.events] == ['user:3']
+    assert queued > written
+
+
+def test_ack_is_not_stored_when_everything_is_written(app):
+    _send()
+    chat_messages.flush_messages(100)
+    assert chat_messages.queue_ack(2, 'read', 1, conversation_id=1, up_to_id=1) is False
+    assert not app.redis.exists(chat_messages.ACKS_KEY)
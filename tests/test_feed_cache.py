@@ -0,0 +1,28 @@
+from utils.feed_cache import fingerprint, make_etag
+
+
+def test_fingerprint_ignores_argument_order_and_unset_values():
+    """Equivalent queries must share a cache key."""
+    a = {'sort': 'recent', 'limit': 20, 'category_ids': [2, 1], 'city': None}
+    b = {'category_ids': [1, 2], 'limit': 20, 'sort': 'recent'}
+    assert fingerprint("tasks", a) == fingerprint("tasks", b)
+
+
+def test_fingerprint_distinguishes_location_filters():
+    """lat/lon/radius must be part of the key so nearby queries don't collide."""
+    base = {'sort': 'distance', 'limit': 20, 'lat': -1.29, 'lon': 36.82}
+    near = dict(base, radius=5.0)
+    far = dict(base, radius=25.0)
+    moved = dict(near, lat=-1.30)
+    keys = {fingerprint("tasks", base), fingerprint("tasks", near),
+            fingerprint("tasks", far), fingerprint("tasks", moved)}
+    assert len(keys) == 4
+
+
+def test_etag_tracks_content_not_key_order():
+    """Identical bodies share an ETag; any change in content produces a new one."""
+    page = {'tasks': [{'id': 1, 'budget': "10.00"}], 'next_cursor': None}
+    reordered = {'next_cursor': None, 'tasks': [{'budget': "10.00", 'id': 1}]}
+    changed = {'tasks': [{'id': 1, 'budget': "12.00"}], 'next_cursor': None}
+    assert make_etag(page) == make_etag(reordered)
+    assert make_etag(page) != make_etag(changed)
@@ -0,0 +1,65 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from utils.gemini_client import GeminiClient, GeminiError, cache_key
+
+
+class _StubGemini(BaseHTTPRequestHandler):
+    """Answers generateContent like Gemini; a prompt containing 'fail' gets a 500."""
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        prompt = body['contents'][0]['parts'][0]['text']
+        _StubGemini.requests.append((self.path, self.headers.get('x-goog-api-key'), prompt))
+        if 'fail' in prompt:
+            self.send_response(500)
+            self.end_headers()
+            self.wfile.write(b'boom')
+            return
+        reply = {'candidates': [{'content': {'parts': [{'text': f"echo: {prompt}"}]}}]}
+        data = json.dumps(reply).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_url():
+    server = HTTPServer(('127.0.0.1', 0), _StubGemini)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    _StubGemini.requests = []
+    yield f"http://127.0.0.1:{server.server_port}/v1beta"
+    server.shutdown()
+    server.server_close()
+
+
+def test_generate_text_against_stub_server(stub_url):
+    """The client posts to the configured endpoint with the key and returns the reply text."""
+    client = GeminiClient(api_key='test-key', base_url=stub_url, model='stub-model')
+    assert client.generate_text("Categorize: fix sink") == "echo: Categorize: fix sink"
+    assert _StubGemini.requests == [
+        ('/v1beta/models/stub-model:generateContent', 'test-key', "Categorize: fix sink")
+    ]
+
+
+def test_http_errors_raise_gemini_error(stub_url):
+    """Non-200 replies surface as GeminiError rather than a parsing crash."""
+    client = GeminiClient(api_key='test-key', base_url=stub_url)
+    with pytest.raises(GeminiError):
+        client.generate_text("please fail")
+
+
+def test_cache_key_ignores_formatting_only():
+    """Whitespace-only differences share a cache entry; model and config do not."""
+    key = cache_key('m', "Task:  fix\n   sink ", {'temperature': 0.2})
+    assert key == cache_key('m', "Task: fix sink", {'temperature': 0.2})
+    assert key != cache_key('m', "Task: fix sink", {'temperature': 0.5})
+    assert key != cache_key('other', "Task: fix sink", {'temperature': 0.2})
@@ -0,0 +1,38 @@
+from utils.geohash import encode, decode_bbox, cells_covering
+from utils.haversine_distance_km import haversine_distance_km
+
+
+def test_encode_known_value():
+    """Encoding matches the reference geohash for a well known point."""
+    assert encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+def test_decode_bbox_contains_point():
+    """The decoded cell must contain the coordinates it was encoded from."""
+    lat, lon = -1.2921, 36.8219  # Nairobi CBD
+    lat_min, lat_max, lon_min, lon_max = decode_bbox(encode(lat, lon))
+    assert lat_min <= lat <= lat_max
+    assert lon_min <= lon <= lon_max
+
+
+def test_cells_cover_every_point_inside_radius():
+    """
+    Every point within the radius must fall inside one of the covering cells,
+    otherwise the geohash prefix filter would drop valid tasks.
+    """
+    lat, lon, radius = -1.2921, 36.8219, 5
+    cells = cells_covering(lat, lon, radius)
+    assert cells
+    precision = len(next(iter(cells)))
+
+    step = 0.005
+    for i in range(-10, 11):
+        for j in range(-10, 11):
+            p_lat, p_lon = lat + i * step, lon + j * step
+            if haversine_distance_km(lat, lon, p_lat, p_lon) <= radius:
+                assert encode(p_lat, p_lon, precision) in cells
+
+
+def test_cells_covering_huge_radius_returns_none():
+    """Radii larger than any cell disable the prefix filter."""
+    assert cells_covering(0, 0, 20000) is None
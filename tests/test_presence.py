@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+import pytest
+from flask import Flask
+import utils.presence as presence
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def app(monkeypatch):
+    app = Flask(__name__)
+    app.redis = fakeredis.FakeRedis(decode_responses=True)
+    connected = set()
+    manager = SimpleNamespace(is_connected=lambda sid, namespace: sid in connected)
+    monkeypatch.setattr(presence.socketio, 'server', SimpleNamespace(manager=manager), raising=False)
+    monkeypatch.setattr(presence, '_local_sids', {})
+    app.connected = connected
+    with app.app_context():
+        yield app
+
+
+def test_heartbeat_releases_connections_the_server_dropped(app):
+    """A disconnect that never reached presence must not be renewed forever."""
+    app.connected.update({'a', 'b'})
+    presence.connect(1, 'a')
+    presence.connect(1, 'b')
+    presence.connect(2, 'c')
+
+    app.connected.discard('b')
+    assert presence.renew_local_leases() == ['2']
+    assert presence.online_user_ids([1, 2]) == {'1'}
+
+    app.connected.discard('a')
+    assert presence.renew_local_leases() == ['1']
+    assert presence._local_sids == {}
+    assert app.redis.hgetall(presence.DIRTY_KEY).keys() == {'1', '2'}
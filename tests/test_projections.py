@@ -0,0 +1,74 @@
+from datetime import datetime
+from decimal import Decimal
+import pkgutil
+import pytest
+from flask import Flask
+import models
+from models import db
+from models.user import User
+from models.task import Task
+from models.task_location import TaskLocation
+from utils.projections import Projection
+
+TASK = Projection(
+    'task', Task.id, Task.title, Task.budget, Task.specific_date, Task.deadline_date, Task.created_at
+)
+LOCATION = Projection('location', TaskLocation.id, TaskLocation.city, TaskLocation.latitude)
+
+
+@pytest.fixture
+def session():
+    for module in pkgutil.iter_modules(models.__path__):
+        __import__(f"models.{module.name}")
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI="sqlite://")
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield db.session
+        db.session.remove()
+
+
+def _rows(session):
+    return (
+        session.query(TASK, LOCATION)
+        .outerjoin(TaskLocation, TaskLocation.task_id == Task.id)
+        .order_by(Task.id)
+        .all()
+    )
+
+
+def test_projection_uses_serializer_formats(session):
+    """Query rows must render what SerializerMixin.to_dict(only=...) did."""
+    session.add(User(id=1, name="u", email="u@example.com", phone="0700000000"))
+    task = Task(
+        user_id=1, title="Fix sink", description="d", work_mode="physical", budget=Decimal("2500.50"),
+        schedule_type="specific_day", specific_date=datetime(2026, 11, 2, 14, 0),
+        created_at=datetime(2026, 10, 1, 8, 15, 30)
+    )
+    task.location = TaskLocation(city="Nairobi", latitude=-1.28, longitude=36.82)
+    session.add(task)
+    session.commit()
+
+    (row,) = _rows(session)
+    assert row.task == {
+        'id': task.id,
+        'title': "Fix sink",
+        'budget': "2500.50",
+        'specific_date': "2026-11-02 14:00:00",
+        'deadline_date': None,
+        'created_at': "2026-10-01 08:15:30",
+    }
+    # Numeric(scale=6) comes back as Decimal and is formatted like budget
+    assert row.location == {'id': task.location.id, 'city': "Nairobi", 'latitude': "-1.280000"}
+
+
+def test_outer_joined_projection_without_row_is_all_null(session):
+    """A remote task's missing location comes back as a dict of Nones."""
+    session.add(User(id=1, name="u", email="u@example.com", phone="0700000000"))
+    session.add(Task(user_id=1, title="Logo", description="d", work_mode="remote", budget=10, schedule_type="flexible"))
+    session.commit()
+
+    (row,) = _rows(session)
+    assert row.task['title'] == "Logo"
+    assert row.location == {'id': None, 'city': None, 'latitude': None}
@@ -0,0 +1,39 @@
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from utils.task_cards import build_card, format_datetime, SERIALIZER_DATETIME_FORMAT
+
+
+def _task(**overrides):
+    fields = dict(
+        id=7, user_id=3, title="Fix sink", description="Leaking tap",
+        work_mode="physical", budget=Decimal("1500.00"), status="open",
+        schedule_type="flexible", specific_date=None, deadline_date=None,
+        preferred_time="morning", created_at=datetime(2026, 5, 1, 9, 30, 15),
+        updated_at=None,
+        location=SimpleNamespace(
+            id=2, latitude=Decimal("-1.292066"), longitude=Decimal("36.821945"),
+            country="Kenya", state="Nairobi", city="Nairobi", area="CBD"
+        ),
+        categories=[SimpleNamespace(id=4, name="Plumbing")],
+        images=[],
+        user=SimpleNamespace(id=3, name="Wanjiru", image=None),
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def test_card_keeps_serializer_representations():
+    """Cards must render the same strings SerializerMixin.to_dict produced."""
+    card = build_card(_task())
+    assert card['budget'] == "1500.00"
+    assert card['location']['latitude'] == "-1.292066"
+    assert format_datetime(card['created_at'], SERIALIZER_DATETIME_FORMAT) == "2026-05-01 09:30:15"
+    assert format_datetime(card['updated_at'], SERIALIZER_DATETIME_FORMAT) is None
+    assert card['categories'] == [{'id': 4, 'name': "Plumbing"}]
+
+
+def test_card_without_location():
+    """Remote tasks have no location block."""
+    card = build_card(_task(location=None, work_mode="remote"))
+    assert card['location'] is None
@@ -0,0 +1,36 @@
+import json
+from utils.task_classifier import TaskClassifier, build_model
+
+CATEGORIES = {1: "Plumbing", 2: "Cleaning", 3: "Graphic Design", 4: "Gardening"}
+
+EXAMPLES = [
+    ("Fix broken sink", 1), ("Leaking kitchen tap", 1), ("Unblock toilet drain", 1),
+    ("Replace bathroom pipe", 1), ("Fix leaking pipe under sink", 1),
+    ("Clean two bedroom house", 2), ("Laundry and ironing", 2), ("Mop floors and wash windows", 2),
+    ("Deep clean kitchen", 2), ("House cleaning every Friday", 2),
+    ("Design a company logo", 3), ("Poster design for event", 3), ("Flyer and logo design", 3),
+    ("Business card design", 3), ("Design social media graphics", 3),
+    ("Mow the lawn", 4),  # too few examples to get a centroid
+]
+
+
+def _classifier():
+    # Round-trip through JSON as the model does through Redis
+    return TaskClassifier(json.loads(json.dumps(build_model(EXAMPLES, CATEGORIES))))
+
+
+def test_confident_predictions_for_clear_tasks():
+    """Tasks that plainly match one category are answered locally."""
+    classifier = _classifier()
+    assert classifier.predict("Fix a broken sink").name == "Plumbing"
+    assert classifier.predict("need a logo design for my shop").category_id == 3
+    assert classifier.predict("clean my house").name == "Cleaning"
+
+
+def test_unclear_tasks_fall_back():
+    """Unknown vocabulary or untrained categories yield no prediction."""
+    classifier = _classifier()
+    assert classifier.predict("Mow the lawn") is None
+    assert classifier.predict("walk my dog in the evening") is None
+    assert classifier.predict("") is None
+    assert 4 not in classifier.categories
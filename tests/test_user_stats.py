@@ -0,0 +1,123 @@
+import pkgutil
+import pytest
+from flask import Flask
+from sqlalchemy import event
+import models
+from models import db, User, Task, Bid, TaskAssignment, Review, UserStats
+from models.user_stats import _scan, reconcile_user_stats
+
+TOTALS = ('review_count', 'rating_sum', 'assigned_count', 'completed_count')
+
+
+@pytest.fixture
+def app():
+    for module in pkgutil.iter_modules(models.__path__):
+        __import__(f"models.{module.name}")
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI="sqlite://")
+    db.init_app(app)
+    with app.app_context():
+        # SQLite only enforces ON DELETE CASCADE with foreign keys on
+        event.listen(db.engine, 'connect', lambda connection, _: connection.execute('PRAGMA foreign_keys=ON'))
+        db.engine.dispose()
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def _users(count):
+    users = [User(name=f"u{i}", email=f"u{i}@example.com", phone=f"070000000{i}", image="") for i in range(count)]
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+
+def _reviewed_task(giver, doer, rating=4.0):
+    """A completed task with a review in each direction."""
+    task = Task(user_id=giver.id, title="t", description="d", work_mode="remote", budget=10, schedule_type="flexible")
+    db.session.add(task)
+    db.session.flush()
+    bid = Bid(task_id=task.id, user_id=doer.id, amount=10)
+    db.session.add(bid)
+    db.session.flush()
+    assignment = TaskAssignment(
+        task_id=task.id, task_giver=giver.id, task_doer=doer.id, agreed_price=10, bid_id=bid.id, status="completed"
+    )
+    db.session.add(assignment)
+    db.session.flush()
+    db.session.add_all([
+        Review(task_assignment_id=assignment.id, reviewer_id=giver.id, reviewee_id=doer.id, rating=rating),
+        Review(task_assignment_id=assignment.id, reviewer_id=doer.id, reviewee_id=giver.id, rating=rating - 1),
+    ])
+    db.session.commit()
+    return task
+
+
+def _drifted():
+    db.session.expire_all()
+    connection = db.session.connection()
+    return {
+        stats.user_id for stats in UserStats.query
+        if _scan(connection, stats.user_id) != {name: getattr(stats, name) for name in TOTALS}
+    }
+
+
+def test_totals_follow_deletes_the_orm_does_not_see(app):
+    """Soft/hard task deletion and user deletion leave totals equal to a recount."""
+    from resources.task_resource import SingleTaskResource
+
+    giver, doer, other = _users(3)
+    soft, hard = _reviewed_task(giver, doer), _reviewed_task(giver, doer, rating=2.0)
+    _reviewed_task(other, doer)
+    assert _drifted() == set()
+
+    SingleTaskResource()._perform_soft_deletion(soft)
+    db.session.commit()
+    assert _drifted() == set()
+
+    SingleTaskResource()._perform_hard_deletion(hard)
+    db.session.commit()
+    assert _drifted() == set()
+
+    db.session.delete(other)
+    db.session.commit()
+    assert _drifted() == set()
+    # Only the soft-deleted task's review is left
+    assert db.session.get(UserStats, doer.id).review_count == 1
+
+
+def test_reconcile_rebuilds_drifted_rows(app):
+    giver, doer = _users(2)
+    _reviewed_task(giver, doer)
+    db.session.get(UserStats, doer.id).review_count += 5
+    db.session.commit()
+
+    assert reconcile_user_stats(db.session.connection(), 0, limit=1) == (giver.id, [])
+    assert reconcile_user_stats(db.session.connection(), giver.id) == (doer.id, [doer.id])
+    assert reconcile_user_stats(db.session.connection(), doer.id) == (None, [])
+    db.session.commit()
+    assert _drifted() == set()
+
+
+def test_first_events_racing_to_create_the_row(app):
+    """A stats row inserted between the existence check and the insert is kept."""
+    from models.user_stats import ensure_stats
+
+    (user,) = _users(1)
+    db.session.execute(UserStats.__table__.delete())
+    connection = db.session.connection()
+
+    raced = []
+
+    def concurrent_insert(conn, cursor, statement, *_):
+        if statement.startswith("SELECT user_stats.user_id") and not raced:
+            raced.append(user.id)
+            conn.connection.cursor().execute(
+                "INSERT INTO user_stats (user_id, review_count) VALUES (?, 7)", (user.id,)
+            )
+
+    event.listen(db.engine, 'after_cursor_execute', concurrent_insert)
+    ensure_stats(connection, user.id)
+    event.remove(db.engine, 'after_cursor_execute', concurrent_insert)
+    assert raced
+    assert db.session.get(UserStats, user.id).review_count == 7
@@ -0,0 +1,160 @@
+"""
+Per-task bid summaries.
+
+A summary holds what task listings show about a task's live (non-rejected)
+bids: the count, lowest/highest/average amount and the latest few bidders.
+Summaries are stored in Redis as one JSON document per task and recomputed
+from that task's bids after every bid write (create, accept, reject), so
+listings read them with a single MGET and never scan bids. Min and max
+can't be decremented when a bid is rejected, which is why the write path
+recomputes rather than adjusting counters.
+"""
+from flask import current_app
+from sqlalchemy import func
+from models import db
+from models.bid import Bid
+from models.user import User
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_KEY_PREFIX = "bid_summary:"
+
+# Writes refresh summaries explicitly; the TTL only bounds memory for idle tasks
+SUMMARY_TTL = 60 * 60 * 24
+
+# Bidder avatars kept per task
+LATEST_BIDDERS = 5
+
+
+def summary_key(task_id):
+    return f"{SUMMARY_KEY_PREFIX}{task_id}"
+
+
+def empty_summary(task_id):
+    return {
+        'task_id': task_id,
+        'count': 0,
+        'min_amount': None,
+        'max_amount': None,
+        'avg_amount': None,
+        'latest': [],
+    }
+
+
+def _load_summaries(task_ids):
+    """Build summaries for `task_ids` with one aggregate and one windowed query."""
+    summaries = {task_id: empty_summary(task_id) for task_id in task_ids}
+    live = (Bid.task_id.in_(task_ids), Bid.status != 'rejected')
+
+    for row in (
+        db.session.query(
+            Bid.task_id,
+            func.count(Bid.id).label('count'),
+            func.min(Bid.amount).label('min_amount'),
+            func.max(Bid.amount).label('max_amount'),
+            func.avg(Bid.amount).label('avg_amount'),
+        )
+        .filter(*live)
+        .group_by(Bid.task_id)
+    ):
+        summaries[row.task_id].update(
+            count=row.count,
+            min_amount=float(row.min_amount),
+            max_amount=float(row.max_amount),
+            avg_amount=round(float(row.avg_amount), 2),
+        )
+
+    position = func.row_number().over(
+        partition_by=Bid.task_id,
+        order_by=(Bid.created_at.desc(), Bid.id.desc())
+    ).label('position')
+    ranked = (
+        db.session.query(Bid.id, Bid.task_id, Bid.user_id, Bid.amount, position)
+        .filter(*live)
+        .subquery()
+    )
+    for row in (
+        db.session.query(ranked, User.image)
+        .join(User, User.id == ranked.c.user_id)
+        .filter(ranked.c.position <= LATEST_BIDDERS)
+        .order_by(ranked.c.task_id, ranked.c.position)
+    ):
+        summaries[row.task_id]['latest'].append({
+            'bid_id': row.id,
+            'user_id': row.user_id,
+            'price': float(row.amount),
+            'bidder_image': row.image,
+        })
+
+    return summaries
+
+
+def _store(summaries):
+    pipe = current_app.redis.pipeline(transaction=False)
+    for task_id, summary in summaries.items():
+        pipe.set(summary_key(task_id), json.dumps(summary), ex=SUMMARY_TTL)
+    pipe.execute()
+
+
+def get_bid_summaries(task_ids):
+    """
+    Return {task_id: summary} for every id in `task_ids`.
+    Summaries missing from Redis are rebuilt in one pass and written back;
+    tasks without bids get an empty summary.
+    """
+    ids = list(dict.fromkeys(int(task_id) for task_id in task_ids))
+    if not ids:
+        return {}
+
+    try:
+        raw = current_app.redis.mget([summary_key(task_id) for task_id in ids])
+    except Exception as e:
+        logger.error(f"Bid summary read failed, rebuilding from database: {e}")
+        raw = [None] * len(ids)
+
+    summaries = {}
+    missing = []
+    for task_id, value in zip(ids, raw):
+        if value is None:
+            missing.append(task_id)
+        else:
+            summaries[task_id] = json.loads(value)
+
+    if missing:
+        rebuilt = _load_summaries(missing)
+        summaries.update(rebuilt)
+        try:
+            _store(rebuilt)
+        except Exception as e:
+            logger.error(f"Bid summary write-back failed: {e}")
+
+    return summaries
+
+
+def refresh_bid_summaries(task_ids):
+    """
+    Recompute the summaries for `task_ids` from committed data.
+    Call after commit whenever a bid on these tasks is created or changes status.
+    """
+    ids = list(dict.fromkeys(int(task_id) for task_id in task_ids))
+    if not ids:
+        return
+    try:
+        _store(_load_summaries(ids))
+    except Exception as e:
+        logger.error(f"Bid summary refresh failed for {ids}: {e}")
+
+
+def refresh_user_bid_summaries(user_id):
+    """Recompute every summary that may show this user's avatar."""
+    try:
+        task_ids = [
+            row.task_id for row in
+            db.session.query(Bid.task_id).filter(Bid.user_id == user_id, Bid.status != 'rejected')
+        ]
+    except Exception as e:
+        logger.error(f"Bid summary lookup failed for user {user_id}: {e}")
+        return
+    refresh_bid_summaries(task_ids)
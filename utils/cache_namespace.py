@@ -0,0 +1,73 @@
+"""
+Generation-based cache invalidation.
+
+Every cached key that belongs to a namespace embeds the namespace's current
+generation number. Invalidating a namespace is a single INCR on its
+generation counter: keys built with the old generation are never read again
+and simply age out through their TTL. This replaces SCAN/KEYS + DELETE loops,
+whose cost grows with the size of the keyspace.
+"""
+from flask import current_app
+import logging
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY_PREFIX = "cache_ns:"
+
+# Every variant of the public task feed (/tasks with any filter/sort/cursor)
+TASK_FEEDS = "tasks"
+
+
+def user_namespace(user_id):
+    """Namespace grouping every per-user task view (my tasks, activity, ...)."""
+    return f"user:{user_id}"
+
+
+def recommendations_namespace(user_id):
+    """Namespace grouping every cached page of one user's recommended tasks."""
+    return f"recommendations:{user_id}"
+
+
+def task_namespace(task_id):
+    """Namespace grouping every cached variant scoped to one task (e.g. bid lists)."""
+    return f"task:{task_id}"
+
+
+def namespaced_key(key, *namespaces):
+    """
+    Build a cache key bound to the current generation of each namespace.
+    Costs one MGET regardless of how many namespaces are involved.
+    """
+    if not namespaces:
+        return key
+    versions = current_app.redis.mget([VERSION_KEY_PREFIX + ns for ns in namespaces])
+    generation = ".".join(f"{ns}={v or 0}" for ns, v in zip(namespaces, versions))
+    return f"{key}|{generation}"
+
+
+def namespaced_keys(pairs):
+    """
+    Batch form of namespaced_key for (key, namespace) pairs, e.g. one
+    detail key per task. Costs one MGET for the whole batch.
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return []
+    versions = current_app.redis.mget([VERSION_KEY_PREFIX + ns for _, ns in pairs])
+    return [f"{key}|{ns}={v or 0}" for (key, ns), v in zip(pairs, versions)]
+
+
+def bump(*namespaces):
+    """
+    Invalidate every key in the given namespaces with one pipelined INCR each.
+    Failures are logged rather than raised; callers run this after commit.
+    """
+    if not namespaces:
+        return
+    try:
+        pipe = current_app.redis.pipeline(transaction=False)
+        for ns in set(namespaces):
+            pipe.incr(VERSION_KEY_PREFIX + ns)
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Cache namespace bump failed for {namespaces}: {e}")
@@ -0,0 +1,81 @@
+"""
+Pending set for batched task categorization.
+
+New tasks are added to a Redis set, and the first one in a quiet period
+schedules a flush job `window` seconds later. Everything that arrives
+before the flush runs is categorized together, so a posting burst costs
+one LLM request and one transaction per batch instead of one per task.
+Tasks a flush could not categorize are put back for a later one, up to
+MAX_ATTEMPTS times.
+"""
+from flask import current_app
+import logging
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "duotasks:categorization:pending"
+FLUSH_SCHEDULED_KEY = "duotasks:categorization:flush_scheduled"
+ATTEMPTS_KEY = "duotasks:categorization:attempts"
+
+# Flushes a task may fail in before it is left uncategorized
+MAX_ATTEMPTS = 3
+
+
+def add_pending(task_id, window):
+    """
+    Queue `task_id`. Returns True when the caller should schedule a flush
+    in `window` seconds, i.e. none is scheduled yet.
+    """
+    redis_client = current_app.redis
+    pipe = redis_client.pipeline()
+    pipe.sadd(PENDING_KEY, task_id)
+    # The marker outlives the window slightly so a slow flush isn't doubled
+    pipe.set(FLUSH_SCHEDULED_KEY, 1, nx=True, ex=int(window) + 30)
+    _, scheduled = pipe.execute()
+    return bool(scheduled)
+
+
+def pop_pending(count):
+    """
+    Take up to `count` pending task ids. Clears the flush marker first, so
+    tasks queued from now on schedule the next flush.
+    """
+    redis_client = current_app.redis
+    redis_client.delete(FLUSH_SCHEDULED_KEY)
+    return [int(task_id) for task_id in redis_client.spop(PENDING_KEY, count) or []]
+
+
+def pending_count():
+    return current_app.redis.scard(PENDING_KEY)
+
+
+def requeue(task_ids, window, max_attempts=MAX_ATTEMPTS):
+    """
+    Put back tasks a flush didn't categorize. Returns (whether the caller
+    should schedule a flush, ids dropped after `max_attempts` failures).
+    """
+    if not task_ids:
+        return False, []
+    redis_client = current_app.redis
+    pipe = redis_client.pipeline()
+    for task_id in task_ids:
+        pipe.hincrby(ATTEMPTS_KEY, task_id, 1)
+    pipe.expire(ATTEMPTS_KEY, 24 * 3600)
+    attempts = pipe.execute()[:-1]
+    retry = [task_id for task_id, n in zip(task_ids, attempts) if n < max_attempts]
+    dropped = [task_id for task_id, n in zip(task_ids, attempts) if n >= max_attempts]
+
+    pipe = redis_client.pipeline()
+    if dropped:
+        pipe.hdel(ATTEMPTS_KEY, *dropped)
+    if retry:
+        pipe.sadd(PENDING_KEY, *retry)
+        pipe.set(FLUSH_SCHEDULED_KEY, 1, nx=True, ex=int(window) + 30)
+    results = pipe.execute()
+    return bool(retry and results[-1]), dropped
+
+
+def forget(task_ids):
+    """Clear the failure counts of tasks that were categorized."""
+    if task_ids:
+        current_app.redis.hdel(ATTEMPTS_KEY, *task_ids)
@@ -0,0 +1,393 @@
+"""
+Write-behind persistence for chat messages.
+
+A message gets its id before it touches the database, so the socket
+handler can emit it to both users at once. Ids come from the message id
+sequence in blocks: the sequence increments by ID_BLOCK_SIZE, every
+nextval reserves the ids [hi, hi + ID_BLOCK_SIZE), and a Redis counter
+hands them out one by one to every process. Ids therefore stay unique
+next to rows inserted through the ORM and increase in the order messages
+are sent.
+
+The message itself is appended to a Redis list, and the first message in
+a quiet period schedules a flush `window` seconds later that inserts
+everything pending in multi-row INSERTs. Status changes are coalesced in
+a hash keeping only the furthest status per message; a message whose
+status changed before it was flushed is simply inserted with it, the
+rest are applied with one UPDATE per status.
+
+Acknowledging many messages at once ("delivered/read up to id N in
+conversation C") is a single UPDATE ... RETURNING, and the senders get
+one aggregated status event per conversation. An ack made while messages
+are queued or being written is kept, and the next flush (which starts
+after the running one finished) applies it again.
+"""
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from models import db
+from models.message import Message
+from extensions import socketio, user_room
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+ID_KEY = "chat:message_ids"
+PENDING_KEY = "chat:messages:pending"
+STATUS_KEY = "chat:messages:status"
+ACKS_KEY = "chat:messages:acks"
+# Set while a taken batch is not committed yet
+INFLIGHT_KEY = "chat:messages:inflight"
+FLUSH_SCHEDULED_KEY = "chat:messages:flush_scheduled"
+FLUSH_LOCK_KEY = "chat:messages:flush_lock"
+
+# Must match the INCREMENT BY of message_id_seq (migration 5f8e2d7a9c13)
+ID_BLOCK_SIZE = 100
+
+STATUS_RANK = {'sent': 0, 'delivered': 1, 'read': 2}
+
+# Hand out the next id of the current block. ARGV[1] is a freshly reserved
+# block start (or empty), installed only when the current block is used up
+# and it is newer, so ids keep increasing. Returns false when a block is needed
+_NEXT_ID = """
+local next_id = tonumber(redis.call('HGET', KEYS[1], 'next') or '1')
+local last = tonumber(redis.call('HGET', KEYS[1], 'last') or '0')
+local hi = tonumber(ARGV[1])
+if hi and next_id > last and hi > last then
+    next_id = hi
+    last = hi + tonumber(ARGV[2]) - 1
+    redis.call('HSET', KEYS[1], 'last', last)
+end
+if next_id > last then
+    return false
+end
+redis.call('HSET', KEYS[1], 'next', next_id + 1)
+return next_id
+"""
+
+# Record ARGV[1] for the message ids ARGV[3..] unless a further one is set
+_SET_STATUS = """
+local rank = {sent = 0, delivered = 1, read = 2}
+for i = 3, #ARGV do
+    local current = redis.call('HGET', KEYS[1], ARGV[i])
+    if not current or rank[current] < tonumber(ARGV[2]) then
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[1])
+    end
+end
+return 1
+"""
+
+# Keep the highest acknowledged id per receiver:conversation:status field
+_KEEP_ACK = """
+local current = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0')
+if tonumber(ARGV[2]) > current then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+end
+return 1
+"""
+
+# Store an ack if any message may still be unwritten. An empty ARGV[2]
+# means every message sent so far. Returns 0 if not needed, 1 if stored
+# and 2 if stored and no flush is scheduled yet
+_QUEUE_ACK = """
+if redis.call('LLEN', KEYS[2]) == 0 and redis.call('EXISTS', KEYS[3]) == 0 then
+    return 0
+end
+local up_to = tonumber(ARGV[2]) or (tonumber(redis.call('HGET', KEYS[4], 'next') or '1') - 1)
+local current = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0')
+if up_to > current then
+    redis.call('HSET', KEYS[1], ARGV[1], up_to)
+end
+if redis.call('SET', KEYS[5], 1, 'NX', 'EX', ARGV[3]) then
+    return 2
+end
+return 1
+"""
+
+# Taking a batch marks it in flight in the same step, so an ack can never
+# see neither the queued nor the in-flight messages
+_TAKE_PENDING = """
+local entries = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #entries > 0 then
+    redis.call('SET', KEYS[2], 1, 'EX', 300)
+end
+redis.call('LTRIM', KEYS[1], #entries, -1)
+return entries
+"""
+
+# Takes a whole hash (statuses or acks)
+_TAKE_HASH = """
+local entries = redis.call('HGETALL', KEYS[1])
+redis.call('DEL', KEYS[1])
+return entries
+"""
+
+
+def allocate_message_id():
+    """Next message id, reserving a new block from the sequence when needed."""
+    redis = current_app.redis
+    message_id = redis.eval(_NEXT_ID, 1, ID_KEY, '', ID_BLOCK_SIZE)
+    while message_id is None:
+        hi = db.session.execute(
+            text("SELECT nextval(pg_get_serial_sequence('message', 'id'))")
+        ).scalar()
+        message_id = redis.eval(_NEXT_ID, 1, ID_KEY, hi, ID_BLOCK_SIZE)
+    return int(message_id)
+
+
+def _schedule_marker(pipe, window):
+    # The marker outlives the window slightly so a slow flush isn't doubled
+    # (_QUEUE_ACK sets the same marker)
+    pipe.set(FLUSH_SCHEDULED_KEY, 1, nx=True, ex=int(window) + 30)
+
+
+def save_message(row, window):
+    """
+    Give `row` (message column values without id) an id and queue it.
+    Returns True when the caller should schedule a flush in `window`
+    seconds. Without Redis the row is inserted directly instead.
+    """
+    try:
+        row['id'] = allocate_message_id()
+        pipe = current_app.redis.pipeline()
+        pipe.rpush(PENDING_KEY, json.dumps({**row, 'date_time': row['date_time'].isoformat()}))
+        _schedule_marker(pipe, window)
+        _, scheduled = pipe.execute()
+        return bool(scheduled)
+    except Exception as e:
+        logger.error(f"Message queue unavailable, writing message directly: {e}")
+        db.session.rollback()
+        row.pop('id', None)
+        messages = Message.__table__
+        row['id'] = db.session.execute(
+            messages.insert().values(**row).returning(messages.c.id)
+        ).scalar()
+        db.session.commit()
+        return False
+
+
+def queue_status(message_ids, status, window):
+    """
+    Record `status` for `message_ids`, never moving a message back (read
+    stays read). Returns True when the caller should schedule a flush.
+    """
+    message_ids = [str(message_id) for message_id in message_ids]
+    if not message_ids:
+        return False
+    pipe = current_app.redis.pipeline()
+    pipe.eval(_SET_STATUS, 1, STATUS_KEY, status, STATUS_RANK[status], *message_ids)
+    _schedule_marker(pipe, window)
+    _, scheduled = pipe.execute()
+    return bool(scheduled)
+
+
+def _behind(status):
+    return [s for s, rank in STATUS_RANK.items() if rank < STATUS_RANK[status]]
+
+
+def mark_messages(receiver_id, status, conversation_id=None, up_to_id=None, message_ids=None):
+    """
+    Move the messages received by `receiver_id` that are behind `status`
+    to it, optionally only in one conversation, up to an id or among
+    `message_ids`. One UPDATE ... RETURNING; returns the changed rows as
+    (id, sender_id, conversation_id).
+    """
+    messages = Message.__table__
+    conditions = [messages.c.reciever_id == receiver_id, messages.c.status.in_(_behind(status))]
+    if conversation_id is not None:
+        conditions.append(messages.c.conversation_id == conversation_id)
+    if up_to_id is not None:
+        conditions.append(messages.c.id <= up_to_id)
+    if message_ids is not None:
+        conditions.append(messages.c.id.in_(message_ids))
+    try:
+        rows = db.session.execute(
+            update(messages).where(*conditions).values(status=status)
+            .returning(messages.c.id, messages.c.sender_id, messages.c.conversation_id)
+        ).all()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return rows
+
+
+def emit_status_updates(rows, status):
+    """
+    Tell senders about changed `rows` from `mark_messages`: one
+    message_status_update per sender and conversation, carrying every id
+    and the highest one as message_id. Returns the number of events.
+    """
+    groups = {}
+    for message_id, sender_id, conversation_id in rows:
+        groups.setdefault((sender_id, conversation_id), []).append(message_id)
+    for (sender_id, conversation_id), message_ids in groups.items():
+        message_ids.sort()
+        socketio.emit('message_status_update', {
+            'conversation_id': conversation_id,
+            'message_id': message_ids[-1],
+            'message_ids': message_ids,
+            'status': status
+        }, room=user_room(sender_id))
+    return len(groups)
+
+
+def queue_ack(receiver_id, status, window, conversation_id=None, up_to_id=None):
+    """
+    Remember an ack for the next flush while any message may be queued or
+    being written; call it before `mark_messages`, so every message is
+    either already written for the UPDATE or covered by the stored ack.
+    Without `conversation_id` / `up_to_id` it covers all conversations /
+    every message sent so far. Returns True when the caller should
+    schedule a flush.
+    """
+    field = f"{receiver_id}:{conversation_id or '*'}:{status}"
+    stored = current_app.redis.eval(
+        _QUEUE_ACK, 5, ACKS_KEY, PENDING_KEY, INFLIGHT_KEY, ID_KEY, FLUSH_SCHEDULED_KEY,
+        field, up_to_id or '', int(window) + 30
+    )
+    return stored == 2
+
+
+def _apply_acks(acks):
+    """Apply acks taken from the hash after the pending messages were written."""
+    count = 0
+    # Delivered before read, so senders see the changes in order
+    for field, up_to_id in sorted(acks.items(), key=lambda item: STATUS_RANK[item[0].rsplit(':', 1)[1]]):
+        receiver_id, conversation_id, status = field.split(':')
+        conversation_id = None if conversation_id == '*' else int(conversation_id)
+        rows = mark_messages(int(receiver_id), status, conversation_id, up_to_id=int(up_to_id))
+        emit_status_updates(rows, status)
+        count += len(rows)
+    return count
+
+
+def _decode(entry):
+    row = json.loads(entry)
+    row['date_time'] = datetime.fromisoformat(row['date_time'])
+    return row
+
+
+def _insert(rows):
+    """Insert `rows`, skipping ones already written; rows that violate a
+    constraint (e.g. a deleted conversation) are dropped one by one."""
+    dialect = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+    statement = dialect.insert(Message.__table__).on_conflict_do_nothing(index_elements=['id'])
+    try:
+        db.session.execute(statement, rows)
+        db.session.commit()
+        return len(rows)
+    except IntegrityError:
+        db.session.rollback()
+    written = 0
+    for row in rows:
+        try:
+            db.session.execute(statement, [row])
+            db.session.commit()
+            written += 1
+        except IntegrityError as e:
+            db.session.rollback()
+            logger.error(f"Dropping message {row['id']}: {e.orig}")
+    return written
+
+
+def flush_messages(batch_size, max_batches=100):
+    """
+    Insert pending messages and apply pending status changes. Returns
+    (messages written, statuses applied), or None if another flush is
+    running. Entries are put back if the database write fails.
+    """
+    redis = current_app.redis
+    if not redis.set(FLUSH_LOCK_KEY, 1, nx=True, ex=300):
+        return None
+    try:
+        # Messages queued from now on schedule the next flush
+        redis.delete(FLUSH_SCHEDULED_KEY)
+        # Statuses first: any message they refer to was queued before them
+        entries = redis.eval(_TAKE_HASH, 1, STATUS_KEY)
+        statuses = dict(zip(entries[::2], entries[1::2]))
+        entries = redis.eval(_TAKE_HASH, 1, ACKS_KEY)
+        acks = dict(zip(entries[::2], entries[1::2]))
+        try:
+            written = 0
+            drained = True
+            for _ in range(max_batches):
+                entries = redis.eval(_TAKE_PENDING, 2, PENDING_KEY, INFLIGHT_KEY, batch_size)
+                if not entries:
+                    break
+                rows = [_decode(entry) for entry in entries]
+                for row in rows:
+                    status = statuses.get(str(row['id']))
+                    if status and STATUS_RANK[status] > STATUS_RANK.get(row['status'], 0):
+                        row['status'] = status
+                try:
+                    written += _insert(rows)
+                except Exception:
+                    db.session.rollback()
+                    redis.lpush(PENDING_KEY, *reversed(entries))
+                    raise
+                for row in rows:
+                    statuses.pop(str(row['id']), None)
+            else:
+                drained = not redis.llen(PENDING_KEY)
+
+            applied, unmatched = _apply_statuses(statuses)
+            statuses = {}
+            applied += _apply_acks(acks)
+        except Exception:
+            pipe = redis.pipeline(transaction=False)
+            for message_id, status in statuses.items():
+                pipe.hsetnx(STATUS_KEY, message_id, status)
+            for field, up_to_id in acks.items():
+                pipe.eval(_KEEP_ACK, 1, ACKS_KEY, field, up_to_id)
+            pipe.execute()
+            raise
+
+        if not drained:
+            # Messages left behind may be the ones the remaining statuses are for
+            pipe = redis.pipeline(transaction=False)
+            for message_id, status in unmatched.items():
+                pipe.hsetnx(STATUS_KEY, message_id, status)
+            pipe.execute()
+        return written, applied
+    finally:
+        # Put-back entries are pending again, so acks still get stored
+        redis.delete(INFLIGHT_KEY)
+        redis.delete(FLUSH_LOCK_KEY)
+
+
+def _apply_statuses(statuses):
+    """
+    One UPDATE per status over the messages behind it. Returns (rows
+    updated, statuses that matched no row).
+    """
+    messages = Message.__table__
+    by_status = {}
+    for message_id, status in statuses.items():
+        by_status.setdefault(status, []).append(int(message_id))
+
+    count = 0
+    matched = set()
+    try:
+        for status, message_ids in by_status.items():
+            result = db.session.execute(
+                update(messages)
+                .where(messages.c.id.in_(message_ids), messages.c.status.in_(_behind(status)))
+                .values(status=status)
+                .returning(messages.c.id)
+            )
+            updated = result.scalars().all()
+            matched.update(updated)
+            count += len(updated)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    unmatched = {
+        message_id: status for message_id, status in statuses.items()
+        if int(message_id) not in matched
+    }
+    return count, unmatched
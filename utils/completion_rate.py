@@ -1,15 +1,15 @@
 from __future__ import annotations
-from typing import Optional, Tuple
-from sqlalchemy import func, case
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from models.task_assignment import TaskAssignment
+from models.user_stats import UserStats
 from models import db
 from flask import current_app
 
 class UserCompletionRateCalculator:
     """
     Efficiently calculates Bayesian-adjusted task completion rates for users.
-    Uses caching for global statistics and optimized SQL queries.
+    Reads the maintained user_stats totals and caches the global rate.
 
     Bayesian Formula:
         Rate = (User Completed + m * Global Rate) / (User Assigned + m)
@@ -21,32 +21,27 @@ class UserCompletionRateCalculator:
         self.min_tasks = min_tasks
         self.cache = current_app.cache  # Assuming current_app.cache is set up
 
-    def _get_user_stats(self, user_id: int) -> Tuple[int, int]:
+    def _get_user_stats(self, user_ids: Iterable[int]) -> Dict[int, Tuple[int, int]]:
         """
-        Retrieve user's task statistics (completed and total assignments)
-        using a single query.
-        Returns: (completed_tasks, total_assigned_tasks)
+        Retrieve task statistics (completed and total assignments) for many
+        users with a single primary-key lookup.
+        Returns: {user_id: (completed_tasks, total_assigned_tasks)}, with
+        (0, 0) for users that have no assignments.
         """
-        result = (
-            self.session.query(
-                func.count(TaskAssignment.id).label("total"),
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (TaskAssignment.status == 'completed', 1),
-                            else_=0
-                        )
-                    ), 0
-                ).label("completed")
-            )
-            .filter(TaskAssignment.task_doer == user_id)
-            .first()
-        )
+        user_ids = list(dict.fromkeys(user_ids))
+        stats = {user_id: (0, 0) for user_id in user_ids}
+        if not user_ids:
+            return stats
 
-        total = result.total if result and result.total is not None else 0
-        completed = result.completed if result and result.completed is not None else 0
+        rows = (
+            self.session.query(UserStats.user_id, UserStats.completed_count, UserStats.assigned_count)
+            .filter(UserStats.user_id.in_(user_ids))
+            .all()
+        )
 
-        return (completed, total)
+        for row in rows:
+            stats[row.user_id] = (row.completed_count, row.assigned_count)
+        return stats
 
     def _get_global_completion_rate(self) -> float:
         """
@@ -60,15 +55,8 @@ class UserCompletionRateCalculator:
 
         result = (
             self.session.query(
-                func.count(TaskAssignment.id).label("total"),
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (TaskAssignment.status == 'completed', 1),
-                            else_=0
-                        )
-                    ), 0
-                ).label("completed")
+                func.coalesce(func.sum(UserStats.assigned_count), 0).label("total"),
+                func.coalesce(func.sum(UserStats.completed_count), 0).label("completed")
             )
             .first()
         )
@@ -85,12 +73,23 @@ class UserCompletionRateCalculator:
         Calculate the Bayesian-adjusted completion rate for a given user.
         Returns: A percentage value rounded to one decimal place.
         """
-        completed, assigned = self._get_user_stats(user_id)
+        return self.calculate_rates([user_id])[user_id]
+
+    def calculate_rates(self, user_ids: Iterable[int]) -> Dict[int, float]:
+        """
+        Calculate Bayesian-adjusted completion rates for many users at once:
+        one grouped query for the user statistics plus the cached global rate.
+        Returns: {user_id: percentage rounded to one decimal place}
+        """
+        stats = self._get_user_stats(user_ids)
+        if not stats:
+            return {}
         global_rate = self._get_global_completion_rate()
         m = self.min_tasks
 
-        numerator = completed + m * global_rate
-        denominator = assigned + m
-        bayesian_rate = numerator / denominator
-
-        return round(bayesian_rate * 100, 1)
+        rates = {}
+        for user_id, (completed, assigned) in stats.items():
+            numerator = completed + m * global_rate
+            denominator = assigned + m
+            rates[user_id] = round(numerator / denominator * 100, 1)
+        return rates
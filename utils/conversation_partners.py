@@ -0,0 +1,118 @@
+"""
+Conversation partners per user.
+
+conv_partners:{user_id} holds the ids of everyone the user has an active
+(non-archived) conversation with, so presence fan-out is one SMEMBERS
+instead of a scan of the user's conversations. A missing set is rebuilt
+from the database on first read. Conversation writes update both users'
+sets after commit, but only sets that already exist, so a partial set is
+never created.
+"""
+from flask import current_app
+from sqlalchemy import and_, or_
+from models import db
+from models.conversation import Conversation
+import logging
+
+logger = logging.getLogger(__name__)
+
+PARTNERS_KEY = "conv_partners:{user_id}"
+
+# Marks a loaded set with no partners, since Redis drops empty sets
+EMPTY_MARKER = "-"
+
+PARTNERS_TTL = 60 * 60 * 24 * 7
+
+# KEYS: both users' sets; ARGV: both user ids, 1 to add / 0 to remove
+_APPLY_PAIR = """
+for i = 1, 2 do
+    if redis.call('EXISTS', KEYS[i]) == 1 then
+        local partner = ARGV[3 - i]
+        if ARGV[3] == '1' then
+            redis.call('SADD', KEYS[i], partner)
+            redis.call('SREM', KEYS[i], ARGV[4])
+        else
+            redis.call('SREM', KEYS[i], partner)
+            if redis.call('SCARD', KEYS[i]) == 0 then
+                redis.call('SADD', KEYS[i], ARGV[4])
+            end
+        end
+    end
+end
+return 1
+"""
+
+
+def _active(*conditions):
+    return db.session.query(Conversation.task_giver, Conversation.task_doer).filter(
+        Conversation.archived.isnot(True), *conditions
+    )
+
+
+def partner_ids(user_id):
+    """Ids (as strings) of the user's active conversation partners."""
+    redis = current_app.redis
+    key = PARTNERS_KEY.format(user_id=user_id)
+    try:
+        members = redis.smembers(key)
+    except Exception as e:
+        logger.error(f"Partner set read failed for user {user_id}: {e}")
+        members = None
+    if members:
+        return members - {EMPTY_MARKER}
+
+    user_id = int(user_id)
+    partners = {
+        str(doer if giver == user_id else giver)
+        for giver, doer in _active(or_(Conversation.task_giver == user_id, Conversation.task_doer == user_id))
+    }
+    try:
+        pipe = redis.pipeline()
+        pipe.delete(key)
+        pipe.sadd(key, *(partners or {EMPTY_MARKER}))
+        pipe.expire(key, PARTNERS_TTL)
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Partner set write failed for user {user_id}: {e}")
+    return partners
+
+
+def refresh_pair(user_a, user_b):
+    """
+    Re-derive whether two users are partners, after a conversation between
+    them was created or archived. Never raises.
+    """
+    try:
+        pair = or_(
+            and_(Conversation.task_giver == user_a, Conversation.task_doer == user_b),
+            and_(Conversation.task_giver == user_b, Conversation.task_doer == user_a),
+        )
+        active = _active(pair).first() is not None
+        current_app.redis.eval(
+            _APPLY_PAIR, 2,
+            PARTNERS_KEY.format(user_id=user_a), PARTNERS_KEY.format(user_id=user_b),
+            user_a, user_b, 1 if active else 0, EMPTY_MARKER
+        )
+    except Exception as e:
+        logger.error(f"Failed to refresh conversation partners {user_a}/{user_b}: {e}")
+
+
+def conversation_participants(conversation_id):
+    """
+    The two user ids of a conversation as strings, or None if it doesn't
+    exist. Cached, as the pair never changes; assignment may swap who is
+    giver and doer, so the order means nothing.
+    """
+    cache = current_app.cache
+    cache_key = f"conversation_participants:{conversation_id}"
+    participants = cache.get(cache_key)
+    if participants:
+        return tuple(participants)
+    row = db.session.query(Conversation.task_giver, Conversation.task_doer).filter(
+        Conversation.id == conversation_id
+    ).first()
+    if not row:
+        return None
+    participants = (str(row.task_giver), str(row.task_doer))
+    cache.set(cache_key, list(participants), timeout=PARTNERS_TTL)
+    return participants
@@ -0,0 +1,81 @@
+"""
+Spatial index of user locations for candidate retrieval.
+
+Every saved location is GEOADDed to one Redis sorted set, so the users
+within a radius of a task come back from a single GEOSEARCH instead of a
+bounding-box scan of user_location. A periodic rebuild from the table
+keeps the set exact (removed or edited rows, missed writes). Lookups
+return None when the index is unavailable so callers can fall back to SQL.
+"""
+from flask import current_app
+from models import db
+from models.user_location import UserLocation
+import logging
+
+logger = logging.getLogger(__name__)
+
+GEO_KEY = "doer_locations"
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def index_location(user_id, latitude, longitude):
+    """Add or move a user in the index. Never raises."""
+    try:
+        current_app.redis.geoadd(GEO_KEY, [longitude, latitude, user_id])
+    except Exception as e:
+        logger.error(f"Failed to index location of user {user_id}: {e}")
+
+
+def nearby_user_ids(latitude, longitude, radius_km, limit=None):
+    """
+    Return [(user_id, distance_km)] within `radius_km`, nearest first,
+    or None if the index is missing or Redis is unreachable.
+    """
+    try:
+        redis = current_app.redis
+        if not redis.exists(GEO_KEY):
+            return None
+        results = redis.geosearch(
+            GEO_KEY, longitude=longitude, latitude=latitude,
+            radius=radius_km, unit='km', sort='ASC', count=limit, withdist=True
+        )
+    except Exception as e:
+        logger.error(f"Location index lookup failed: {e}")
+        return None
+    return [(int(member), float(distance)) for member, distance in results]
+
+
+def rebuild_location_index(batch_size=REBUILD_BATCH_SIZE):
+    """
+    Rebuild the index from user_location into a scratch key and swap it in
+    with RENAME, so readers never see a partial set. Returns the number of
+    users indexed.
+    """
+    redis = current_app.redis
+    scratch_key = f"{GEO_KEY}:rebuild"
+    redis.delete(scratch_key)
+
+    indexed = 0
+    batch = []
+    rows = (
+        db.session.query(UserLocation.user_id, UserLocation.latitude, UserLocation.longitude)
+        .filter(UserLocation.latitude.isnot(None), UserLocation.longitude.isnot(None))
+        .execution_options(yield_per=batch_size)
+    )
+    for user_id, latitude, longitude in rows:
+        # GEOADD rejects latitudes beyond the Web Mercator limits
+        if abs(latitude) > 85.05112878 or abs(longitude) > 180:
+            continue
+        batch.extend([longitude, latitude, user_id])
+        if len(batch) >= batch_size * 3:
+            indexed += redis.geoadd(scratch_key, batch)
+            batch = []
+    if batch:
+        indexed += redis.geoadd(scratch_key, batch)
+
+    if indexed:
+        redis.rename(scratch_key, GEO_KEY)
+    else:
+        redis.delete(GEO_KEY)
+    return indexed
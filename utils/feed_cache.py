@@ -0,0 +1,137 @@
+"""
+Feed cache helpers: canonical query fingerprints, single-flight
+recomputation of cold cache entries and ETag-based conditional GETs.
+"""
+from flask import current_app, request
+from werkzeug.http import quote_etag
+import hashlib
+import json
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Compare-and-delete so a worker never releases a lock it no longer owns
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _canonical(value):
+    """Normalize a parsed argument so equivalent queries serialize identically."""
+    if isinstance(value, (list, tuple, set)):
+        return sorted(_canonical(v) for v in value if v is not None)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def fingerprint(prefix, args):
+    """
+    Build a stable cache key from every parsed argument.
+    Unset arguments are dropped and list values are sorted, so
+    `?category_ids=2&category_ids=1` and `?category_ids=1&category_ids=2`
+    share a key while any difference in filters produces a new one.
+    """
+    canonical = {
+        name: _canonical(value)
+        for name, value in sorted(dict(args).items())
+        if value is not None and value != []
+    }
+    payload = json.dumps(canonical, sort_keys=True, separators=(',', ':'), default=str)
+    digest = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    return f"{prefix}:{digest}"
+
+
+def make_etag(value):
+    """Strong validator: a digest of the canonical JSON of a response body."""
+    payload = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def get_or_compute(cache_key, compute, timeout=300, stale_key=None, stale_timeout=3600,
+                   lock_timeout=10, wait_timeout=2.0, poll_interval=0.05, etag_key=None):
+    """
+    Return the cached value for `cache_key`, computing it at most once across
+    all workers when it is missing.
+
+    The first caller to miss takes a short Redis lock and recomputes. Other
+    callers get the last good value from `stale_key` if one exists, otherwise
+    they poll the cache for up to `wait_timeout` seconds before computing
+    themselves as a last resort.
+
+    With `etag_key`, the value's ETag is stored next to it with the same
+    timeout, so validators never outlive or predate the body they describe.
+    """
+    cache = current_app.cache
+    value = cache.get(cache_key)
+    if value is not None:
+        return value
+
+    redis = current_app.redis
+    lock_key = f"lock:{cache_key}"
+    token = uuid.uuid4().hex
+
+    try:
+        acquired = redis.set(lock_key, token, nx=True, px=int(lock_timeout * 1000))
+    except Exception as e:
+        logger.error(f"Single-flight lock unavailable for {cache_key}: {e}")
+        acquired = True
+        token = None
+
+    if acquired:
+        try:
+            value = compute()
+            cache.set(cache_key, value, timeout=timeout)
+            if etag_key:
+                cache.set(etag_key, make_etag(value), timeout=timeout)
+            if stale_key:
+                cache.set(stale_key, value, timeout=stale_timeout)
+            return value
+        finally:
+            if token:
+                try:
+                    redis.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    logger.error(f"Failed to release single-flight lock {lock_key}: {e}")
+
+    # Another worker is recomputing this entry
+    if stale_key:
+        stale = cache.get(stale_key)
+        if stale is not None:
+            return stale
+
+    deadline = time.monotonic() + wait_timeout
+    while time.monotonic() < deadline:
+        time.sleep(poll_interval)
+        value = cache.get(cache_key)
+        if value is not None:
+            return value
+
+    logger.warning(f"Single-flight wait timed out for {cache_key}; computing locally")
+    return compute()
+
+
+def cached_response(cache_key, compute, timeout=300, stale_key=None):
+    """
+    Serve a cached JSON response with a strong ETag.
+
+    If the client's If-None-Match matches the ETag stored for `cache_key`,
+    a 304 is returned without reading or serializing the body. Otherwise
+    the body comes from `get_or_compute`. Returns a Flask-RESTful
+    (body, status, headers) tuple.
+    """
+    etag_key = f"{cache_key}:etag"
+    etag = current_app.cache.get(etag_key)
+    if etag is not None and request.if_none_match.contains(etag):
+        return '', 304, {'ETag': quote_etag(etag)}
+
+    value = get_or_compute(
+        cache_key, compute, timeout=timeout, stale_key=stale_key, etag_key=etag_key
+    )
+    # Hash what is actually sent: a stale fallback has no stored ETag
+    return value, 200, {'ETag': quote_etag(make_etag(value))}
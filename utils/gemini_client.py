@@ -0,0 +1,237 @@
+"""
+Shared client for Gemini generateContent calls.
+
+- Responses are cached in Redis under a hash of the normalized prompt,
+  model and generation config, so retries and reposted or edited tasks
+  with the same text don't pay for another round-trip.
+- Each process keeps one pooled requests.Session (keep-alive, TLS reuse).
+- Calls across every Celery worker share a token bucket (requests per
+  second with a burst) and a cap on in-flight requests, both kept in Redis
+  and updated by Lua scripts so each check is atomic.
+
+Without Redis (e.g. tests against a local stub server) the client still
+works, with no cache and no shared limits.
+"""
+from flask import current_app
+from requests.adapters import HTTPAdapter
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+DEFAULT_MODEL = "gemini-2.0-flash"
+
+CACHE_KEY_PREFIX = "gemini:response:"
+BUCKET_KEY = "gemini:bucket"
+INFLIGHT_KEY = "gemini:inflight"
+
+# Refill the bucket and take one token if available.
+# Returns 0 when granted, otherwise the milliseconds until a token is due.
+_TAKE_TOKEN = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+return wait
+"""
+
+# Semaphore as a sorted set of lease ids scored by expiry, so slots held by
+# crashed workers free themselves. Returns 1 when a slot was taken.
+_ACQUIRE_SLOT = """
+local limit = tonumber(ARGV[1])
+local now = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) >= limit then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[3]), ARGV[4])
+redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[3])) + 60)
+return 1
+"""
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class GeminiError(Exception):
+    """The request failed, was rate limited past `max_wait`, or the reply had no text."""
+
+
+def _get_session(pool_size=10):
+    """The process-wide pooled session."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so formatting-only differences share a cache entry."""
+    return re.sub(r"\s+", " ", prompt or "").strip()
+
+
+def cache_key(model, prompt, generation_config=None):
+    material = json.dumps(
+        [model, normalize_prompt(prompt), generation_config or {}],
+        sort_keys=True, separators=(",", ":")
+    )
+    return CACHE_KEY_PREFIX + hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class GeminiClient:
+    def __init__(self, api_key, base_url=DEFAULT_BASE_URL, model=DEFAULT_MODEL, redis=None,
+                 cache_ttl=60 * 60 * 24, rate_per_second=5.0, burst=10, max_concurrency=4,
+                 max_wait=10.0, timeout=20):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.redis = redis
+        self.cache_ttl = cache_ttl
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.session = _get_session(max(max_concurrency, 1))
+
+    def generate_text(self, prompt, generation_config=None, use_cache=True):
+        """
+        Return the text of the first candidate for `prompt`.
+        Raises GeminiError on HTTP errors, limiter timeouts and empty replies.
+        """
+        key = cache_key(self.model, prompt, generation_config)
+        if use_cache:
+            cached = self._cache_get(key)
+            if cached is not None:
+                logger.debug(f"Gemini cache hit {key}")
+                return cached
+
+        payload = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+        if generation_config:
+            payload["generationConfig"] = generation_config
+
+        lease = self._acquire()
+        try:
+            response = self.session.post(
+                f"{self.base_url}/models/{self.model}:generateContent",
+                headers={"Content-Type": "application/json", "x-goog-api-key": self.api_key},
+                json=payload,
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            raise GeminiError(f"Gemini request failed: {e}") from e
+        finally:
+            self._release(lease)
+
+        if response.status_code != 200:
+            raise GeminiError(f"Gemini API error {response.status_code}: {response.text[:500]}")
+        try:
+            text = response.json()["candidates"][0]["content"]["parts"][0]["text"]
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise GeminiError(f"Unexpected Gemini response: {response.text[:500]}") from e
+
+        if use_cache:
+            self._cache_set(key, text)
+        return text
+
+    def _cache_get(self, key):
+        if self.redis is None:
+            return None
+        try:
+            value = self.redis.get(key)
+        except Exception as e:
+            logger.warning(f"Gemini cache read failed: {e}")
+            return None
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def _cache_set(self, key, text):
+        if self.redis is None:
+            return
+        try:
+            self.redis.set(key, text, ex=self.cache_ttl)
+        except Exception as e:
+            logger.warning(f"Gemini cache write failed: {e}")
+
+    def _acquire(self):
+        """
+        Wait for a bucket token and an in-flight slot, up to `max_wait`
+        seconds. Returns the slot's lease id, or None without Redis.
+        """
+        if self.redis is None:
+            return None
+        deadline = time.monotonic() + self.max_wait
+        try:
+            while True:
+                wait_ms = self.redis.eval(
+                    _TAKE_TOKEN, 1, BUCKET_KEY, self.rate_per_second, self.burst, time.time()
+                )
+                if not wait_ms:
+                    break
+                self._sleep_until(deadline, wait_ms / 1000.0, "rate limit")
+
+            lease = uuid.uuid4().hex
+            while not self.redis.eval(
+                _ACQUIRE_SLOT, 1, INFLIGHT_KEY, self.max_concurrency, time.time(), self.timeout + 5, lease
+            ):
+                self._sleep_until(deadline, 0.05, "concurrency limit")
+            return lease
+        except GeminiError:
+            raise
+        except Exception as e:
+            # Limiter state is best effort; an unreachable Redis must not block calls
+            logger.warning(f"Gemini limiter unavailable, calling without it: {e}")
+            return None
+
+    def _release(self, lease):
+        if lease is None:
+            return
+        try:
+            self.redis.zrem(INFLIGHT_KEY, lease)
+        except Exception as e:
+            logger.warning(f"Failed to release Gemini slot {lease}: {e}")
+
+    @staticmethod
+    def _sleep_until(deadline, seconds, reason):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise GeminiError(f"Gave up waiting for the Gemini {reason}")
+        time.sleep(min(seconds, remaining))
+
+
+def gemini_client():
+    """Client configured from the app config, sharing the app's Redis connection."""
+    config = current_app.config
+    return GeminiClient(
+        api_key=config.get("GEMINI_API_KEY") or os.getenv("GEMINI_API_KEY"),
+        base_url=config.get("GEMINI_BASE_URL", DEFAULT_BASE_URL),
+        model=config.get("GEMINI_MODEL", DEFAULT_MODEL),
+        redis=getattr(current_app, "redis", None),
+        cache_ttl=config.get("GEMINI_CACHE_TTL", 60 * 60 * 24),
+        rate_per_second=config.get("GEMINI_RATE_PER_SECOND", 5.0),
+        burst=config.get("GEMINI_BURST", 10),
+        max_concurrency=config.get("GEMINI_MAX_CONCURRENCY", 4),
+    )
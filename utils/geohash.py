@@ -0,0 +1,140 @@
+import math
+
+# Standard geohash alphabet (no a, i, l, o)
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE_MAP = {c: i for i, c in enumerate(_BASE32)}
+
+# Precision stored on task locations (~4.8m x 4.8m cells)
+STORED_PRECISION = 9
+
+KM_PER_DEGREE = 111.32
+
+
+def encode(latitude, longitude, precision=STORED_PRECISION):
+    """
+    Encode a latitude/longitude pair into a geohash string.
+    Args:
+        latitude, longitude: Coordinates in decimal degrees
+        precision: Number of base32 characters to emit
+    Returns:
+        Geohash string of length `precision`
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    latitude = float(latitude)
+    longitude = float(longitude)
+
+    chars = []
+    bit = 0
+    ch = 0
+    even = True  # Geohash interleaves bits starting with longitude
+
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= mid:
+                ch |= 1 << (4 - bit)
+                lon_range[0] = mid
+            else:
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                ch |= 1 << (4 - bit)
+                lat_range[0] = mid
+            else:
+                lat_range[1] = mid
+
+        even = not even
+        if bit < 4:
+            bit += 1
+        else:
+            chars.append(_BASE32[ch])
+            bit = 0
+            ch = 0
+
+    return "".join(chars)
+
+
+def decode_bbox(geohash):
+    """
+    Decode a geohash into its bounding box.
+    Returns: (lat_min, lat_max, lon_min, lon_max)
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+
+    for c in geohash:
+        value = _DECODE_MAP[c]
+        for shift in range(4, -1, -1):
+            bit_set = (value >> shift) & 1
+            target = lon_range if even else lat_range
+            mid = (target[0] + target[1]) / 2
+            if bit_set:
+                target[0] = mid
+            else:
+                target[1] = mid
+            even = not even
+
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+
+def cell_size_degrees(precision):
+    """Return the (lat_degrees, lon_degrees) spanned by a cell at `precision`."""
+    total_bits = precision * 5
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lon_bits)
+
+
+def precision_for_radius(latitude, radius_km):
+    """
+    Pick the finest precision whose cells are at least `radius_km` in both
+    directions, so that a cell and its eight neighbours cover the circle.
+    Returns None when the radius is too large for any cell to cover.
+    """
+    # Use the latitude furthest from the equator the circle can reach,
+    # where cells are narrowest.
+    worst_lat = min(abs(float(latitude)) + radius_km / KM_PER_DEGREE, 89.9)
+    cos_lat = math.cos(math.radians(worst_lat))
+
+    for precision in range(STORED_PRECISION, 0, -1):
+        lat_deg, lon_deg = cell_size_degrees(precision)
+        height_km = lat_deg * KM_PER_DEGREE
+        width_km = lon_deg * KM_PER_DEGREE * cos_lat
+        if height_km >= radius_km and width_km >= radius_km:
+            return precision
+    return None
+
+
+def cells_covering(latitude, longitude, radius_km):
+    """
+    Return the set of geohash prefixes whose cells cover a circle of
+    `radius_km` around the given point, or None if no useful cover exists.
+    """
+    precision = precision_for_radius(latitude, radius_km)
+    if precision is None:
+        return None
+
+    center = encode(latitude, longitude, precision)
+    lat_min, lat_max, lon_min, lon_max = decode_bbox(center)
+    center_lat = (lat_min + lat_max) / 2
+    center_lon = (lon_min + lon_max) / 2
+    lat_step = lat_max - lat_min
+    lon_step = lon_max - lon_min
+
+    cells = set()
+    for d_lat in (-lat_step, 0, lat_step):
+        neighbour_lat = center_lat + d_lat
+        if neighbour_lat < -90 or neighbour_lat > 90:
+            continue
+        for d_lon in (-lon_step, 0, lon_step):
+            neighbour_lon = center_lon + d_lon
+            # Wrap around the antimeridian
+            if neighbour_lon < -180:
+                neighbour_lon += 360
+            elif neighbour_lon > 180:
+                neighbour_lon -= 360
+            cells.add(encode(neighbour_lat, neighbour_lon, precision))
+    return cells
@@ -1,4 +1,5 @@
 import math
+from sqlalchemy import Float, cast, func, literal
 
 def haversine_distance_km(lat1, lon1, lat2, lon2):
     """
@@ -24,3 +25,30 @@ def haversine_distance_km(lat1, lon1, lat2, lon2):
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
 
     return R * c
+
+
+def haversine_distance_sql(lat_column, lon_column, lat, lon):
+    """
+    Build a SQL expression computing the Haversine distance in kilometers
+    between a pair of coordinate columns and a fixed point.
+    Args:
+        lat_column, lon_column: SQLAlchemy column expressions (decimal degrees)
+        lat, lon: Reference point in decimal degrees
+    Returns:
+        SQLAlchemy expression usable in filters and ORDER BY
+    """
+    R = 6371.0
+
+    # Work in double precision even when the columns are NUMERIC
+    lat_column = cast(lat_column, Float)
+    lon_column = cast(lon_column, Float)
+
+    dlat = func.radians(lat_column - lat)
+    dlon = func.radians(lon_column - lon)
+    a = (
+        func.power(func.sin(dlat / 2.0), 2) +
+        math.cos(math.radians(lat)) * func.cos(func.radians(lat_column)) *
+        func.power(func.sin(dlon / 2.0), 2)
+    )
+    # least() guards asin against rounding slightly above 1
+    return 2 * R * func.asin(func.sqrt(func.least(a, literal(1.0))))
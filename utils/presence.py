@@ -0,0 +1,209 @@
+"""
+User presence.
+
+Every socket connection is a member of its user's sorted set of sids,
+scored by the time its lease expires. The socket server renews the leases
+of its own connections on a heartbeat (releasing any it no longer holds),
+so connections of a server that dies simply age out. A user is online while any lease is live, which makes
+several devices per user work naturally.
+
+Connects and disconnects only touch Redis. Online/offline transitions are
+recorded in a dirty hash, and a periodic job writes them to users.status
+and users.last_seen in one statement per batch. A reconnect storm is then
+a few Redis calls per socket instead of a database commit each.
+"""
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import bindparam, update
+from models import db
+from models.user import User
+from extensions import socketio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+SIDS_KEY = "presence:sids:{user_id}"
+SID_USER_KEY = "presence:sid:{sid}"
+ONLINE_KEY = "online_users"
+DIRTY_KEY = "presence:dirty"
+
+# Seconds a connection stays live without a heartbeat
+DEFAULT_TTL = 90
+
+# Connections held by this process, renewed by `renew_local_leases`
+_local_sids = {}
+
+# Add a lease; returns 1 if the user had no live connection before
+_CONNECT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[3])
+local was_offline = redis.call('ZCARD', KEYS[1]) == 0
+redis.call('ZADD', KEYS[1], ARGV[4], ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[5])
+local added = redis.call('SADD', KEYS[3], ARGV[2]) == 1
+if was_offline or added then
+    redis.call('HSET', KEYS[4], ARGV[2], 'online')
+end
+if was_offline then
+    return 1
+end
+return 0
+"""
+
+# Drop a lease (ARGV[1], may be empty) and expired ones; if none remain the
+# user goes offline. Returns {went_offline, most recent remaining sid or false}
+_RELEASE = """
+if ARGV[1] ~= '' then
+    redis.call('ZREM', KEYS[1], ARGV[1])
+    redis.call('DEL', KEYS[2])
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[2])
+local latest = redis.call('ZREVRANGE', KEYS[1], 0, 0)[1] or false
+if latest then
+    return {0, latest}
+end
+if redis.call('SREM', KEYS[3], ARGV[3]) == 1 then
+    redis.call('HSET', KEYS[4], ARGV[3], 'offline:' .. ARGV[2])
+    return {1, false}
+end
+return {0, false}
+"""
+
+_TAKE_DIRTY = """
+local entries = redis.call('HGETALL', KEYS[1])
+redis.call('DEL', KEYS[1])
+return entries
+"""
+
+
+def _ttl():
+    return current_app.config.get("PRESENCE_TTL", DEFAULT_TTL)
+
+
+def connect(user_id, sid):
+    """Register a connection. Returns True if the user just came online."""
+    now = time.time()
+    ttl = _ttl()
+    _local_sids[sid] = str(user_id)
+    came_online = current_app.redis.eval(
+        _CONNECT, 4,
+        SIDS_KEY.format(user_id=user_id), SID_USER_KEY.format(sid=sid), ONLINE_KEY, DIRTY_KEY,
+        sid, user_id, now, now + ttl, ttl
+    )
+    return bool(came_online)
+
+
+def user_for_sid(sid):
+    return current_app.redis.get(SID_USER_KEY.format(sid=sid))
+
+
+def _release(user_id, sid=""):
+    went_offline, latest = current_app.redis.eval(
+        _RELEASE, 4,
+        SIDS_KEY.format(user_id=user_id), SID_USER_KEY.format(sid=sid), ONLINE_KEY, DIRTY_KEY,
+        sid, time.time(), user_id
+    )
+    return bool(went_offline), latest or None
+
+
+def disconnect(sid):
+    """
+    Drop a connection. Returns (user_id, went_offline, remaining_sid);
+    user_id is None for an unknown sid.
+    """
+    user_id = _local_sids.pop(sid, None) or user_for_sid(sid)
+    if not user_id:
+        return None, False, None
+    went_offline, remaining_sid = _release(user_id, sid)
+    return user_id, went_offline, remaining_sid
+
+
+def renew_local_leases():
+    """
+    Extend the lease of every connection held by this process. Connections
+    the socket server no longer has (a disconnect that was missed) are
+    released instead; returns the users that went offline because of that.
+    """
+    if not _local_sids:
+        return []
+    manager = socketio.server.manager
+    went_offline = []
+    for sid in [sid for sid in list(_local_sids) if not manager.is_connected(sid, '/')]:
+        user_id, offline, _ = disconnect(sid)
+        if offline:
+            went_offline.append(user_id)
+
+    now = time.time()
+    ttl = _ttl()
+    pipe = current_app.redis.pipeline(transaction=False)
+    for sid, user_id in list(_local_sids.items()):
+        user_key = SIDS_KEY.format(user_id=user_id)
+        # XX: a lease released meanwhile is not brought back
+        pipe.zadd(user_key, {sid: now + ttl}, xx=True)
+        pipe.expire(user_key, ttl)
+        pipe.expire(SID_USER_KEY.format(sid=sid), ttl)
+    pipe.execute()
+    return went_offline
+
+
+def online_user_ids(user_ids):
+    """The subset of `user_ids` (as strings) with a live connection."""
+    user_ids = [str(user_id) for user_id in user_ids]
+    if not user_ids:
+        return set()
+    now = time.time()
+    pipe = current_app.redis.pipeline(transaction=False)
+    for user_id in user_ids:
+        pipe.zcount(SIDS_KEY.format(user_id=user_id), now, "+inf")
+    return {user_id for user_id, live in zip(user_ids, pipe.execute()) if live}
+
+
+def sweep_expired():
+    """Take users whose every lease has expired offline. Returns how many."""
+    went_offline = 0
+    for user_id in current_app.redis.sscan_iter(ONLINE_KEY, count=500):
+        offline, _ = _release(user_id)
+        went_offline += offline
+    return went_offline
+
+
+def flush_presence():
+    """
+    Write pending online/offline transitions to users.status/last_seen.
+    Returns the number of users written; entries are put back on failure.
+    """
+    redis = current_app.redis
+    entries = redis.eval(_TAKE_DIRTY, 1, DIRTY_KEY)
+    states = dict(zip(entries[::2], entries[1::2]))
+    if not states:
+        return 0
+
+    users = User.__table__
+    online = [{'user_id': int(user_id)} for user_id, state in states.items() if state == 'online']
+    offline = [
+        {'user_id': int(user_id), 'last_seen': datetime.utcfromtimestamp(float(state.split(':', 1)[1]))}
+        for user_id, state in states.items() if state != 'online'
+    ]
+    try:
+        if online:
+            db.session.execute(
+                update(users).where(users.c.id == bindparam('user_id')).values(status='online'),
+                online
+            )
+        if offline:
+            db.session.execute(
+                update(users).where(users.c.id == bindparam('user_id'))
+                .values(status='offline', last_seen=bindparam('last_seen')),
+                offline
+            )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        # Newer transitions recorded meanwhile win over the ones put back
+        pipe = redis.pipeline(transaction=False)
+        for user_id, state in states.items():
+            pipe.hsetnx(DIRTY_KEY, user_id, state)
+        pipe.execute()
+        raise
+    return len(states)
@@ -1,8 +1,22 @@
+"""
+Queue of tasks waiting for batch recommendation.
+
+Task ids live in a sorted set scored by enqueue time, so the worker can pop
+the oldest ids atomically with ZPOPMIN (no window between read and delete in
+which new ids are lost) and the age of the oldest entry is the queue lag.
+Each run's figures are written to a metrics hash for monitoring.
+"""
 from flask import current_app
 from logger import logging
+import time
 
 logger = logging.getLogger(__name__)
-BATCH_KEY = "duotasks:recommendation:batch"
+
+QUEUE_KEY = "duotasks:recommendation:queue"
+METRICS_KEY = "duotasks:recommendation:queue:metrics"
+
+# Plain set used before the sorted-set queue; drained into it on every run
+LEGACY_BATCH_KEY = "duotasks:recommendation:batch"
 
 def add_task_to_batch(task_id):
     try:
@@ -11,10 +25,56 @@ def add_task_to_batch(task_id):
             redis_client = current_app.redis
             if not redis_client:
                 raise RuntimeError("Redis client not available.")
-           
-            redis_client.sadd(BATCH_KEY, task_id)
+
+            # NX keeps the original enqueue time if the task is already queued
+            redis_client.zadd(QUEUE_KEY, {task_id: time.time()}, nx=True)
             logger.info(f"Task {task_id} added to batch queue.")
-        
+
     except Exception as exc:
         logger.error(f"Error in recommending users for task {task_id}: {exc}")
         raise exc
+
+
+def migrate_legacy_batch(redis_client, chunk_size=1000):
+    """Move ids left in the legacy set into the queue. Returns how many moved."""
+    moved = 0
+    while True:
+        task_ids = redis_client.spop(LEGACY_BATCH_KEY, chunk_size)
+        if not task_ids:
+            return moved
+        now = time.time()
+        redis_client.zadd(QUEUE_KEY, {task_id: now for task_id in task_ids}, nx=True)
+        moved += len(task_ids)
+
+
+def pop_batch(redis_client, count):
+    """Atomically remove and return up to `count` of the oldest [(task_id, enqueued_at)]."""
+    return redis_client.zpopmin(QUEUE_KEY, count)
+
+
+def requeue(redis_client, entries):
+    """Put popped [(task_id, enqueued_at)] back with their original enqueue times."""
+    if entries:
+        redis_client.zadd(QUEUE_KEY, {task_id: enqueued_at for task_id, enqueued_at in entries}, nx=True)
+
+
+def record_run(redis_client, drained, elapsed):
+    """Store backpressure figures for the run that just finished."""
+    now = time.time()
+    pipe = redis_client.pipeline()
+    pipe.zcard(QUEUE_KEY)
+    pipe.zrange(QUEUE_KEY, 0, 0, withscores=True)
+    depth, oldest = pipe.execute()
+    metrics = {
+        'depth': depth,
+        'oldest_lag_seconds': round(now - oldest[0][1], 3) if oldest else 0,
+        'drained_last_run': drained,
+        'last_run_seconds': round(elapsed, 3),
+        'last_run_at': int(now),
+    }
+    pipe = redis_client.pipeline()
+    pipe.hset(METRICS_KEY, mapping=metrics)
+    pipe.hincrby(METRICS_KEY, 'drained_total', drained)
+    pipe.execute()
+    return metrics
+
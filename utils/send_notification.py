@@ -1,5 +1,5 @@
 from flask import current_app
-from extensions import socketio
+from extensions import socketio, user_room
 from models import db
 from models.notification import Notification
 from utils.send_sms import SendSms
@@ -32,19 +32,15 @@ class Notify:
 
             with current_app.app_context():
                 user_details = self._get_user_details(self.sender_id)
-                receiver_sid = current_app.cache.get(f"user_sid:{self.user_id}")
-
-                if receiver_sid:
-                    socketio.emit('new_notification', {
-                        'notification_id': notification.id if notification else None,
-                        'user_id': self.user_id,
-                        'user_data': user_details,
-                        'message': self.message,
-                        'source': self.source
-                    }, room=receiver_sid)
-                    logger.info(f"Notification sent to user {self.user_id} on socket {receiver_sid}")
-                else:
-                    logger.info(f"User {self.user_id} not online to receive notification")
+                # Reaches every connected device of the user, on any server
+                socketio.emit('new_notification', {
+                    'notification_id': notification.id if notification else None,
+                    'user_id': self.user_id,
+                    'user_data': user_details,
+                    'message': self.message,
+                    'source': self.source
+                }, room=user_room(self.user_id))
+                logger.info(f"Notification sent to user {self.user_id}")
 
                 # SMS fallback if important
                 if self.is_important:
@@ -65,7 +61,46 @@ class Notify:
         except Exception as e:
             logger.error(f"Error sending notification: {e}", exc_info=True)
 
-    def _get_user_details(self, user_id):
+    @classmethod
+    def post_many(cls, notifications, source, sender_id=None):
+        """
+        Deliver many (user_id, message) notifications at once: one INSERT
+        and commit for all rows, one emit per notification (to its receiver's
+        room) and one query for their push subscriptions. Never raises.
+        """
+        if not notifications:
+            return
+        try:
+            rows = [
+                Notification(user_id=user_id, message=message, source=source, sender_id=sender_id)
+                for user_id, message in notifications
+            ]
+            db.session.add_all(rows)
+            db.session.commit()
+
+            user_ids = list(dict.fromkeys(user_id for user_id, _ in notifications))
+            user_details = cls._get_user_details(sender_id) if sender_id is not None else None
+            for row in rows:
+                socketio.emit('new_notification', {
+                    'notification_id': row.id,
+                    'user_id': str(row.user_id),
+                    'user_data': user_details,
+                    'message': row.message,
+                    'source': source
+                }, room=user_room(row.user_id))
+            logger.info(f"Stored and emitted {len(rows)} notifications")
+
+            subscriptions = {}
+            for sub in PushSubscription.query.filter(PushSubscription.user_id.in_(user_ids)):
+                subscriptions.setdefault(sub.user_id, []).append(sub)
+            for user_id, message in notifications:
+                for sub in subscriptions.get(user_id, []):
+                    SendPush(sub.token, sub.platform, "New notification", message).send_push()
+        except Exception as e:
+            logger.error(f"Error sending notifications: {e}", exc_info=True)
+
+    @staticmethod
+    def _get_user_details(user_id):
         from models.user import User
         user = User.query.filter_by(id=user_id).first()
         if not user:
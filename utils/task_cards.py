@@ -0,0 +1,166 @@
+"""
+Task card read model.
+
+A task card is the flat, denormalized view of a task that the feed
+endpoints render: the task columns plus its location, categories, images
+and a summary of the poster. Cards are stored in Redis as one JSON
+document per task and rebuilt from the database after every write that
+touches them, so feed queries only select ids and sort keys and then read
+the cards in a single MGET instead of eager-loading the joins per request.
+"""
+from flask import current_app
+from sqlalchemy.orm import joinedload, selectinload
+from datetime import datetime
+from models.task import Task
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+CARD_KEY_PREFIX = "task_card:"
+
+# Writes refresh cards explicitly; the TTL only bounds memory for idle tasks
+CARD_TTL = 60 * 60 * 24
+
+# Same format SerializerMixin.to_dict uses for datetime columns
+SERIALIZER_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def card_key(task_id):
+    return f"{CARD_KEY_PREFIX}{task_id}"
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _decimal(value):
+    return str(value) if value is not None else None
+
+
+def format_datetime(value, fmt):
+    """Re-render an ISO timestamp stored on a card, e.g. as `%Y-%m-%d`."""
+    if not value:
+        return None
+    return datetime.fromisoformat(value).strftime(fmt)
+
+
+def build_card(task):
+    """
+    Flatten a task and its relationships into a JSON-safe card.
+    Datetimes are stored as ISO strings and decimals as strings so every
+    endpoint can render exactly the representation it exposed before.
+    """
+    location = task.location
+    return {
+        'id': task.id,
+        'user_id': task.user_id,
+        'title': task.title,
+        'description': task.description,
+        'work_mode': task.work_mode,
+        'budget': _decimal(task.budget),
+        'status': task.status,
+        'schedule_type': task.schedule_type,
+        'specific_date': _iso(task.specific_date),
+        'deadline_date': _iso(task.deadline_date),
+        'preferred_time': task.preferred_time,
+        'created_at': _iso(task.created_at),
+        'updated_at': _iso(task.updated_at),
+        'location': {
+            'id': location.id,
+            'latitude': _decimal(location.latitude),
+            'longitude': _decimal(location.longitude),
+            'country': location.country,
+            'state': location.state,
+            'city': location.city,
+            'area': location.area,
+        } if location else None,
+        'categories': [{'id': c.id, 'name': c.name} for c in task.categories],
+        'images': [{'id': img.id, 'image_url': img.image_url} for img in task.images],
+        'user': {
+            'id': task.user.id,
+            'name': task.user.name,
+            'image': task.user.image,
+        } if task.user else None,
+    }
+
+
+def _load_cards(task_ids):
+    """Build cards for `task_ids` straight from the database."""
+    tasks = Task.query.options(
+        joinedload(Task.location),
+        joinedload(Task.user),
+        selectinload(Task.categories),
+        selectinload(Task.images)
+    ).filter(Task.id.in_(task_ids)).all()
+    return {task.id: build_card(task) for task in tasks}
+
+
+def _store(cards, stale_ids=()):
+    pipe = current_app.redis.pipeline(transaction=False)
+    for task_id, card in cards.items():
+        pipe.set(card_key(task_id), json.dumps(card), ex=CARD_TTL)
+    for task_id in stale_ids:
+        pipe.delete(card_key(task_id))
+    pipe.execute()
+
+
+def get_cards(task_ids):
+    """
+    Return {task_id: card} for the given ids.
+    Cards missing from Redis are rebuilt with one query and written back.
+    Ids whose task no longer exists are absent from the result.
+    """
+    ids = list(dict.fromkeys(int(task_id) for task_id in task_ids))
+    if not ids:
+        return {}
+
+    try:
+        raw = current_app.redis.mget([card_key(task_id) for task_id in ids])
+    except Exception as e:
+        logger.error(f"Task card read failed, rebuilding from database: {e}")
+        raw = [None] * len(ids)
+
+    cards = {}
+    missing = []
+    for task_id, value in zip(ids, raw):
+        if value is None:
+            missing.append(task_id)
+        else:
+            cards[task_id] = json.loads(value)
+
+    if missing:
+        rebuilt = _load_cards(missing)
+        cards.update(rebuilt)
+        try:
+            _store(rebuilt)
+        except Exception as e:
+            logger.error(f"Task card write-back failed: {e}")
+
+    return cards
+
+
+def refresh_cards(task_ids):
+    """
+    Rebuild the cards for `task_ids` from committed data.
+    Call after commit whenever a task, its location, categories, images or
+    poster change. Cards of hard-deleted tasks are removed.
+    """
+    ids = list(dict.fromkeys(int(task_id) for task_id in task_ids))
+    if not ids:
+        return
+    try:
+        cards = _load_cards(ids)
+        _store(cards, stale_ids=[task_id for task_id in ids if task_id not in cards])
+    except Exception as e:
+        logger.error(f"Task card refresh failed for {ids}: {e}")
+
+
+def refresh_user_cards(user_id):
+    """Rebuild every card that embeds this user's poster summary."""
+    try:
+        task_ids = [row.id for row in Task.query.with_entities(Task.id).filter(Task.user_id == user_id)]
+    except Exception as e:
+        logger.error(f"Task card lookup failed for user {user_id}: {e}")
+        return
+    refresh_cards(task_ids)
@@ -0,0 +1,216 @@
+"""
+Local task categorizer.
+
+A nearest-centroid model over hashed word unigrams and bigrams, weighted
+by TF-IDF. Training reads the existing task -> category assignments, and
+each category's centroid is the normalized mean of its tasks' vectors.
+A task is classified by cosine similarity to every centroid through an
+inverted index, which takes microseconds. The result is only trusted when
+the best match is both close enough and clearly ahead of the runner-up;
+otherwise callers fall back to the LLM.
+
+The trained model is stored in Redis as JSON, so one periodic job trains
+it and every worker reads it:
+
+    python -m utils.task_classifier   # offline accuracy check on synthetic data
+"""
+from typing import NamedTuple, Optional
+from flask import current_app
+from models import db
+from models.task import Task, task_categories
+from models.category import Category
+import json
+import logging
+import math
+import time
+import zlib
+import numpy as np
+from utils.candidate_ranking import tokenize
+
+logger = logging.getLogger(__name__)
+
+MODEL_KEY = "task_classifier:model"
+
+# Hashed feature space; collisions only blur centroids slightly
+N_FEATURES = 2 ** 14
+
+# Strongest features kept per centroid, which bounds the stored model size
+CENTROID_FEATURES = 400
+
+# Categories with fewer labelled tasks are left to the LLM
+MIN_EXAMPLES = 5
+
+# A prediction is confident when its cosine is at least MIN_SIMILARITY and
+# beats the runner-up by at least MIN_MARGIN
+MIN_SIMILARITY = 0.2
+MIN_MARGIN = 0.1
+
+# Seconds a worker keeps the model in memory before re-reading Redis
+LOCAL_MODEL_TTL = 300
+
+_local = {'classifier': None, 'loaded_at': 0.0}
+
+
+class Prediction(NamedTuple):
+    category_id: int
+    name: str
+    similarity: float
+    margin: float
+
+
+def features(text):
+    """Hashed unigram and bigram ids of `text`, with repeats."""
+    tokens = tokenize(text)
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    return [zlib.crc32(gram.encode('utf-8')) % N_FEATURES for gram in grams]
+
+
+def build_model(examples, categories, min_examples=MIN_EXAMPLES):
+    """
+    Train from `examples`, an iterable of (text, category_id), with
+    `categories` mapping category_id -> name. Returns the model as a
+    JSON-serializable dict.
+    """
+    rows = [(features(text), category_id) for text, category_id in examples]
+    counts = {}
+    for _, category_id in rows:
+        counts[category_id] = counts.get(category_id, 0) + 1
+    kept = sorted(c for c, n in counts.items() if n >= min_examples and c in categories)
+    rows = [(ids, category_id) for ids, category_id in rows if category_id in kept and ids]
+
+    document_frequency = np.zeros(N_FEATURES)
+    for ids, _ in rows:
+        document_frequency[np.unique(ids)] += 1
+    idf = np.log((1.0 + len(rows)) / (1.0 + document_frequency)) + 1.0
+
+    position = {category_id: i for i, category_id in enumerate(kept)}
+    sums = np.zeros((len(kept), N_FEATURES))
+    for ids, category_id in rows:
+        unique, tf = np.unique(ids, return_counts=True)
+        weights = np.log1p(tf) * idf[unique]
+        sums[position[category_id], unique] += weights / np.linalg.norm(weights)
+
+    centroids = {}
+    for category_id, centroid in zip(kept, sums):
+        top = np.argsort(-centroid)[:CENTROID_FEATURES]
+        top = top[centroid[top] > 0]
+        weights = centroid[top] / np.linalg.norm(centroid[top])
+        centroids[str(category_id)] = [top.tolist(), np.round(weights, 5).tolist()]
+
+    seen = np.flatnonzero(document_frequency)
+    return {
+        'trained_at': int(time.time()),
+        'examples': len(rows),
+        'categories': {str(c): categories[c] for c in kept},
+        'default_idf': float(idf.max()),
+        'idf': [seen.tolist(), np.round(idf[seen], 5).tolist()],
+        'centroids': centroids,
+    }
+
+
+class TaskClassifier:
+    """Prediction side of a model from `build_model`, with an inverted index."""
+
+    def __init__(self, model):
+        self.categories = {int(c): name for c, name in model['categories'].items()}
+        self.default_idf = model['default_idf']
+        self.idf = dict(zip(*model['idf']))
+        self.index = {}
+        for category_id, (ids, weights) in model['centroids'].items():
+            for feature, weight in zip(ids, weights):
+                self.index.setdefault(feature, []).append((int(category_id), weight))
+
+    def predict(self, text, min_similarity=MIN_SIMILARITY, min_margin=MIN_MARGIN) -> Optional[Prediction]:
+        """The confidently best category for `text`, or None."""
+        counts = {}
+        for feature in features(text):
+            counts[feature] = counts.get(feature, 0) + 1
+        if not counts or not self.categories:
+            return None
+
+        weights = {f: math.log1p(n) * self.idf.get(f, self.default_idf) for f, n in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        scores = {}
+        for feature, weight in weights.items():
+            for category_id, centroid_weight in self.index.get(feature, ()):
+                scores[category_id] = scores.get(category_id, 0.0) + weight * centroid_weight
+        if not scores:
+            return None
+
+        ranked = sorted(scores.items(), key=lambda item: -item[1])
+        best_id, best = ranked[0]
+        best /= norm
+        margin = best - (ranked[1][1] / norm if len(ranked) > 1 else 0.0)
+        if best < min_similarity or margin < min_margin:
+            return None
+        return Prediction(best_id, self.categories[best_id], round(best, 4), round(margin, 4))
+
+
+def train_and_store(min_examples=MIN_EXAMPLES):
+    """Train from task_categories and publish the model. Returns the model."""
+    categories = {
+        category.id: category.name for category in Category.query
+        if category.name.lower() != "uncategorized"
+    }
+    examples = (
+        (f"{title} {description or ''}", category_id)
+        for title, description, category_id in
+        db.session.query(Task.title, Task.description, task_categories.c.category_id)
+        .join(task_categories, task_categories.c.task_id == Task.id)
+        .filter(Task.is_deleted.is_(False))
+        .execution_options(yield_per=1000)
+    )
+    model = build_model(examples, categories, min_examples)
+    current_app.redis.set(MODEL_KEY, json.dumps(model, separators=(',', ':')))
+    _local.update(classifier=None, loaded_at=0.0)
+    return model
+
+
+def get_classifier():
+    """The published model, re-read from Redis every LOCAL_MODEL_TTL seconds; None if untrained."""
+    now = time.monotonic()
+    if now - _local['loaded_at'] < LOCAL_MODEL_TTL:
+        return _local['classifier']
+    try:
+        raw = current_app.redis.get(MODEL_KEY)
+        classifier = TaskClassifier(json.loads(raw)) if raw else None
+    except Exception as e:
+        logger.error(f"Failed to load the task classifier: {e}")
+        classifier = _local['classifier']
+    _local.update(classifier=classifier, loaded_at=now)
+    return classifier
+
+
+def classify(title, description=None) -> Optional[Prediction]:
+    """Confident local prediction for a task, or None to use the LLM."""
+    classifier = get_classifier()
+    if classifier is None:
+        return None
+    return classifier.predict(f"{title} {description or ''}")
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    vocab = {
+        1: "fix leaking sink pipe tap plumbing toilet drain water",
+        2: "clean house laundry dishes mop floor wash windows",
+        3: "design logo poster flyer website graphics brand",
+        4: "move couch boxes furniture truck carry lift shift",
+    }
+    def sample(category_id):
+        words = rng.choice(vocab[category_id].split(), size=5)
+        return " ".join(words) + " please help today"
+    train = [(sample(c), c) for c in vocab for _ in range(50)]
+    test = [(sample(c), c) for c in vocab for _ in range(200)]
+
+    started = time.perf_counter()
+    classifier = TaskClassifier(build_model(train, {c: f"Category {c}" for c in vocab}))
+    trained = time.perf_counter() - started
+    started = time.perf_counter()
+    predictions = [classifier.predict(text) for text, _ in test]
+    per_task = (time.perf_counter() - started) / len(test) * 1e6
+
+    answered = [(p, c) for p, (_, c) in zip(predictions, test) if p]
+    correct = sum(p.category_id == c for p, c in answered)
+    print(f"trained in {trained * 1000:.0f} ms, {per_task:.0f} us per task")
+    print(f"answered {len(answered)}/{len(test)} locally, {correct} correct")
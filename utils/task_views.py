@@ -0,0 +1,85 @@
+"""
+Task view tracking.
+
+Recording a view is one pipelined round trip: INCR the raw counter, PFADD
+the viewer into the task's HyperLogLog of unique viewers and SADD the task
+to a dirty set. A periodic job drains the dirty set and snapshots both
+numbers into tasks.view_count / tasks.unique_view_count, so popularity can
+be filtered and sorted in SQL without touching Redis.
+"""
+from flask import current_app
+from sqlalchemy import bindparam, update
+from models import db
+from models.task import Task
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Raw counter; the key name predates this module and is kept as is
+VIEWS_KEY = "task_views_{task_id}"
+VIEWERS_KEY = "task_viewers_{task_id}"
+DIRTY_KEY = "task_views:dirty"
+
+FLUSH_BATCH_SIZE = 500
+
+
+def record_view(task_id, viewer_id):
+    """Count one view of `task_id` by `viewer_id`. Never raises."""
+    try:
+        pipe = current_app.redis.pipeline(transaction=False)
+        pipe.incr(VIEWS_KEY.format(task_id=task_id))
+        pipe.pfadd(VIEWERS_KEY.format(task_id=task_id), viewer_id)
+        pipe.sadd(DIRTY_KEY, task_id)
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Failed to record view of task {task_id}: {e}")
+
+
+def get_view_counts(task_ids):
+    """Return {task_id: (views, unique_views)} live from Redis in one round trip."""
+    task_ids = list(task_ids)
+    if not task_ids:
+        return {}
+    pipe = current_app.redis.pipeline(transaction=False)
+    for task_id in task_ids:
+        pipe.get(VIEWS_KEY.format(task_id=task_id))
+        pipe.pfcount(VIEWERS_KEY.format(task_id=task_id))
+    results = pipe.execute()
+    return {
+        task_id: (int(results[2 * i] or 0), int(results[2 * i + 1] or 0))
+        for i, task_id in enumerate(task_ids)
+    }
+
+
+def flush_view_counts(batch_size=FLUSH_BATCH_SIZE, max_batches=100):
+    """
+    Snapshot the counters of every task viewed since the last flush into
+    the tasks table. Returns the number of tasks written.
+    Tasks popped from the dirty set are put back if the write fails.
+    """
+    redis = current_app.redis
+    tasks = Task.__table__
+    statement = (
+        update(tasks)
+        .where(tasks.c.id == bindparam('task_id'))
+        .values(view_count=bindparam('views'), unique_view_count=bindparam('unique_views'))
+    )
+
+    flushed = 0
+    for _ in range(max_batches):
+        task_ids = [int(task_id) for task_id in redis.spop(DIRTY_KEY, batch_size) or []]
+        if not task_ids:
+            break
+        counts = get_view_counts(task_ids)
+        try:
+            db.session.execute(statement, [
+                {'task_id': task_id, 'views': views, 'unique_views': unique_views}
+                for task_id, (views, unique_views) in counts.items()
+            ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            redis.sadd(DIRTY_KEY, *task_ids)
+            raise
+        flushed += len(task_ids)
+    return flushed
@@ -1,9 +1,9 @@
 from __future__ import annotations
-from typing import NamedTuple, Optional
+from typing import Dict, Iterable, NamedTuple, Optional
 from dataclasses import dataclass
-from sqlalchemy import func, select
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from models.review import Review
+from models.user_stats import UserStats
 from models import db
 
 
@@ -15,10 +15,10 @@ class RatingResult(NamedTuple):
 
 class UserRatingCalculator:
     """
-    Efficiently calculates user ratings with database-level optimizations.
+    Efficiently calculates user ratings from the maintained user_stats totals.
 
     Features:
-    - Single optimized query with COALESCE handling
+    - Primary-key lookups instead of aggregating reviews
     - Type-safe result container
     - Decimal-aware calculations
     - Session independence for testability
@@ -30,7 +30,7 @@ class UserRatingCalculator:
 
     def get_user_rating(self, user_id: int) -> RatingResult:
         """
-        Calculate rating statistics with database-level aggregation.
+        Calculate rating statistics from the user's running totals.
 
         Args:
             user_id: ID of user to calculate ratings for
@@ -40,18 +40,36 @@ class UserRatingCalculator:
               - final_rating: None if no ratings, else average rounded to 1 decimal
               - num_ratings: Total number of reviews considered
         """
-        # Single query with coalesce handling for database-level null protection
+        return self.get_user_ratings([user_id])[user_id]
+
+    def get_user_ratings(self, user_ids: Iterable[int]) -> Dict[int, RatingResult]:
+        """
+        Calculate rating statistics for many users with one query.
+
+        Args:
+            user_ids: IDs of users to calculate ratings for
+
+        Returns:
+            Dict mapping every requested user ID to its RatingResult;
+            users without reviews get RatingResult(None, 0)
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        results = {user_id: RatingResult(final_rating=None, num_ratings=0) for user_id in user_ids}
+        if not user_ids:
+            return results
+
         stmt = select(
-            func.coalesce(func.avg(Review.rating), None).label('average'),
-            func.count(Review.id).label('count')
+            UserStats.user_id,
+            UserStats.rating_sum,
+            UserStats.review_count
         ).where(
-            Review.reviewee_id == user_id
+            UserStats.user_id.in_(user_ids),
+            UserStats.review_count > 0
         )
 
-        result = self.session.execute(stmt).fetchone()
-
-        avg_rating = round(result.average, 1) if result.average is not None else None
-        return RatingResult(
-            final_rating=avg_rating,
-            num_ratings=result.count or 0
-        )
+        for row in self.session.execute(stmt):
+            results[row.user_id] = RatingResult(
+                final_rating=round(row.rating_sum / row.review_count, 1),
+                num_ratings=row.review_count
+            )
+        return results
@@ -1,49 +1,168 @@
 import logging
+import math
+import time
+from collections import defaultdict
 from celery_app import celery
 from flask import current_app
-from workers.instant_recomendation import recommend_best_user_for_task
+from sqlalchemy import and_
+from sqlalchemy.orm import joinedload
+from models import db
+from models.task import Task
+from models.user import User
+from models.user_location import UserLocation
+from models.recommended_tasks import RecommendedTasks
+from utils.candidate_ranking import haversine_km, rank_candidates_for_tasks
+from utils.cache_namespace import bump, recommendations_namespace
+from utils.doer_locations import nearby_user_ids
+from utils.geohash import encode as encode_geohash, decode_bbox, KM_PER_DEGREE
+from utils.recommendation_queue import migrate_legacy_batch, pop_batch, requeue, record_run
+from workers.instant_recomendation import (
+    MAX_DISTANCE_KM, RECOMMENDATIONS_PER_TASK, load_candidate_options
+)
+from workers.notifications import notify_users
 
 logger = logging.getLogger(__name__)
 
-BATCH_KEY = "duotasks:recommendation:batch"
+# Tasks sharing a cell of this precision (~4.9km x 4.9km) share one candidate query
+CELL_PRECISION = 5
+
+
+def _cell_candidates(cell):
+    """
+    Candidates for every task in `cell`: everyone within MAX_DISTANCE_KM of
+    any point of the cell. Ranking then drops those too far from each task.
+    """
+    lat_min, lat_max, lon_min, lon_max = decode_bbox(cell)
+    center_lat, center_lon = (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+    half_diagonal_km = float(haversine_km(center_lat, center_lon, lat_max, lon_max))
+
+    nearby = nearby_user_ids(center_lat, center_lon, MAX_DISTANCE_KM + half_diagonal_km)
+    if nearby is not None:
+        if not nearby:
+            return {}
+        return load_candidate_options(User.id.in_([user_id for user_id, _ in nearby]))
+
+    logger.warning("Location index unavailable, falling back to a bounding-box query")
+    lat_margin = MAX_DISTANCE_KM / KM_PER_DEGREE
+    widest = max(abs(lat_min), abs(lat_max)) + lat_margin
+    lon_margin = lat_margin / max(math.cos(math.radians(min(widest, 89.0))), 0.01)
+    return load_candidate_options(and_(
+        UserLocation.latitude.between(lat_min - lat_margin, lat_max + lat_margin),
+        UserLocation.longitude.between(lon_min - lon_margin, lon_max + lon_margin)
+    ))
+
+
+def recommend_for_tasks(task_ids):
+    """
+    Recommend doers for a batch of tasks. Physical tasks are grouped by
+    geohash cell; each cell's candidates are loaded once and all of its
+    tasks are ranked in one vectorized pass. Recommendations
+    are saved with one commit and notifications are queued as one job.
+    Returns the number of recommendations saved.
+    """
+    tasks = (
+        Task.query.options(joinedload(Task.location))
+        .filter(Task.id.in_(task_ids))
+        .all()
+    )
+
+    groups = defaultdict(list)
+    for task in tasks:
+        if task.work_mode != "physical" or not task.location:
+            continue
+        latitude, longitude = float(task.location.latitude), float(task.location.longitude)
+        cell = (task.location.geohash or encode_geohash(latitude, longitude))[:CELL_PRECISION]
+        groups[cell].append(task)
+    logger.info(f"{len(tasks)} tasks loaded, {sum(map(len, groups.values()))} physical in {len(groups)} cells")
+
+    recommendations = []
+    notifications = []
+    for cell, group in groups.items():
+        candidates = list(_cell_candidates(cell).values())
+        if not candidates:
+            continue
+
+        ranked = rank_candidates_for_tasks(
+            [
+                {
+                    'text': f"{task.title} {task.description or ''}",
+                    'latitude': float(task.location.latitude),
+                    'longitude': float(task.location.longitude),
+                    'exclude_user_id': task.user_id,
+                }
+                for task in group
+            ],
+            candidates,
+            max_distance_km=MAX_DISTANCE_KM,
+            limit=RECOMMENDATIONS_PER_TASK
+        )
+        for task, best in zip(group, ranked):
+            message = f"Task '{task.title}' is available for you. Check it out!"
+            for candidate in best:
+                recommendations.append(RecommendedTasks(task_id=task.id, user_id=candidate.user_id))
+                notifications.append([candidate.user_id, message])
+
+    if not recommendations:
+        return 0
+
+    db.session.bulk_save_objects(recommendations)
+    db.session.commit()
+    bump(*{recommendations_namespace(row.user_id) for row in recommendations})
+    notify_users.delay(notifications, 'task_recommendation')
+    return len(recommendations)
+
 
 @celery.task(bind=True, name="workers.process_batch_recommendation")
 def process_batch_recommendation(self):
+    """
+    Drain the queue oldest first, RECOMMENDATION_BATCH_SIZE tasks per pass,
+    until it is empty or a pass ends after RECOMMENDATION_BATCH_TIME_BUDGET
+    seconds. Whatever is left waits for the next run.
+    """
+    redis_client = current_app.redis
+    if not redis_client:
+        logger.error("Redis client not available. Cannot process batch recommendation.")
+        return
+
+    batch_size = current_app.config.get("RECOMMENDATION_BATCH_SIZE", 500)
+    time_budget = current_app.config.get("RECOMMENDATION_BATCH_TIME_BUDGET", 60)
+    started = time.monotonic()
+    drained = 0
     try:
-        with current_app.app_context():
-            redis_client = current_app.redis
-
-        if not redis_client:
-            logger.error("Redis client not available. Cannot process batch recommendation.")
-            return
-
-        task_ids_raw = redis_client.smembers(BATCH_KEY)
-        if not task_ids_raw:
-            logger.info("No tasks in batch queue.")
-            return
-
-        logger.info(f"Found {len(task_ids_raw)} task IDs in batch queue.")
-        logger.info(f"Raw task IDs: {task_ids_raw}")
-        task_ids = []
-        for tid in task_ids_raw:
-            try:
-                task_ids.append(int(tid))
-            except Exception as e:
-                logger.warning(f"Could not decode task_id {tid}: {e}")
+        moved = migrate_legacy_batch(redis_client)
+        if moved:
+            logger.info(f"Moved {moved} task IDs from the legacy batch set")
 
-        if not task_ids:
-            logger.warning("All task_ids were invalid or failed to decode.")
-            return
+        while True:
+            entries = pop_batch(redis_client, batch_size)
+            if not entries:
+                break
 
-        logger.info(f"Processing {len(task_ids)} task IDs from batch: {task_ids}")
+            task_ids = []
+            for tid, _ in entries:
+                try:
+                    task_ids.append(int(tid))
+                except Exception as e:
+                    logger.warning(f"Could not decode task_id {tid}: {e}")
 
-        # Clear the batch queue
-        redis_client.delete(BATCH_KEY)
+            logger.info(f"Processing {len(task_ids)} task IDs from batch")
+            try:
+                saved = recommend_for_tasks(task_ids) if task_ids else 0
+            except Exception:
+                db.session.rollback()
+                requeue(redis_client, entries)
+                raise
+            drained += len(entries)
+            logger.info(f"Saved {saved} recommendations for {len(task_ids)} tasks")
 
-        # Trigger individual recommendations
-        for task_id in task_ids:
-            logger.info(f"Queuing recommendation for task_id: {task_id}")
-            recommend_best_user_for_task.delay(task_id)
+            if len(entries) < batch_size or time.monotonic() - started >= time_budget:
+                break
 
     except Exception as e:
         logger.exception(f"Unexpected error while processing batch recommendation: {e}")
+    finally:
+        try:
+            metrics = record_run(redis_client, drained, time.monotonic() - started)
+            logger.info(f"Batch recommendation run: {metrics}")
+        except Exception as e:
+            logger.error(f"Failed to record batch queue metrics: {e}")
@@ -0,0 +1,22 @@
+import logging
+from flask import current_app
+from celery_app import celery
+from utils.chat_messages import flush_messages
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(bind=True, name="workers.flush_chat_messages")
+def flush_chat_messages(self):
+    """Write queued chat messages and status changes to the database."""
+    try:
+        result = flush_messages(current_app.config.get("MESSAGE_FLUSH_BATCH_SIZE", 1000))
+        if result is None:
+            # Another flush holds the lock; this one may be the only one scheduled
+            flush_chat_messages.apply_async(countdown=current_app.config.get("MESSAGE_FLUSH_WINDOW", 1))
+            return
+        written, applied = result
+        if written or applied:
+            logger.info(f"Flushed {written} chat messages and {applied} status changes.")
+    except Exception as e:
+        logger.exception(f"Failed to flush chat messages: {e}")
@@ -0,0 +1,15 @@
+import logging
+from celery_app import celery
+from utils.doer_locations import rebuild_location_index
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(bind=True, name="workers.rebuild_doer_locations")
+def rebuild_doer_locations(self):
+    """Rebuild the Redis GEO index of user locations from the database."""
+    try:
+        indexed = rebuild_location_index()
+        logger.info(f"Indexed locations of {indexed} users.")
+    except Exception as e:
+        logger.exception(f"Failed to rebuild the doer location index: {e}")
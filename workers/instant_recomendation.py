@@ -4,15 +4,17 @@ from models import db
 from models.user_location import UserLocation
 from models.user_info import UserInfo
 from models.user import User
-from utils.haversine_distance_km import haversine_distance_km
+from utils.candidate_ranking import rank_candidates
+from utils.doer_locations import nearby_user_ids
+from utils.gemini_client import gemini_client
 from models.task import Task
 from workers.notifications import notify_user
 from models.recommended_tasks import RecommendedTasks
 from models.user_relation import UserRelation
+from utils.cache_namespace import bump, recommendations_namespace
 import logging
 from sqlalchemy.orm import joinedload
 from sqlalchemy import and_, or_
-import requests
 import json
 import os
 import math
@@ -20,6 +22,11 @@ import re
 
 logger = logging.getLogger(__name__)
 
+MAX_DISTANCE_KM = 25
+RECOMMENDATIONS_PER_TASK = 3
+# Shortlist size sent to the LLM when re-ranking is enabled
+RERANK_CANDIDATES = 5
+
 from celery_app import celery
 @celery.task(bind=True, name="workers.instant_recommendation.recommend_best_user_for_task", max_retries=3, default_retry_delay=30)
 def recommend_best_user_for_task(self, task_id):
@@ -46,97 +53,108 @@ def recommend_best_user_for_task(self, task_id):
         task_lon = float(task.location.longitude)
         logger.info(f"Task location: lat={task_lat}, lon={task_lon}")
 
-        LAT_KM = 0.225
-        LON_KM = 0.225 / abs(math.cos(math.radians(task_lat)))
-        lat_min, lat_max = task_lat - LAT_KM, task_lat + LAT_KM
-        lon_min, lon_max = task_lon - LON_KM, task_lon + LON_KM
-        logger.debug(f"Bounding box: ({lat_min}, {lat_max}), ({lon_min}, {lon_max})")
-
         favorite_ids = [row[0] for row in db.session.query(UserRelation.related_user_id).filter_by(
             user_id=task.user_id,
             relation_type='favorite'
         ).all()]
 
-        if favorite_ids:
-            # Combine favorites + location filter
-            candidates = (
-                db.session.query(User, UserInfo, UserLocation)
-                .join(UserInfo, User.id == UserInfo.user_id)
-                .join(UserLocation, User.id == UserLocation.user_id)
-                .filter(
-                    and_(
-                        User.id != task.user_id,
-                        or_(
-                            and_(
-                                UserLocation.latitude.between(lat_min, lat_max),
-                                UserLocation.longitude.between(lon_min, lon_max)
-                            ),
-                            User.id.in_(favorite_ids)
-                        )
-                    )
-                )
-                .distinct(User.id)
-                .all()
-            )
+        nearby = nearby_user_ids(task_lat, task_lon, MAX_DISTANCE_KM)
+        if nearby is not None:
+            # Users around the task come from the GEO index; rows are then
+            # fetched by primary key instead of scanning user_location
+            candidate_ids = {user_id for user_id, _ in nearby} | set(favorite_ids)
+            candidate_ids.discard(task.user_id)
+            logger.info(f"Location index returned {len(nearby)} users within {MAX_DISTANCE_KM}km")
+            if not candidate_ids:
+                logger.info(f"No suitable users found within {MAX_DISTANCE_KM}km for task {task_id}")
+                return
+            location_filter = User.id.in_(candidate_ids)
         else:
-            # Only filter by location
-            candidates = (
-                db.session.query(User, UserInfo, UserLocation)
-                .join(UserInfo, User.id == UserInfo.user_id)
-                .join(UserLocation, User.id == UserLocation.user_id)
-                .filter(
-                    and_(
-                        User.id != task.user_id,
-                        UserLocation.latitude.between(lat_min, lat_max),
-                        UserLocation.longitude.between(lon_min, lon_max)
-                    )
-                )
-                .all()
+            logger.warning("Location index unavailable, falling back to a bounding-box query")
+            LAT_KM = 0.225
+            LON_KM = 0.225 / abs(math.cos(math.radians(task_lat)))
+            lat_min, lat_max = task_lat - LAT_KM, task_lat + LAT_KM
+            lon_min, lon_max = task_lon - LON_KM, task_lon + LON_KM
+            logger.debug(f"Bounding box: ({lat_min}, {lat_max}), ({lon_min}, {lon_max})")
+            in_box = and_(
+                UserLocation.latitude.between(lat_min, lat_max),
+                UserLocation.longitude.between(lon_min, lon_max)
+            )
+            location_filter = and_(
+                User.id != task.user_id,
+                or_(in_box, User.id.in_(favorite_ids)) if favorite_ids else in_box
             )
 
+        options = load_candidate_options(location_filter)
+        logger.info(f"Found {len(options)} candidates")
 
-        logger.info(f"Found {len(candidates)} candidates within bounding box")
-
-        options = []
-        for user, info, loc in candidates:
-            distance = haversine_distance_km(task_lat, task_lon, float(loc.latitude), float(loc.longitude))
-            if distance > 25:
-                logger.debug(f"Skipping user {user.id} - {distance:.2f}km is too far")
-                continue
-            options.append({
-                "user_id": user.id,
-                "bio": info.bio or "",
-                "tagline": info.tagline or "",
-                "distance_km": round(distance, 2)
-            })
-
-        logger.info(f"{len(options)} candidates within 25km after distance filtering")
+        rerank = current_app.config.get("RECOMMENDATION_LLM_RERANK") and os.getenv("GEMINI_API_KEY")
+        ranked = rank_candidates(
+            f"{task.title} {task.description or ''}", task_lat, task_lon, list(options.values()),
+            max_distance_km=MAX_DISTANCE_KM,
+            limit=RERANK_CANDIDATES if rerank else RECOMMENDATIONS_PER_TASK
+        )
+        logger.info(f"{len(ranked)} top candidates within {MAX_DISTANCE_KM}km after local ranking")
 
-        if not options:
-            logger.info(f"No suitable users found within 25km for task {task_id}")
+        if not ranked:
+            logger.info(f"No suitable users found within {MAX_DISTANCE_KM}km for task {task_id}")
             return
 
-        prompt = build_gemini_prompt(task, options)
-        logger.debug(f"Gemini prompt built:\n{prompt}")
-        recommended_user_ids = query_gemini_for_best_fit(prompt, options)
+        recommended_user_ids = [candidate.user_id for candidate in ranked[:RECOMMENDATIONS_PER_TASK]]
+        if rerank:
+            # The LLM only re-orders the shortlist; the local ranking stands if it fails
+            shortlist = [
+                dict(options[candidate.user_id], distance_km=candidate.distance_km)
+                for candidate in ranked
+            ]
+            prompt = build_gemini_prompt(task, shortlist)
+            logger.debug(f"Gemini prompt built:\n{prompt}")
+            reranked_ids = query_gemini_for_best_fit(prompt, shortlist)
+            if reranked_ids:
+                recommended_user_ids = reranked_ids[:RECOMMENDATIONS_PER_TASK]
 
         if recommended_user_ids:
-            logger.info(f"Gemini recommended user IDs: {recommended_user_ids}")
+            logger.info(f"Recommended user IDs: {recommended_user_ids}")
             db.session.bulk_save_objects([
                 RecommendedTasks(task_id=task.id, user_id=user_id)
                 for user_id in recommended_user_ids
             ])
             db.session.commit()
             logger.info(f"Saved {len(recommended_user_ids)} recommendations for task {task.id}")
+            bump(*[recommendations_namespace(user_id) for user_id in recommended_user_ids])
 
             send_task_recommendation(recommended_user_ids, task)
         else:
-            logger.info(f"Gemini returned no recommended user for task {task_id}")
+            logger.info(f"No recommended user for task {task_id}")
 
     except Exception as exc:
         logger.error(f"Error in recommending users for task {task_id}: {exc}")
         raise self.retry(exc=exc)
 
+
+def load_candidate_options(location_filter):
+    """Profiles and locations of the users matching `location_filter`, keyed by user id."""
+    candidates = (
+        db.session.query(User, UserInfo, UserLocation)
+        .join(UserInfo, User.id == UserInfo.user_id)
+        .join(UserLocation, User.id == UserLocation.user_id)
+        .filter(location_filter)
+        .all()
+    )
+    return {
+        user.id: {
+            "user_id": user.id,
+            "bio": info.bio or "",
+            "tagline": info.tagline or "",
+            "text": f"{info.tagline or ''} {info.bio or ''}",
+            "latitude": float(loc.latitude),
+            "longitude": float(loc.longitude),
+            "rating": info.rating,
+            "completion_rate": info.completion_rate,
+        }
+        for user, info, loc in candidates
+    }
+
     
 def build_gemini_prompt(task, candidates):
     logger.info("Building Gemini prompt...")
@@ -157,38 +175,16 @@ def build_gemini_prompt(task, candidates):
     return prompt
 
 def query_gemini_for_best_fit(prompt, options):
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     logger.info("Sending request to Gemini for user recommendation...")
 
-    GEMINI_URL = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
     system_instruction = (
         "You are an assistant that selects the best users for a task based on relevance and proximity. "
         "Return a JSON object in this exact format: {\"user_ids\": [123, 456]} with the most suitable user IDs in order. "
         "Do not return anything else besides valid JSON."
     )
 
-    payload = {
-        "contents": [
-            {
-                "role": "user",
-                "parts": [
-                    {"text": f"{system_instruction}\n\n{prompt}"}
-                ]
-            }
-        ]
-    }
-
-    
-    headers = {
-        "Content-Type": "application/json",
-        "x-goog-api-key": GEMINI_API_KEY   
-    }
-
     try:
-        response = requests.post(GEMINI_URL, headers=headers, json=payload, timeout=20)
-        response.raise_for_status()
-        data = response.json()
-        raw_text = data['candidates'][0]['content']['parts'][0]['text']
+        raw_text = gemini_client().generate_text(f"{system_instruction}\n\n{prompt}")
         logger.debug(f"Raw Gemini response text: {raw_text}")
 
         # Remove code block markers like ```json ... ```
@@ -203,13 +199,9 @@ def query_gemini_for_best_fit(prompt, options):
         return matched_ids
     except Exception as e:
         logger.error(f"Gemini request failed: {e}")
-        logger.error(f"Gemini raw response: {response.text if 'response' in locals() else 'No response'}")
         return []
 
 
-
-
-
 def send_task_recommendation(user_ids, task):
     if not user_ids:
         logger.info(f"No users to notify for task {task.id}")
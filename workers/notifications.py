@@ -154,6 +154,18 @@ def notify_user(self, user_id, message, source, is_important=False, sender_id=No
         logger.error(f"Failed to send notification to user {user_id}: {exc}")
         raise self.retry(exc=exc)
 
+@celery.task(bind=True, name="workers.notification.notify_users", max_retries=3, default_retry_delay=30)
+def notify_users(self, notifications, source, sender_id=None):
+    """
+    Notify many users at once; `notifications` is a list of [user_id, message].
+    """
+    try:
+        Notify.post_many([(int(user_id), message) for user_id, message in notifications], source, sender_id)
+        logger.info(f"Sent {len(notifications)} '{source}' notifications")
+    except Exception as exc:
+        logger.error(f"Failed to send {len(notifications)} notifications: {exc}")
+        raise self.retry(exc=exc)
+
 @celery.task(bind=True, name="workers.notification.task_assigned", max_retries=3, default_retry_delay=30)
 def task_assigned(self, task_id, user_id, sender_id):
     # notify the successfully bidder that the task was   accepted and the task owner should reach out soon
@@ -0,0 +1,17 @@
+import logging
+from celery_app import celery
+from utils.presence import flush_presence, sweep_expired
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(bind=True, name="workers.flush_presence")
+def flush_presence_changes(self):
+    """Expire dead connections, then write pending online/offline changes to users."""
+    try:
+        expired = sweep_expired()
+        flushed = flush_presence()
+        if expired or flushed:
+            logger.info(f"Presence: {expired} users timed out, {flushed} users written.")
+    except Exception as e:
+        logger.exception(f"Failed to flush presence: {e}")
@@ -0,0 +1,18 @@
+import logging
+from celery_app import celery
+from utils.task_classifier import train_and_store
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(bind=True, name="workers.train_task_classifier")
+def train_task_classifier(self):
+    """Retrain the local task categorizer from current category assignments."""
+    try:
+        model = train_and_store()
+        logger.info(
+            f"Task classifier trained on {model['examples']} tasks "
+            f"across {len(model['categories'])} categories."
+        )
+    except Exception as e:
+        logger.exception(f"Failed to train the task classifier: {e}")
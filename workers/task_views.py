@@ -0,0 +1,16 @@
+import logging
+from celery_app import celery
+from utils.task_views import flush_view_counts
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(bind=True, name="workers.flush_task_views")
+def flush_task_views(self):
+    """Copy Redis view counters of recently viewed tasks into the tasks table."""
+    try:
+        flushed = flush_view_counts()
+        if flushed:
+            logger.info(f"Flushed view counts for {flushed} tasks.")
+    except Exception as e:
+        logger.exception(f"Failed to flush task view counts: {e}")
@@ -1,14 +1,20 @@
 from flask import current_app
 from models import db
-from models.task import Task
-import requests
+from models.task import Task, task_categories
 from workers.instant_recomendation import recommend_best_user_for_task
 from models.category import Category
 from models.task_image import TaskImage
 from sqlalchemy import func, desc
+from utils.cache_namespace import bump, TASK_FEEDS, user_namespace, task_namespace
+from utils.task_cards import refresh_cards
+from utils.gemini_client import gemini_client, GeminiError
+from utils.task_classifier import classify
+from utils.categorization_queue import forget, pending_count, pop_pending, requeue
 # import google.generativeai as genai  # ❌ Commented out
+import json
 import logging
 import os
+import re
 import time
 from datetime import datetime, timedelta
 from celery.schedules import crontab
@@ -26,9 +32,6 @@ from celery_app import celery
 
 
 def categorize_task_manually(task_title, task_description, category_names):
-    api_key = os.getenv('GEMINI_API_KEY')
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
-    
     prompt = f"""
     You are a task categorization assistant for a gig marketplace.
 
@@ -55,34 +58,17 @@ def categorize_task_manually(task_title, task_description, category_names):
     Output:
     """
 
-
-    payload = {
-        "contents": [{
-            "parts": [{
-                "text": prompt
-            }]
-        }],
-        "generationConfig": {
-            "temperature": 0.2,
-            "maxOutputTokens": 20
-        }
-    }
-
-    headers = {
-        "Content-Type": "application/json",
-        "x-goog-api-key": api_key   
-    }
-
-    response = requests.post(url, headers=headers, json=payload)
-
-    if response.status_code == 200:
-        data = response.json()
-        category = data['candidates'][0]['content']['parts'][0]['text'].strip().title()[:50].strip(' .')
-        return category or "Uncategorized"
-    else:
-        logger.error(f"Gemini API Error: {response.status_code} - {response.text}")
+    try:
+        text = gemini_client().generate_text(
+            prompt, generation_config={"temperature": 0.2, "maxOutputTokens": 20}
+        )
+    except GeminiError as e:
+        logger.error(str(e))
         return "Uncategorized"
 
+    category = text.strip().title()[:50].strip(' .')
+    return category or "Uncategorized"
+
 
 @celery.task(bind=True, max_retries=3, default_retry_delay=30)
 def categorize_task(self, task_id):
@@ -93,21 +79,20 @@ def categorize_task(self, task_id):
             logger.error(f"Task {task_id} not found")
             return
 
-        existing_categories = Category.query.with_entities(Category.name).all()
-        category_names = [c[0] for c in existing_categories]
-
-        # Use manual Gemini API call instead of genai SDK
-        category_name = categorize_task_manually(task.title, task.description, category_names)
+        # Confident local predictions skip the LLM round-trip
+        prediction = classify(task.title, task.description)
+        category = db.session.get(Category, prediction.category_id) if prediction else None
+        if category:
+            category_name = category.name
+            logger.info(f"Task {task_id} classified locally as {category_name} ({prediction.similarity})")
+        else:
+            existing_categories = Category.query.with_entities(Category.name).all()
+            category_names = [c[0] for c in existing_categories]
 
-        category = next(
-            (c for c in Category.query.all() if c.name.lower() == category_name.lower()),
-            None
-        )
+            # Use manual Gemini API call instead of genai SDK
+            category_name = categorize_task_manually(task.title, task.description, category_names)
 
-        if not category:
-            category = Category(name=category_name)
-            db.session.add(category)
-            db.session.flush()
+            category = db.session.get(Category, _resolve_categories([category_name])[category_name])
 
         if category not in task.categories:
             task.categories.append(category)
@@ -120,6 +105,7 @@ def categorize_task(self, task_id):
                 task.categories.remove(uncategorized)
 
             db.session.commit()
+            invalidate_task_caches(task)
             _reccomend_to_doers(task_id)
             logger.info(f"Successfully categorized task {task_id} as {category_name}")
         else:
@@ -129,11 +115,174 @@ def categorize_task(self, task_id):
 
     except Exception as e:
         logger.error(f"Failed to categorize task {task_id}: {str(e)}")
+        _category_ids.clear()
         self.retry(exc=e)
 
 
     
 
+def categorize_tasks_manually(tasks, category_names):
+    """
+    Categorize several tasks with one Gemini request.
+    `tasks` is a list of (task_id, title, description); returns {task_id: category name}
+    for the tasks the model answered.
+    """
+    listing = "\n".join(
+        f'{task_id}: "{title}" - {description or ""}' for task_id, title, description in tasks
+    )
+    prompt = f"""
+    You are a task categorization assistant for a gig marketplace.
+
+    For EACH task below, choose the MOST SUITABLE category from this list: {', '.join(category_names) or 'None'}
+    If no category fits well, you may create a NEW, highly relevant category.
+    Do NOT use "Uncategorized". Pick categories that describe the NATURE of the work.
+
+    Return ONLY a JSON object mapping each task number to its category name, e.g.
+    {{"12": "Plumbing", "15": "Graphic Design"}}
+
+    Tasks:
+    {listing}
+    """
+
+    try:
+        text = gemini_client().generate_text(
+            prompt, generation_config={"temperature": 0.2, "maxOutputTokens": 50 + 20 * len(tasks)}
+        )
+        answers = json.loads(re.sub(r"```json|```", "", text, flags=re.IGNORECASE).strip())
+    except (GeminiError, ValueError) as e:
+        logger.error(f"Batch categorization failed: {e}")
+        return {}
+
+    names = {}
+    for task_id, _, _ in tasks:
+        name = str(answers.get(str(task_id)) or "").strip().title()[:50].strip(' .')
+        if name:
+            names[task_id] = name
+    return names
+
+
+# Lowercased category name -> id, shared by every categorization in this process
+_category_ids = {}
+
+
+def _resolve_categories(names):
+    """
+    Map category names to ids through the in-process index. Unknown names
+    are looked up in one query, and those still missing are created.
+    """
+    wanted = {name.lower(): name for name in names}
+    missing = [key for key in wanted if key not in _category_ids]
+    if missing:
+        for category_id, name in (
+            db.session.query(Category.id, Category.name)
+            .filter(func.lower(Category.name).in_(missing))
+        ):
+            _category_ids[name.lower()] = category_id
+        created = [Category(name=wanted[key]) for key in missing if key not in _category_ids]
+        if created:
+            db.session.add_all(created)
+            db.session.flush()
+            _category_ids.update((category.name.lower(), category.id) for category in created)
+    return {name: _category_ids[name.lower()] for name in names}
+
+
+@celery.task(bind=True, name="workers.tasks.flush_categorization_batch")
+def flush_categorization_batch(self):
+    """
+    Categorize the pending tasks together: confident local predictions
+    first, then one multi-task Gemini request for the rest. All category
+    links are written in one transaction. Tasks Gemini didn't answer, or
+    the whole batch if the transaction fails, are queued again.
+    """
+    batch_size = current_app.config.get("CATEGORIZATION_BATCH_SIZE", 20)
+    task_ids = pop_pending(batch_size)
+    if not task_ids:
+        return 0
+    if len(task_ids) == batch_size and pending_count():
+        flush_categorization_batch.delay()
+
+    remote = []
+    unanswered = []
+    try:
+        tasks = (
+            db.session.query(Task.id, Task.title, Task.description, Task.user_id)
+            .filter(Task.id.in_(task_ids), Task.is_deleted.is_(False))
+            .all()
+        )
+        links = {}
+        for task_id, category_id in db.session.query(task_categories).filter(
+            task_categories.c.task_id.in_(task_ids)
+        ):
+            links.setdefault(task_id, set()).add(category_id)
+        uncategorized_id = _resolve_categories(["Uncategorized"])["Uncategorized"]
+
+        names = {}
+        for task in tasks:
+            if links.get(task.id, set()) - {uncategorized_id}:
+                continue  # already categorized
+            prediction = classify(task.title, task.description)
+            if prediction:
+                names[task.id] = prediction.name
+            else:
+                remote.append((task.id, task.title, task.description))
+        if remote:
+            category_names = [name for _, name in db.session.query(Category.id, Category.name)]
+            names.update(categorize_tasks_manually(remote, category_names))
+        names = {task_id: name for task_id, name in names.items() if name.lower() != "uncategorized"}
+        unanswered = [task_id for task_id, _, _ in remote if task_id not in names]
+        if not names:
+            _retry_later(unanswered)
+            return 0
+
+        category_ids = _resolve_categories(set(names.values()))
+        db.session.execute(task_categories.insert(), [
+            {'task_id': task_id, 'category_id': category_ids[name]}
+            for task_id, name in names.items()
+            if category_ids[name] not in links.get(task_id, set())
+        ])
+        db.session.execute(task_categories.delete().where(
+            task_categories.c.task_id.in_(list(names)),
+            task_categories.c.category_id == uncategorized_id
+        ))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        # Ids may be stale after a rollback (e.g. a category created then undone)
+        _category_ids.clear()
+        logger.error(f"Failed to categorize batch {task_ids}: {e}")
+        _retry_later(task_ids)
+        raise
+
+    forget(list(names))
+    _retry_later(unanswered)
+
+    owners = {task.id: task.user_id for task in tasks}
+    bump(TASK_FEEDS, *{user_namespace(owners[task_id]) for task_id in names},
+         *[task_namespace(task_id) for task_id in names])
+    refresh_cards(list(names))
+    for task_id in names:
+        _reccomend_to_doers(task_id)
+    logger.info(f"Categorized {len(names)} of {len(task_ids)} tasks, {len(remote)} through Gemini")
+    return len(names)
+
+
+def _retry_later(task_ids):
+    """Queue tasks for another flush, giving up on ones that failed too often."""
+    window = current_app.config.get("CATEGORIZATION_BATCH_WINDOW", 5)
+    try:
+        schedule, dropped = requeue(task_ids, window)
+    except Exception as e:
+        logger.error(f"Failed to requeue tasks {task_ids} for categorization: {e}")
+        return
+    if schedule:
+        flush_categorization_batch.apply_async(countdown=window)
+    if dropped:
+        logger.error(f"Giving up categorizing tasks {dropped}; they stay uncategorized")
+        # As the per-task path does, doers still hear about them
+        for task_id in dropped:
+            _reccomend_to_doers(task_id)
+
+
 @celery.on_after_configure.connect
 def setup_periodic_tasks(sender, **kwargs):
     sender.add_periodic_task(
@@ -231,23 +380,10 @@ def delete_task_assets(task):
     task.categories = []
 
 def invalidate_task_caches(task):
-    """Efficient cache invalidation with pipelining"""
-    redis = current_app.redis  # Retrieve Redis from app context
-    pipe = redis.pipeline()
-
-    # Invalidate task-specific cache
-    pipe.delete(f"task_{task.id}")
-
-    # Invalidate user-related task caches
-    keys = redis.keys(f"user_{task.user_id}_tasks*")
-    if keys:
-        pipe.delete(*keys)
-    pipe.delete("recent_tasks", "featured_tasks")
-
-    # Mark for delayed list invalidation
-    pipe.sadd("pending_cache_invalidations", f"tasks_{task.user_id}")
-
-    pipe.execute()
+    """Constant-time cache invalidation via namespace generations"""
+    # Feeds, owner views and per-task variants (detail view included)
+    bump(TASK_FEEDS, user_namespace(task.user_id), task_namespace(task.id))
+    refresh_cards([task.id])
 
 def chunked(iterable, size):
     """Efficient chunking generator"""
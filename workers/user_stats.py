@@ -0,0 +1,22 @@
+import logging
+from celery_app import celery
+from models import db
+from models.user_stats import reconcile_user_stats
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(bind=True, name="workers.reconcile_user_stats")
+def reconcile_all_user_stats(self):
+    """Recount every user's stats in chunks and repair rows that drifted."""
+    after_id, repaired = 0, []
+    try:
+        while after_id is not None:
+            after_id, rebuilt = reconcile_user_stats(db.session.connection(), after_id)
+            db.session.commit()
+            repaired.extend(rebuilt)
+        if repaired:
+            logger.warning(f"Rebuilt drifted stats of {len(repaired)} users: {repaired[:20]}")
+    except Exception as e:
+        db.session.rollback()
+        logger.exception(f"Failed to reconcile user stats: {e}")